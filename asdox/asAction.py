@@ -9,39 +9,48 @@ from asModel import (
     ASVirtualMethod, ASMethod, ASMetodBody,
     ASType, ASVariable,
     ASImport,
+    strings,
 )
+from asSymbols import importedNames
 
 _isTracing = False
 # _isTracing = True
 
+# 标识符, 类型名, 可见性等在语料中大量重复, 共用同一个字符串对象
+_intern = strings.intern
+_internAll = strings.internAll
+
 
 def parseASPackage(s, location, tokens):
     if _isTracing:
         print('parseASPackage[{0}] @ loc({1})'.format(tokens.name, location))
-    pkg = ASPackage(tokens.name)
+    pkg = ASPackage(_intern(tokens.name))
     if tokens.imports:
         tokens.imports = tokens.imports.asList()
         pkg.imports += tokens.imports
+    # 类/接口记录本文件的导入; 融合时 pkg.imports 会加入其他文件的导入
+    imports = list(pkg.imports)
     if tokens.use_namespace:
-        pkg.use_namespace += tokens.use_namespace.asList()
+        pkg.use_namespace += _internAll(tokens.use_namespace.asList())
     # 定义的类
     if tokens.class_:
         cls = tokens.class_[0]
         if pkg.name:
             cls.full_name = pkg.name + '.' + cls.name
+        cls.imports = imports
         pkg.classes[cls.name] = cls
         # 把成员变量类名替换为全名
+        imported = importedNames(tokens.imports)
         for var in cls.variables.values():
-            for imported_cls in tokens.imports:
-                imported_cls_name = imported_cls.name.split('.')[-1]
-                if var.type_ == imported_cls_name:
-                    var.type_ = imported_cls
-                    break
+            imp = imported.get(var.type_)
+            if imp is not None:
+                var.type_ = imp
     # 定义的接口
     if tokens.interface:
         interface = tokens.interface[0]
         if pkg.name:
             interface.full_name = pkg.name + '.' + interface.name
+        interface.imports = imports
         pkg.interfaces[interface.name] = interface
     # tokens
     pkg.setTokens(tokens)
@@ -51,16 +60,16 @@ def parseASPackage(s, location, tokens):
 def parseASClass(s, location, tokens):
     if _isTracing:
         print('parseASClass[{0}] @ loc({1})'.format(tokens.name, location))
-    cls = ASClass(tokens.name)
+    cls = ASClass(_intern(tokens.name))
     # 基类 & 接口
-    cls.extends = tokens.extends
+    cls.extends = _intern(tokens.extends)
     if tokens.implements:
-        cls.implements = tokens.implements.asList()
+        cls.implements = _internAll(tokens.implements.asList())
     # 可见性
     if tokens.visibility == '':
         cls.visibility = 'internal'
     else:
-        cls.visibility = tokens.visibility
+        cls.visibility = _intern(tokens.visibility)
     # 其他属性
     if tokens.dynamic == 'dynamic':
         cls.isDynamic = True
@@ -99,8 +108,11 @@ def parseASClass(s, location, tokens):
 def parseASInterface(s, location, tokens):
     if _isTracing:
         print('parseASInterface[{0}] @ loc({1})'.format(tokens.name, location))
-    cls = ASClass(tokens.name)
+    cls = ASClass(_intern(tokens.name))
     cls.isInterface = True
+    # 接口继承的接口
+    if tokens.extends:
+        cls.implements = _internAll(tokens.extends.asList())
     # methods
     for method in tokens.methods:
         method = method[0]
@@ -112,7 +124,7 @@ def parseASInterface(s, location, tokens):
 def parseImports(s, location, tokens):
     if _isTracing:
         print('parseImports[{0}] @ loc({1})'.format(tokens.name, location))
-    imp = ASImport(tokens.name)
+    imp = ASImport(_intern(tokens.name))
     imp.setTokens(tokens)
     return imp
 
@@ -120,13 +132,13 @@ def parseImports(s, location, tokens):
 def parseASMetaTag(s, location, tokens):
     if _isTracing:
         print('parseASMetaTag[{0}] @ loc({1})'.format(tokens.name, location))
-    metatag = ASMetaTag(tokens.name)
+    metatag = ASMetaTag(_intern(tokens.name))
     index = 0
     for attr in tokens.attributes:
         if attr.key == '':
             metatag.params[index] = attr.value
         else:
-            metatag.params[attr.key] = attr.value
+            metatag.params[_intern(attr.key)] = attr.value
         index += 1
     metatag.setTokens(tokens)
     return ParseResults(metatag)
@@ -135,7 +147,7 @@ def parseASMetaTag(s, location, tokens):
 def parseASArg(s, location, tokens):
     if _isTracing:
         print('parseASArg[{0}] @ loc({1})'.format(tokens.name, location))
-    arg = ASType(tokens.name, tokens.type_)
+    arg = ASType(_intern(tokens.name), _intern(tokens.type_))
     arg.setTokens(tokens)
     return arg
 
@@ -145,12 +157,12 @@ def parseASMethod(s, location, tokens):
         print('parseASMethod[{0}] @ loc({1})'.format(tokens.name, location))
     # 返回类型
     if tokens.type_:
-        method = ASMethod(tokens.name, tokens.type_)
+        method = ASMethod(_intern(tokens.name), _intern(tokens.type_))
     else:
-        method = ASMethod(tokens.name)
+        method = ASMethod(_intern(tokens.name))
     # 可见域
     if tokens.visibility:
-        method.visibility = tokens.visibility
+        method.visibility = _intern(tokens.visibility)
     else:
         method.visibility = 'internal'
     # method 属性
@@ -161,12 +173,16 @@ def parseASMethod(s, location, tokens):
     if tokens.static:
         method.isStatic = True
     if tokens.accessor:
-        method.accessor = tokens.accessor
+        method.accessor = _intern(tokens.accessor)
     # method 传入参数
     for arg in tokens.arguments:
         method.arguments[arg.name] = arg
     # 方法体
-    method.body = tokens.body[0]
+    if isinstance(tokens.body, tuple):
+        # 略读模式下只记录方法体在源码中的位置
+        method.body_span = tokens.body
+    else:
+        method.body = tokens.body
     # metatag
     if tokens.metatag:
         method.metadata = tokens.metatag.asList()
@@ -178,9 +194,9 @@ def parseASVirtualMethod(s, location, tokens):
     if _isTracing:
         print('parseASVirtualMethod[{0}] @ loc({1})'.format(tokens.name, location))
     if tokens.type_:
-        method = ASVirtualMethod(tokens.name, tokens.type_)
+        method = ASVirtualMethod(_intern(tokens.name), _intern(tokens.type_))
     else:
-        method = ASVirtualMethod(tokens.name)
+        method = ASVirtualMethod(_intern(tokens.name))
     # method 传入参数
     for arg in tokens.arguments:
         method.arguments[arg.name] = arg
@@ -191,15 +207,17 @@ def parseASVirtualMethod(s, location, tokens):
 def parseASMethodBody(s, location, tokens):
     if _isTracing:
         print('parseASMethodBody @ loc({0})'.format(location))
-    return ParseResults(ASMetodBody(tokens))
+    # 只记录方法体的位置, 需要时再解析
+    start, end = tokens[0]
+    return ParseResults(ASMetodBody(s, start, end))
 
 
 def parseASVariable(s, location, tokens):
     if _isTracing:
         print('parseASVariable[{0}] @ loc({1})'.format(tokens.name, location))
-    var = ASVariable(tokens.name, tokens.type_)
+    var = ASVariable(_intern(tokens.name), _intern(tokens.type_))
     if tokens.visibility:
-        var.visibility = tokens.visibility
+        var.visibility = _intern(tokens.visibility)
     # 静态量
     if tokens.static == 'static':
         var.isStatic = True
@@ -30,14 +30,237 @@
 
 import re
 import os
-import fnmatch
+import bisect
+import time
+import hashlib
+import multiprocessing
 
 import pyparsing
-import lxml
 from lxml import etree
 
 import asGrammar
-import asModel
+import asParser
+import asOutline
+import asSnapshot
+import asIndex
+import asSymbols
+import asHierarchy
+import asMetadata
+from asCache import ParseCache
+from asScan import Scanner
+
+
+# 字符串和注释: 字符串原样保留, 注释被删除
+_COMMENT_OR_STRING = re.compile(
+    r'"(?:[^"\\\n]|\\.)*"'
+    r"|'(?:[^'\\\n]|\\.)*'"
+    r'|//(?:\\\n|[^\n])*'
+    r'|/\*[\s\S]*?\*/'
+)
+
+
+_RETURN_PARENS = re.compile(r'\breturn\s+\((.*)\)\s*;')
+
+
+def _codeSegments(source, start=0):
+    # 去掉注释后剩下的 (起始, 结束) 区间
+    last = start
+    for match in _COMMENT_OR_STRING.finditer(source, start):
+        begin, end = match.span()
+        if source[begin] in '"\'':
+            continue
+        yield last, begin
+        last = end
+    yield last, len(source)
+
+
+def _codeLines(source, start=0, segments=None):
+    # 去掉注释后的各行; 被注释分隔的行在这里拼接, segments 记录各片段
+    lines = ['']
+    for begin, end in _codeSegments(source, start):
+        if segments is not None:
+            segments.append((begin, end))
+        parts = source[begin:end].split('\n')
+        lines[-1] += parts[0]
+        lines.extend(parts[1:])
+    return lines
+
+
+def _lineOrigins(source, start=0):
+    # 与 _codeLines 的各行对应, 每行是其片段的 (原始位置, 长度) 列表
+    origins = [[]]
+    for begin, end in _codeSegments(source, start):
+        pos = begin
+        for i, part in enumerate(source[begin:end].split('\n')):
+            if i:
+                origins.append([])
+            origins[-1].append((pos, len(part)))
+            pos += len(part) + 1
+    return origins
+
+
+def _returnOrigins(line, origin):
+    # 删除 return 语句多余的 () 之后, 行中每个字符在原始源码中的位置
+    positions = []
+    for original, size in origin:
+        positions.extend(range(original, original + size))
+    kept = []
+    last = 0
+    for match in _RETURN_PARENS.finditer(line):
+        start = match.start()
+        # 'return' 和其后的第一个空白符, 括号内的表达式, 以及分号
+        kept.extend(positions[last:start + 7])
+        kept.extend(positions[match.start(1):match.end(1)])
+        kept.append(positions[match.end() - 1])
+        last = match.end()
+    kept.extend(positions[last:len(line)])
+    return kept
+
+
+def _mapLines(offsets, lines, origins):
+    # lines 是 rstrip 之后的各行, 按 process 的规则跳过被删除的行
+    length = 0
+    for i, (line, origin) in enumerate(zip(lines, origins)):
+        if not line or (i < len(lines) - 1
+                        and line[-1] == ';' and line.lstrip() == ';'):
+            continue
+        if 'return' in line and _RETURN_PARENS.search(line):
+            # 删除括号后同一行之后的位置都要移动, 逐个字符记录不连续处
+            previous = None
+            for pos, original in enumerate(_returnOrigins(line, origin)):
+                if original != previous:
+                    offsets.add(length + pos, original)
+                previous = original + 1
+            length += len(_RETURN_PARENS.sub(r'return \1;', line)) + 1
+            continue
+        pos = length
+        for original, size in origin:
+            if pos >= length + len(line):
+                break
+            if size:
+                offsets.add(pos, original)
+                pos += size
+        length += len(line) + 1
+
+
+def _unexpandedLoc(exc, source):
+    # pyparsing 默认把 Tab 展开后再解析, 把异常位置换算回 source 中的位置
+    if exc.pstr is source:
+        return exc.loc
+    line_start = exc.pstr.rfind('\n', 0, exc.loc) + 1
+    column = exc.loc - line_start
+    pos = 0
+    for _ in range(exc.pstr.count('\n', 0, line_start)):
+        pos = source.index('\n', pos) + 1
+    end = source.find('\n', pos)
+    return pos + _unexpandedColumn(
+        source[pos:] if end == -1 else source[pos:end], column
+    )
+
+
+def _unexpandedColumn(line, column):
+    # line.expandtabs() 中的列号换算为 line 中的列号; 与 expandtabs 一样
+    # Tab 宽度为 8, 遇到 \r 时 Tab 的对齐位置重新计算
+    width = tab = 0
+    for pos, char in enumerate(line):
+        if width >= column:
+            return pos
+        size = 8 - tab % 8 if char == '\t' else 1
+        tab = 0 if char == '\r' else tab + size
+        width += size
+    return len(line)
+
+
+class OffsetMap(object):
+    """Map offsets in a tidied source back to the original source
+
+    Every retained piece of the original source is recorded as a pair of
+    (offset in tidied source, offset in original source).
+    """
+
+    def __init__(self):
+        self.tidied = []
+        self.original = []
+
+    def add(self, tidied, original):
+        self.tidied.append(tidied)
+        self.original.append(original)
+
+    def toOriginal(self, pos):
+        i = bisect.bisect_right(self.tidied, pos) - 1
+        if i < 0:
+            return pos
+        return self.original[i] + pos - self.tidied[i]
+
+    def __len__(self):
+        return len(self.tidied)
+
+
+class LineMap(object):
+    """Map a few offsets in a tidied source back to the original source
+
+    TidySourceFile.process only records the code segments between comments
+    and which lines it kept; where a line starts is worked out when offsets
+    on it are converted, so the map costs next to nothing until it is used.
+    """
+
+    def __init__(self):
+        self.segments = None
+        self.lengths = None
+        self.lines = None
+        self.kept = None
+        self.tidied = ''
+
+    def fill(self, segments, lengths, lines, tidied):
+        # segments 是注释之间的代码片段, 拼接后按行切分得到 lines;
+        # lengths 是 rstrip 之前各行的长度
+        self.segments = OffsetMap()
+        length = 0
+        for begin, end in segments:
+            self.segments.add(length, begin)
+            length += end - begin
+        self.lengths = lengths
+        self.lines = lines
+        self.tidied = tidied
+        # 按 process 的规则记录保留的行
+        self.kept = [
+            i for i, line in enumerate(lines)
+            if line and not (i < len(lines) - 1
+                             and line[-1] == ';' and line.lstrip() == ';')
+        ]
+
+    def toOriginal(self, positions, expanded=False):
+        """Return a dict mapping each of `positions` to the original source
+
+        With expanded=True the positions are in tidied.expandtabs(), the
+        text pyparsing works on.
+        """
+        text = self.tidied.expandtabs() if expanded else self.tidied
+        tidied_lines = self.tidied.split('\n')
+        result = {}
+        row = last = 0
+        # 行 i 在拼接后的代码片段中的起始位置
+        i = start = 0
+        for pos in sorted(set(positions)):
+            row += text.count('\n', last, pos)
+            last = pos
+            column = pos - text.rfind('\n', 0, pos) - 1
+            line = tidied_lines[row]
+            if expanded:
+                column = _unexpandedColumn(line, column)
+            start += sum(self.lengths[i:self.kept[row]]) + self.kept[row] - i
+            i = self.kept[row]
+            if line != self.lines[i]:
+                # 删除了 return 语句的 (), 逐个字符换算
+                chars = _returnOrigins(
+                    self.lines[i], [(start, len(self.lines[i]))]
+                )
+                code = (chars[column] if column < len(chars)
+                        else chars[-1] + 1 + column - len(chars))
+            else:
+                code = start + column
+            result[pos] = self.segments.toOriginal(code)
+        return result
 
 
 class TidySourceFile(object):
@@ -51,17 +274,33 @@ class TidySourceFile(object):
         return source
 
     @staticmethod
-    def trim_comments(source):
-        comments_positions = []
-        asGrammar.COMMENTS.parseWithTabs()  # 设置Tab不扩展, 否则下面的字符串位置不符
-        for _, begin, end in asGrammar.COMMENTS.scanString(source):
-            comments_positions.append((begin, end))
-        # 从后往前去除注释块
-        for begin, end in reversed(comments_positions):
-            # print('clearing:')
-            # print(source[begin:end])
-            source = source[:begin] + source[end:]
-        return source
+    def trim_comments(source, offsets=None):
+        """Remove comments in one pass, leaving string literals untouched
+
+        If an OffsetMap is given it is filled so that offsets in the result
+        can be mapped back to `source`.
+        """
+        pieces = []
+        last = 0
+        length = 0
+        for match in _COMMENT_OR_STRING.finditer(source):
+            begin, end = match.span()
+            if source[begin] in '"\'':
+                continue
+            if begin > last:
+                if offsets is not None:
+                    offsets.add(length, last)
+                pieces.append(source[last:begin])
+                length += begin - last
+            last = end
+        if last == 0:
+            if offsets is not None:
+                offsets.add(0, 0)
+            return source
+        if offsets is not None:
+            offsets.add(length, last)
+        pieces.append(source[last:])
+        return ''.join(pieces)
 
     @staticmethod
     def tidy(source):
@@ -72,13 +311,189 @@ class TidySourceFile(object):
         # 删除多余的空行
         source = re.sub(r'^\s*\n', '', source, flags=re.MULTILINE)
         # 删除return语句多余的()
-        source = re.sub(
-            r'\breturn\s+\((.*)\)\s*;',
-            r'return \1;',
-            source
-        )
+        source = _RETURN_PARENS.sub(r'return \1;', source)
         return source
 
+    @staticmethod
+    def process(source, offsets=None, linemap=None):
+        """BOM, comment and tidy clean-up fused into one line oriented pass
+
+        Returns the same text as tidy(trim_comments(trim_bomflag(source))),
+        but the source is cut into lines directly between comments instead
+        of being copied once per clean-up step. If an OffsetMap is given, it
+        is filled so offsets in the result can be mapped back to `source`;
+        this is slower and meant for error reporting. A LineMap is cheap to
+        fill and suits converting a few offsets, such as method bodies.
+        """
+        start = 3 if source[:3] == '\xEF\xBB\xBF' else 0
+        segments = None if linemap is None else []
+        lines = _codeLines(source, start, segments)
+        if linemap is not None:
+            lengths = [len(line) for line in lines]
+        last = lines.pop().rstrip()
+        # 去除行尾多余空白符
+        lines = [line.rstrip() for line in lines]
+        # 删除多余的空行和分号, 文件末尾没有换行的分号行保持不变
+        kept = [
+            line for line in lines
+            if line and not (line[-1] == ';' and line.lstrip() == ';')
+        ]
+        if last:
+            kept.append(last)
+        lines.append(last)
+        if offsets is not None:
+            _mapLines(offsets, lines, _lineOrigins(source, start))
+        # 删除return语句多余的()
+        tidied = _RETURN_PARENS.sub(r'return \1;', '\n'.join(kept))
+        if linemap is not None:
+            linemap.fill(segments, lengths, lines, tidied)
+        return tidied
+
+
+def _spannedMethods(pkg):
+    # 只记录了方法体位置的方法
+    for cls in list(pkg.classes.values()) + list(pkg.interfaces.values()):
+        for kind in ('methods', 'getter_methods', 'setter_methods'):
+            for method in getattr(cls, kind).values():
+                if method.body_span is not None:
+                    yield method
+
+
+def _mapBodySpans(pkg, linemap, expanded=False):
+    # 方法体的位置是在清理后的源码中的位置, 换算为原始源码中的位置;
+    # expanded 表示解析的是 Tab 展开之后的清理结果
+    methods = list(_spannedMethods(pkg))
+    if not methods:
+        return
+    # 结束位置之后可能紧接着被删除的注释, 按最后一个字符换算
+    positions = linemap.toOriginal(
+        [pos for method in methods
+         for pos in (method.body_span[0], method.body_span[1] - 1)],
+        expanded
+    )
+    for method in methods:
+        start, end = span = method.body_span
+        method.body_span = (positions[start], positions[end - 1] + 1)
+        if method.raw_tokens is not None:
+            method.raw_tokens = [
+                method.body_span if token == span else token
+                for token in method.raw_tokens
+            ]
+
+
+class ManifestEntry(object):
+    """Size, mtime and content hash of a source file ingested by a Builder"""
+
+    def __init__(self, path, size, mtime, digest):
+        self.path = path
+        self.size = size
+        self.mtime = mtime
+        self.digest = digest
+        # 该文件贡献的类/接口: (包名, 'classes' 或 'interfaces', 名称)
+        self.contributions = []
+        # packrat 模式下解析该文件时的缓存 (命中数, 未命中数)
+        self.packrat = None
+
+    @classmethod
+    def fromFile(cls, path, data, st=None):
+        """Entry for the file at `path` with contents `data`
+
+        `st` is its os.stat result, if the caller already has it.
+        """
+        if st is None:
+            st = os.stat(path)
+        return cls(path, st.st_size, st.st_mtime, hashlib.sha1(data).hexdigest())
+
+    @classmethod
+    def fromPath(cls, path, st=None):
+        """Like fromFile, reading the file in chunks to hash it"""
+        if st is None:
+            st = os.stat(path)
+        digest = hashlib.sha1()
+        with open(path, 'rb') as f:
+            for chunk in iter(lambda: f.read(_CHUNK_SIZE), ''):
+                digest.update(chunk)
+        return cls(path, st.st_size, st.st_mtime, digest.hexdigest())
+
+    def isStale(self, st):
+        return self.size != st.st_size or self.mtime != st.st_mtime
+
+    def __repr__(self):
+        return '<ManifestEntry: {0}>'.format(self.path)
+
+
+# 分块读取文件时每块的大小
+_CHUNK_SIZE = 1 << 16
+
+# MXML 脚本中的 import 语句, 移到生成的包中
+_MXML_IMPORT = re.compile(
+    r'^[ \t]*import\s+([\w$]+(?:\.[\w$]+)*(?:\.\*)?)[ \t]*;?', re.M
+)
+
+
+def mxmlScripts(filename):
+    """Yield the code of each Script element of an MXML file
+
+    The file is parsed incrementally and every element is freed once it
+    has been read, so the document is never held in memory as a whole.
+    Script elements are found at any depth; the file named by a source
+    attribute is read in place of the element's text.
+    """
+    directory = os.path.dirname(filename)
+    for _, element in etree.iterparse(filename, events=('end',)):
+        if element.tag.rpartition('}')[2] == 'Script':
+            source = element.get('source')
+            if source:
+                code = open(os.path.join(directory, source), 'rb').read()
+            else:
+                code = element.text or ''
+            if isinstance(code, unicode):
+                code = code.encode('utf-8')
+            yield code
+        # 已处理的元素和它之前的兄弟元素都不再需要; 根元素没有父元素,
+        # 但之前可能有注释或处理指令
+        element.clear()
+        parent = element.getparent()
+        if parent is not None:
+            while element.getprevious() is not None:
+                del parent[0]
+
+
+def _mxmlPackageName(relpath):
+    # .as 文件返回 None; MXML 文件的包名是它相对源码根目录的目录
+    if not relpath.endswith('.mxml'):
+        return None
+    return relpath.rpartition('/')[0].replace('/', '.')
+
+
+def mxmlPackageSource(filename, pkgname):
+    """Return ActionScript source of the class an MXML file defines
+
+    The class is named after the file and its body is the code of the
+    Script elements; their imports are moved to the package. A `pkgname`
+    of None stands for the default package.
+    """
+    classname = os.path.splitext(os.path.basename(filename))[0]
+    imports = []
+    members = []
+    for code in mxmlScripts(filename):
+        # 注释中的 import 不算
+        code = TidySourceFile.trim_comments(code)
+        imports.extend(_MXML_IMPORT.findall(code))
+        members.append(_MXML_IMPORT.sub('', code))
+    return 'package {0}\n{{\n{1}public class {2}\n{{\n{3}\n}}\n}}\n'.format(
+        pkgname or '',
+        ''.join('import {0};\n'.format(name) for name in imports),
+        classname,
+        '\n'.join(members),
+    )
+
+
+# Builder 可选的解析器
+BACKENDS = ('pyparsing', 'descent')
+# 解析后保留 tokens 的策略, 见 asModel.FromTokens.retainTokens
+TOKEN_POLICIES = ('full', 'signature', 'none')
+
 
 class Builder(object):
     """ActionScript Source Builder"""
@@ -86,9 +501,65 @@ class Builder(object):
     sources = []
     packages = {}
 
-    def __init__(self):
+    def __init__(self, workers=1, cache=None, skim=False, dispatch=False,
+                 packrat=None, backend='pyparsing', outline=False,
+                 tokens='full', exclude=()):
+        # workers: 并行解析目录时使用的进程数, None 表示使用全部 CPU
+        # cache: ParseCache 对象或缓存目录, 用于跳过未修改文件的解析
+        # skim: 不解析方法体, 只记录方法体在源码中的位置
+        # dispatch: 按成员开头的关键字选择语法, 不逐个尝试所有候选项
+        # packrat: 每个文件的 packrat 缓存的条目上限, None 表示不使用
+        # backend: 'pyparsing' 使用 asGrammar, 'descent' 使用 asParser 中
+        #     手写的解析器, 两者得到相同的结果
+        # outline: 只用正则表达式提取包, 类和成员名称的大纲, 不解析;
+        #     得到的 ASPackage/ASClass 的 isPartial 为 True
+        # tokens: 'full' 保留所有 tokens, 'signature' 不保留方法体等代码块,
+        #     'none' 不保留 tokens, 此时 toTokens 抛出 TokensNotRetained
+        # exclude: 扫描目录时跳过的文件和目录, gitignore 风格的模式列表,
+        #     见 asScan
         self.sources = []
         self.packages = {}
+        # 通过文件名加入的源文件, 绝对路径 -> ManifestEntry
+        self.manifest = {}
+        # 类/接口当前由哪个文件提供, (包名, 种类, 名称) -> 绝对路径
+        self._owners = {}
+        # 包名 -> (ASPackage, 其导入名称的集合), 合并文件时用于去重
+        self._imports = {}
+        if workers is None:
+            workers = multiprocessing.cpu_count()
+        self.workers = workers
+        if cache is not None and not isinstance(cache, ParseCache):
+            cache = ParseCache(cache)
+        self.cache = cache
+        self.skim = skim
+        self.dispatch = dispatch
+        self.grammar = asGrammar.getGrammar(skim=skim, dispatch=dispatch)
+        if packrat is not None and not asGrammar.packratSupported():
+            raise ValueError(
+                'packrat needs pyparsing >= 2.2.2, found {0}'.format(
+                    pyparsing.__version__
+                )
+            )
+        self.packrat = packrat
+        if backend not in BACKENDS:
+            raise ValueError('unknown parser backend: {0!r}'.format(backend))
+        self.backend = backend
+        self.parser = asParser.DeclarationParser(skim=skim)
+        self.outline = outline
+        if tokens not in TOKEN_POLICIES:
+            raise ValueError('unknown token policy: {0!r}'.format(tokens))
+        self.tokens = tokens
+        # 最近一次解析的 packrat 缓存 (命中数, 未命中数)
+        self.packrat_stats = None
+        # symbols 返回的 SymbolTable, 包变化后重新建立
+        self._symbols = None
+        # hierarchy 返回的 ClassHierarchy, 包变化后只清除受影响的类
+        self._hierarchy = None
+        # 类和成员上的 metatag, 解析时更新
+        self.metatags = asMetadata.MetadataIndex()
+        if isinstance(exclude, basestring):
+            exclude = [exclude]
+        self.exclude = list(exclude)
 
     def addSource(self, source, pattern="*.as"):
         try:
@@ -97,82 +568,575 @@ class Builder(object):
                 self.parseSource(source.read())
             except AttributeError:
                 # If 'source' is a filename open and read file.
-                self.parseSource(open(source, 'rb').read())
+                self.parseFile(source)
         except IOError:
             # If 'source' is a directory read all files matching the
             # specified pattern.
             if os.path.isdir(source):
-                for filename in self.locate(pattern, source):
-                    self.parseSource(open(filename, 'rb').read())
+                self._parseJobs(
+                    (entry.path, None, entry.stat)
+                    for entry in self.scan(source, pattern)
+                )
             else:
                 # If 'source' is a string append to source list
                 self.parseSource(source)
 
-    def addMXMLSource(self, filename, pkgname):
-        filepath, name = os.path.split(filename)
-        classname, ext = os.path.splitext(name)
-        cls = asModel.ASClass(classname)
-        if pkgname:
-            cls.full_name = pkgname + '.' + classname
+    def addMXMLSource(self, filename, pkgname, st=None):
+        """Add the class an MXML file defines to the package `pkgname`
+
+        The members and imports in its Script elements are parsed like an
+        .as file, see mxmlPackageSource.
+        """
+        filename = os.path.abspath(filename)
+        entry = ManifestEntry.fromPath(filename, st)
+        self._recordEntry(entry)
+        try:
+            pkg = self.parseMXML(filename, pkgname)
+        except pyparsing.ParseBaseException as exc:
+            self._printParseError(filename, (exc.lineno, exc.col, exc.line))
         else:
-            cls.full_name = classname
-        tree = etree.parse(filename)
-        root = tree.getroot()
-        for subroot in root:
-            if isinstance(subroot, lxml.etree._Comment):
+            entry.packrat = self.packrat_stats
+            self.mergePackage(pkg, entry)
+
+    def addProject(self, root):
+        """Add every .as and .mxml file under the source root `root`
+
+        The tree is walked once and both kinds of file are parsed in the
+        same worker pool when workers > 1. The package of an MXML file is
+        its directory relative to `root`, e.g. com/example/View.mxml
+        defines com.example.View.
+        """
+        self._parseJobs(
+            (entry.path, pkgname, entry.stat)
+            for entry, pkgname in self.projectFiles(root)
+        )
+
+    def projectFiles(self, root):
+        """Yield (ScanEntry, MXML package name) for the files of a project
+
+        The package name is None for .as files, whose package is declared
+        in the source.
+        """
+        for entry in self.scan(root, ('*.as', '*.mxml')):
+            yield entry, _mxmlPackageName(entry.relpath)
+
+    def parseMXML(self, filename, pkgname):
+        """Parse an MXML file and return its ASPackage without merging it"""
+        return self.parsePackage(mxmlPackageSource(filename, pkgname))
+
+    def iterParse(self, root, pattern="*.as"):
+        """Yield (path, ASPackage) for each file under `root` as it is parsed
+
+        Unlike addSource nothing is merged into `packages` or recorded in
+        the manifest, so only one file is held in memory at a time.
+        """
+        for filename in self.locate(pattern, root):
+            try:
+                pkg = self.parsePackage(open(filename, 'rb').read())
+            except pyparsing.ParseBaseException as exc:
+                self._printParseError(filename, (exc.lineno, exc.col, exc.line))
                 continue
-            if subroot.tag.endswith('Script'):
-                try:
-                    tokens = asGrammar.MXML_SCRIPT_BLOCK.parseString(subroot.text)
-                    if tokens.variables:
-                        for var in [_[0] for _ in tokens.variables.asList()]:
-                            cls.variables[var.name] = var
-                except pyparsing.ParseBaseException as exc:
-                    print('Caught Exception @({0}, {1})!\n{2}'.format(
-                        exc.lineno, exc.col, exc.line
-                    ))
-                    from IPython import embed;embed()
-
-        if self.packages.get(pkgname) is None:
-            pkg = asModel.ASPackage(pkgname)
-            pkg.classes[cls.name] = cls
-            self.packages[pkg.name] = pkg
+            yield filename, pkg
+
+    def rebuild(self, source, pattern="*.as"):
+        """Bring the packages up to date with the files under `source`
+
+        Only files that were added or changed since they were last ingested
+        are parsed again. Classes and interfaces of files that no longer
+        exist, or are now excluded, are removed, everything else is left
+        as it is. MXML files are parsed as in addProject, with `source` as
+        the source root; pass ('*.as', '*.mxml') to refresh a project.
+        """
+        root = os.path.join(os.path.abspath(source), '')
+        scanner = self._scanner(pattern)
+        seen = set()
+        changed = []
+        for found in scanner.scan(root):
+            filename, st = found.path, found.stat
+            seen.add(filename)
+            entry = self.manifest.get(filename)
+            if entry is not None and not entry.isStale(st):
+                continue
+            if entry is not None:
+                # 只是 mtime 变化而内容没变的文件不需要重新解析
+                data = open(filename, 'rb').read()
+                if hashlib.sha1(data).hexdigest() == entry.digest:
+                    entry.size, entry.mtime = st.st_size, st.st_mtime
+                    continue
+            changed.append(found)
+        # 已删除或被排除的文件
+        for path in list(self.manifest.keys()):
+            if (path.startswith(root) and path not in seen
+                    and scanner.includes(
+                        path[len(root):].replace(os.sep, '/'))):
+                self.removeFile(path)
+        self._parseJobs(
+            (found.path, _mxmlPackageName(found.relpath), found.stat)
+            for found in changed
+        )
+        return [found.path for found in changed]
+
+    def removeFile(self, path):
+        """Remove the classes and interfaces contributed by `path`"""
+        entry = self.manifest.pop(os.path.abspath(path), None)
+        if entry is None:
+            return
+        removed = []
+        for pkgname, kind, name in entry.contributions:
+            if self._owners.get((pkgname, kind, name)) != entry.path:
+                # 已被后加入的同名类覆盖
+                continue
+            del self._owners[(pkgname, kind, name)]
+            getattr(self.packages[pkgname], kind).pop(name, None)
+            removed.append(asSymbols.qualifiedName(pkgname, name))
+        for name in removed:
+            self.metatags.removeClass(name)
+        self._classesChanged(removed)
+
+    def parseFile(self, filename, st=None):
+        filename = os.path.abspath(filename)
+        src = open(filename, 'rb').read()
+        self.parseSource(src, ManifestEntry.fromFile(filename, src, st))
+
+    def parseSource(self, src, entry=None):
+        if entry is not None:
+            self._recordEntry(entry)
+        # 开始解析
+        try:
+            pkg = self.parsePackage(src)
+        except pyparsing.ParseBaseException as exc:
+            # 与并行解析一样只报告错误, 文件仍记录在 manifest 中
+            self._printParseError(
+                entry.path if entry is not None else '<source>',
+                (exc.lineno, exc.col, exc.line)
+            )
         else:
-            self.packages[pkgname].classes[cls.name] = cls
+            if entry is not None:
+                entry.packrat = self.packrat_stats
+            self.mergePackage(pkg, entry)
+
+    def packratStats(self):
+        """Return {path: (hits, misses)} of the packrat cache for each file"""
+        return dict(
+            (path, entry.packrat) for path, entry in self.manifest.items()
+            if entry.packrat is not None
+        )
 
-    def parseSource(self, src):
+    def parsePackage(self, src):
+        """Parse one source file and return its ASPackage without merging it"""
+        self.packrat_stats = None
+        if self.cache is None:
+            return self._parsePackage(src)
+        key = self.cache.key(src, self._cacheTag())
+        pkg = self.cache.get(key)
+        if pkg is None:
+            start = time.time()
+            pkg = self._parsePackage(src)
+            self.cache.put(key, pkg, time.time() - start)
+        return pkg
+
+    def _parsePackage(self, src):
+        linemap = None
+        if not self.outline and (self.skim or self.tokens != 'full'):
+            # 清理时顺便记录保留的行, 用于换算方法体的位置
+            linemap = LineMap()
+        pkg = self._parse(src, linemap)
+        if self.tokens != 'full':
+            pkg.retainTokens(self.tokens)
+        if linemap is not None:
+            # 略读模式不展开 Tab, 否则方法体的位置来自展开后的源码
+            _mapBodySpans(pkg, linemap, expanded=not self.skim)
+        return pkg
+
+    def _parse(self, src, linemap=None):
+        if self.outline:
+            return asOutline.outlinePackage(src)
         # 清理注释
-        src = TidySourceFile.tidy(TidySourceFile.trim_comments(src))
+        tidied = TidySourceFile.process(src, linemap=linemap)
 
         # self.sources.append(src)
-        # 开始解析
         try:
-            root = asGrammar.PROGRAM.parseString(src)
-            pkg = root.package
-            # 融合多个文件
-            if self.packages.get(pkg.name) is None:
-                self.packages[pkg.name] = pkg
+            if self.backend == 'descent':
+                return self.parser.parseProgram(tidied)
+            if self.packrat is None:
+                root = self.grammar.PROGRAM.parseString(tidied)
             else:
-                for imp in pkg.imports:
-                    if imp.name not in list(map(
-                        lambda imp: imp.name, self.packages[pkg.name].imports
-                    )):
-                        self.packages[pkg.name].imports.append(imp)
-                for cls in pkg.classes.values():
-                    self.packages[pkg.name].classes[cls.name] = cls
-                for interface in pkg.interfaces.values():
-                    self.packages[pkg.name].interfaces[interface.name] = interface
+                with asGrammar.PackratScope(self.packrat) as scope:
+                    root = self.grammar.PROGRAM.parseString(tidied)
+                self.packrat_stats = (scope.hits, scope.misses)
         except pyparsing.ParseBaseException as exc:
-            print('Caught Exception @({0}, {1})!\n{2}'.format(
-                exc.lineno, exc.col, exc.line
-            ))
-            from IPython import embed;embed()
+            # 出错位置换算为原始文件中的位置
+            offsets = OffsetMap()
+            TidySourceFile.process(src, offsets)
+            exc.loc = offsets.toOriginal(_unexpandedLoc(exc, tidied))
+            exc.pstr = src
+            raise
+        return root.package
 
-    def locate(self, pattern, root=os.getcwd()):
-        for path, dirs, files in os.walk(root):
-            matched_filenames = [
-                os.path.abspath(os.path.join(path, filename))
-                for filename in files if fnmatch.fnmatch(filename, pattern)
+    def mergePackage(self, pkg, entry=None):
+        if entry is not None:
+            # 记录类/接口的来源文件, 以便文件删除或修改时移除
+            for kind in ('classes', 'interfaces'):
+                for name in getattr(pkg, kind):
+                    entry.contributions.append((pkg.name, kind, name))
+                    self._owners[(pkg.name, kind, name)] = entry.path
+        self._classesChanged(
+            asSymbols.qualifiedName(pkg.name, name)
+            for kind in ('classes', 'interfaces')
+            for name in getattr(pkg, kind)
+        )
+        self._mergeDeclarations(pkg)
+        self.metatags.addPackage(pkg)
+
+    def _mergeDeclarations(self, pkg):
+        # 融合多个文件: 导入按名称去重并保持顺序, 同名的类/接口后者覆盖
+        # 前者, 耗时与 pkg 的大小成正比
+        target = self.packages.get(pkg.name)
+        if target is None:
+            self.packages[pkg.name] = pkg
+            return
+        self._mergeImports(target, pkg.imports)
+        target.classes.update(pkg.classes)
+        target.interfaces.update(pkg.interfaces)
+
+    def _mergeImports(self, target, imports):
+        # 把 target 中还没有的导入按顺序加到末尾
+        names = self._importNames(target)
+        for imp in imports:
+            if imp.name not in names:
+                names.add(imp.name)
+                target.imports.append(imp)
+
+    def _importNames(self, pkg):
+        # pkg.imports 中的名称集合, 第一次有文件合并到该包时建立; 包被
+        # 替换 (例如 load) 后重新建立
+        index = self._imports.get(pkg.name)
+        if index is None or index[0] is not pkg:
+            index = self._imports[pkg.name] = (
+                pkg, set(imp.name for imp in pkg.imports)
+            )
+        return index[1]
+
+    def save(self, path):
+        """Write the packages and the manifest to a snapshot file"""
+        entries = [
+            (entry.path, entry.size, entry.mtime, entry.digest,
+             entry.contributions)
+            for entry in self.manifest.values()
+        ]
+        owners = list(self._owners.items())
+        asSnapshot.save(path, self.packages, (entries, owners))
+
+    def symbols(self):
+        """Return a SymbolTable that resolves type names in the packages
+
+        The same table is returned until the packages change, so names it
+        resolved once are not resolved again.
+        """
+        if self._symbols is None:
+            self._symbols = asSymbols.SymbolTable(self.packages)
+        return self._symbols
+
+    def hierarchy(self):
+        """Return the ClassHierarchy of the packages
+
+        It is kept while files are added or parsed again; only what was
+        computed for the changed classes and their subclasses is dropped.
+        """
+        if self._hierarchy is None:
+            self._hierarchy = asHierarchy.ClassHierarchy(self.symbols())
+        return self._hierarchy
+
+    def _classesChanged(self, names):
+        # 类/接口被加入, 替换或删除后调用
+        self._symbols = None
+        if self._hierarchy is not None:
+            self._hierarchy.invalidate(names, self.symbols())
+
+    def saveIndex(self, path):
+        """Write a symbol index of the classes and interfaces
+
+        Open it with asIndex.SymbolIndex to look up single classes by
+        fully qualified name without loading the packages.
+        """
+        asIndex.write(path, self.packages)
+
+    def load(self, path, names=None):
+        """Merge the packages of a snapshot file written by save
+
+        With `names` only those packages are decoded. The manifest of the
+        files that contributed to them is restored too, so rebuild only
+        parses the files that changed since the snapshot was saved.
+        """
+        snapshot = asSnapshot.Snapshot(path)
+        if names is None:
+            names = snapshot.names()
+        names = set(names)
+        entries, owners = snapshot.manifest
+        # 先移除这些文件之前贡献的类/接口, 再融合快照中的包,
+        # 否则刚载入的同名类会被一起移除
+        for filename, size, mtime, digest, contributions in entries:
+            contributions = [
+                contribution for contribution in contributions
+                if contribution[0] in names
             ]
-            for filename in matched_filenames:
-                yield filename
+            if not contributions:
+                continue
+            entry = ManifestEntry(filename, size, mtime, digest)
+            entry.contributions = contributions
+            self._recordEntry(entry)
+        for name in names:
+            self.mergePackage(snapshot.package(name))
+        for key, filename in owners:
+            if key[0] in names:
+                self._owners[key] = filename
+        return snapshot
+
+    def merge(self, other):
+        """Merge the packages and manifest of another build into this one
+
+        `other` is a Builder, or a snapshot written by save, as a path or
+        an asSnapshot.Snapshot. Its packages and classes are taken over,
+        not copied; a Builder passed in is left empty. The packages of
+        either side may end up in the result, so keep no references to
+        them across a merge.
+
+        A class or interface present on both sides is resolved as follows:
+
+          1. A file in both manifests was parsed by both sides. The side
+             whose version of the file has the later mtime wins, and the
+             classes the other version contributed are dropped. On equal
+             mtimes or contents this Builder's version is kept.
+          2. Otherwise the class of `other` replaces that of this
+             Builder, as if the files of `other` were parsed after these.
+
+        Imports of a package on both sides are those of this Builder
+        followed by the new ones of `other`. The work done is proportional
+        to the smaller side, counted in packages and files, so merging
+        shards one by one into a growing Builder stays linear overall.
+        Returns this Builder.
+        """
+        if isinstance(other, asSnapshot.Snapshot):
+            other = other.path
+        if isinstance(other, basestring):
+            path, other = other, Builder()
+            other.load(path)
+        if other is self:
+            raise ValueError('cannot merge a Builder into itself')
+        if self._mergeSize() < other._mergeSize():
+            # 保留较大一方的结构, 把较小的一方合并进去
+            self._swapState(other)
+            self._mergeFrom(other, False)
+        else:
+            self._mergeFrom(other, True)
+        other._swapState(Builder())
+        return self
+
+    def mergeAll(self, others):
+        """Merge builders or snapshots one by one, in order, see merge
+
+        With the conflict rules of merge, later ones win over earlier ones.
+        Returns this Builder.
+        """
+        for other in others:
+            self.merge(other)
+        return self
+
+    def _mergeSize(self):
+        return len(self.packages) + len(self.manifest)
+
+    def _swapState(self, other):
+        for name in _MERGED_STATE:
+            state = getattr(self, name)
+            setattr(self, name, getattr(other, name))
+            setattr(other, name, state)
+
+    def _mergeFrom(self, incoming, incomingIsOther):
+        # incoming 是 merge 的另一方 (incomingIsOther 为 True), 或者交换
+        # 结构后原来的这一方; 冲突规则总是按 merge 的两方来判断
+        dropped = set()
+        for path, entry in incoming.manifest.items():
+            mine = self.manifest.get(path)
+            if mine is not None:
+                # 内容或 mtime 相同时保留 merge 这一方的版本
+                if mine.digest == entry.digest:
+                    keep = incomingIsOther
+                elif incomingIsOther:
+                    keep = entry.mtime <= mine.mtime
+                else:
+                    keep = entry.mtime < mine.mtime
+                if keep:
+                    # 丢弃 incoming 中这个文件贡献的类
+                    dropped.add(path)
+                    continue
+                self.removeFile(path)
+            self.manifest[path] = entry
+        changed = []
+        for pkg in incoming.packages.values():
+            target = self.packages.get(pkg.name)
+            if target is None:
+                self.packages[pkg.name] = target = pkg
+            elif incomingIsOther:
+                self._mergeImports(target, pkg.imports)
+            else:
+                # 包本身的属性 (tokens, metadata 等) 以 merge 这一方为准,
+                # 并保持这一方的导入在前
+                state = pkg.__getstate__()
+                for name in ('classes', 'interfaces', 'imports'):
+                    del state[name]
+                target.__setstate__(state)
+                names = set(imp.name for imp in pkg.imports)
+                target.imports[:] = pkg.imports + [
+                    imp for imp in target.imports if imp.name not in names
+                ]
+                self._imports.pop(pkg.name, None)
+            for kind in ('classes', 'interfaces'):
+                declarations = getattr(target, kind)
+                for name, cls in list(getattr(pkg, kind).items()):
+                    key = (pkg.name, kind, name)
+                    owner = incoming._owners.get(key)
+                    if owner in dropped:
+                        if target is pkg:
+                            del declarations[name]
+                        continue
+                    if target is not pkg:
+                        if name in declarations and not incomingIsOther:
+                            continue
+                        declarations[name] = cls
+                    if owner is not None:
+                        self._owners[key] = owner
+                    else:
+                        self._owners.pop(key, None)
+                    changed.append(asSymbols.qualifiedName(pkg.name, name))
+        self.metatags.update(incoming.metatags, changed)
+        self._classesChanged(changed)
+
+    def _recordEntry(self, entry):
+        # 重新加入同一文件时, 先移除它上次贡献的类/接口
+        if entry.path in self.manifest:
+            self.removeFile(entry.path)
+        self.manifest[entry.path] = entry
+
+    def _parseJobs(self, jobs):
+        # jobs 是 (文件名, MXML 的包名, os.stat 结果或 None) 的序列,
+        # .as 文件的包名为 None
+        if self.workers > 1:
+            self._parseJobsInPool(jobs)
+            return
+        for filename, pkgname, st in jobs:
+            if pkgname is None:
+                self.parseFile(filename, st)
+            else:
+                self.addMXMLSource(filename, pkgname, st)
+
+    def parseFiles(self, filenames):
+        """Parse files in a pool of worker processes
+
+        Packages are merged in the order of `filenames`, so the result is
+        the same as parsing them one by one with parseSource.
+        """
+        self._parseJobsInPool((filename, None, None) for filename in filenames)
+
+    def _parseJobsInPool(self, jobs):
+        jobs = list(jobs)
+        if not jobs:
+            return
+        workers = min(self.workers, len(jobs))
+        # 每次分发一批文件, 减少进程间通信的次数
+        chunksize = max(1, min(32, len(jobs) // (workers * 4)))
+        pool = multiprocessing.Pool(
+            workers, _initWorker, (self._workerOptions(),)
+        )
+        try:
+            for entry, pkg, error, stats in pool.imap(
+                _parseFileInWorker, jobs, chunksize
+            ):
+                if stats is not None:
+                    self.cache.addStats(stats)
+                self._recordEntry(entry)
+                if error is not None:
+                    self._printParseError(entry.path, error)
+                else:
+                    self.mergePackage(pkg, entry)
+        finally:
+            pool.terminate()
+            pool.join()
+
+    def _printParseError(self, filename, error):
+        print('Caught Exception in {0} @({1}, {2})!\n{3}'.format(
+            filename, *error
+        ))
+
+    def _cacheTag(self):
+        # 影响解析结果的选项, 不同选项的结果分开缓存
+        return 'skim={0},dispatch={1},outline={2},tokens={3}'.format(
+            self.skim, self.dispatch, self.outline, self.tokens
+        )
+
+    def _workerOptions(self):
+        # 传给工作进程中 Builder 的构造参数
+        options = {
+            'skim': self.skim,
+            'dispatch': self.dispatch,
+            'packrat': self.packrat,
+            'backend': self.backend,
+            'outline': self.outline,
+            'tokens': self.tokens,
+        }
+        if self.cache is not None:
+            options['cache'] = ParseCache(self.cache.path, self.cache.max_size)
+        return options
+
+    def _scanner(self, pattern):
+        return Scanner(pattern, self.exclude)
+
+    def scan(self, root, pattern="*.as"):
+        """Yield a ScanEntry for each file under `root` matching `pattern`
+
+        `pattern` is a glob or a list of globs. Files and directories
+        matching the exclude patterns of the Builder are skipped.
+        """
+        return self._scanner(pattern).scan(root)
+
+    def locate(self, pattern, root=os.getcwd()):
+        for entry in self.scan(root, pattern):
+            yield entry.path
+
+
+# Builder.merge 时交换或取走的状态
+_MERGED_STATE = (
+    'packages', 'manifest', '_owners', '_imports', 'metatags', '_symbols',
+    '_hierarchy',
+)
+
+# 工作进程中用于解析文件的 Builder, 由 _initWorker 创建
+_worker_builder = None
+
+
+def _initWorker(options):
+    global _worker_builder
+    _worker_builder = Builder(**options)
+
+
+def _parseFileInWorker(job):
+    filename, pkgname, st = job
+    pkg = error = stats = None
+    filename = os.path.abspath(filename)
+    if pkgname is None:
+        src = open(filename, 'rb').read()
+        entry = ManifestEntry.fromFile(filename, src, st)
+    else:
+        entry = ManifestEntry.fromPath(filename, st)
+    try:
+        if pkgname is None:
+            pkg = _worker_builder.parsePackage(src)
+        else:
+            pkg = _worker_builder.parseMXML(filename, pkgname)
+    except pyparsing.ParseBaseException as exc:
+        error = (exc.lineno, exc.col, exc.line)
+    else:
+        entry.packrat = _worker_builder.packrat_stats
+    # 缓存命中统计汇总到主进程
+    if _worker_builder.cache is not None:
+        stats = _worker_builder.cache.popStats()
+    return entry, pkg, error, stats
@@ -0,0 +1,190 @@
+#!/usr/bin/env python
+# encoding=utf-8
+
+# Copyright (c) 2008, Michael Ramirez
+#
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without 
+# modification are permitted provided that the following conditions are met:
+#   * Redistributions of source code must retain the above copyright notice, 
+#     this list of conditions and the following disclaimer.
+#   * Redistributions in binary form must reproduce the above copyright notice, 
+#     this list of conditions and the following disclaimer in the documentation 
+#     and/or other #materials provided with the distribution.
+#   * Neither the name of the <ORGANIZATION> nor the names of its contributors 
+#     may be used to endorse or promote products derived from this software 
+#     without specific #prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+# "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+# LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR
+# A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT OWNER OR
+# CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL,
+# EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO,
+# PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR
+# PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF
+# LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING
+# NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS
+# SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+import os
+import time
+import errno
+import hashlib
+import tempfile
+try:
+    import cPickle as pickle
+except ImportError:
+    import pickle
+
+import asGrammar
+
+
+class ParseCache(object):
+    """On-disk cache of parsed ASPackage models
+
+    Entries are keyed by a hash of the raw source bytes together with the
+    grammar version, which also changes whenever the pickled models do.
+    Each entry is written to a temporary file and renamed into place, so
+    several processes can share one cache directory. When the directory
+    grows beyond `max_size` bytes the least recently used entries are
+    removed.
+    """
+
+    def __init__(self, path, max_size=256 * 1024 * 1024):
+        self.path = path
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        # 命中时省下的解析时间(秒)
+        self.saved_seconds = 0.0
+        # 缓存目录大小的估计值, None 表示尚未统计
+        self._size = None
+
+    def key(self, source, tag=''):
+        if not isinstance(source, bytes):
+            source = source.encode('utf-8')
+        digest = hashlib.sha1()
+        digest.update('{0}:{1}\n'.format(
+            asGrammar.GRAMMAR_VERSION, tag
+        ).encode('ascii'))
+        digest.update(source)
+        return digest.hexdigest()
+
+    def get(self, key):
+        filename = self._filename(key)
+        start = time.time()
+        try:
+            with open(filename, 'rb') as f:
+                cost, pkg = pickle.load(f)
+        except (IOError, OSError, EOFError, ValueError, TypeError,
+                AttributeError, ImportError, IndexError,
+                pickle.UnpicklingError):
+            # 不存在, 或被其他进程删除/写坏的条目都按未命中处理
+            self.misses += 1
+            return None
+        try:
+            # 更新修改时间, 供 LRU 淘汰使用(atime 在很多系统上不可靠)
+            os.utime(filename, None)
+        except OSError:
+            pass
+        self.hits += 1
+        self.saved_seconds += cost - (time.time() - start)
+        return pkg
+
+    def put(self, key, pkg, cost=0.0):
+        """Store `pkg`; `cost` is the time in seconds it took to parse"""
+        filename = self._filename(key)
+        dirname = os.path.dirname(filename)
+        try:
+            os.makedirs(dirname)
+        except OSError as exc:
+            if exc.errno != errno.EEXIST:
+                raise
+        fd, tmpname = tempfile.mkstemp(dir=dirname, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                pickle.dump((cost, pkg), f, pickle.HIGHEST_PROTOCOL)
+            size = os.path.getsize(tmpname)
+            try:
+                os.rename(tmpname, filename)
+            except OSError:
+                # Windows 下目标已存在时 rename 失败, 其他进程已写入相同内容
+                os.remove(tmpname)
+                return
+        except BaseException:
+            if os.path.exists(tmpname):
+                os.remove(tmpname)
+            raise
+        if self._size is None:
+            self._size = self._scan()[1]
+        else:
+            self._size += size
+        if self._size > self.max_size:
+            self.evict()
+
+    def evict(self):
+        """Remove least recently used entries until the cache fits"""
+        entries, total = self._scan()
+        # 多删一些, 避免每次写入都触发淘汰
+        limit = self.max_size * 0.9
+        for mtime, size, filename in sorted(entries):
+            if total <= limit:
+                break
+            try:
+                os.remove(filename)
+            except OSError:
+                # 可能已被其他进程删除
+                pass
+            total -= size
+        self._size = total
+
+    def clear(self):
+        for _, _, filename in self._scan()[0]:
+            try:
+                os.remove(filename)
+            except OSError:
+                pass
+        self._size = 0
+
+    def stats(self):
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'saved_seconds': self.saved_seconds,
+        }
+
+    def popStats(self):
+        """Return the counters and reset them to zero"""
+        stats = self.stats()
+        self.hits = 0
+        self.misses = 0
+        self.saved_seconds = 0.0
+        return stats
+
+    def addStats(self, stats):
+        self.hits += stats['hits']
+        self.misses += stats['misses']
+        self.saved_seconds += stats['saved_seconds']
+
+    def _filename(self, key):
+        return os.path.join(self.path, key[:2], key[2:] + '.pkl')
+
+    def _scan(self):
+        entries = []
+        total = 0
+        if not os.path.isdir(self.path):
+            return entries, total
+        for path, dirs, files in os.walk(self.path):
+            for name in files:
+                if not name.endswith('.pkl'):
+                    continue
+                filename = os.path.join(path, name)
+                try:
+                    st = os.stat(filename)
+                except OSError:
+                    continue
+                entries.append((st.st_mtime, st.st_size, filename))
+                total += st.st_size
+        return entries, total
@@ -28,13 +28,15 @@
 # NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS
 # SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
 
+import re
+
 import pyparsing
 from pyparsing import (
     Keyword, Literal, CaselessLiteral, Word,
     Combine, ZeroOrMore, Regex, Optional,
     QuotedString, nestedExpr,
     delimitedList,
-    Forward,
+    Forward, Token, ParserElement, ParseException,
 )
 from asAction import (
     parseASPackage,
@@ -49,6 +51,9 @@ from asAction import (
     parseASMethodBody,
 )
 
+# 语法或模型变化导致解析结果不同时递增, 用于使解析缓存失效
+GRAMMAR_VERSION = 5
+
 KEYWORDS = {
     'package': Keyword('package'),
     'class': Keyword('class'),
@@ -127,10 +132,11 @@ DBL_QUOTED_STRING = QuotedString(quoteChar="\"", escChar='\\')
 SINGLE_QUOTED_STRING = QuotedString(quoteChar="'", escChar='\\')
 ARRAY_INIT = LSQUARE + RSQUARE
 OBJECT_INIT = nestedExpr("{", "}")
+# 各候选项的首字符互不相同, 只有 0x 会同时匹配 floatnumber 和 hex_integer,
+# 所以按此顺序取第一个匹配即与取最长匹配相同; integer 总被 floatnumber 覆盖
 VALUE = (
-    floatnumber ^ QUALIFIED_IDENTIFIER
-    ^ DBL_QUOTED_STRING ^ SINGLE_QUOTED_STRING
-    ^ integer ^ hex_integer
+    hex_integer | floatnumber | QUALIFIED_IDENTIFIER
+    | DBL_QUOTED_STRING | SINGLE_QUOTED_STRING
 )
 INIT = (
     QuotedString(quoteChar="=", endQuoteChar=";", multiline=True)
@@ -196,9 +202,6 @@ VARIABLE_INITIALIZATION = (
     IDENTIFIER('name')
     + (INIT ^ TERMINATOR)
 )
-BLOCK = nestedExpr('{', '}')('block')
-# 加上静态初始化块
-BASE_BLOCK = USE_NAMESPACE ^ INCLUDE_DEFINITION ^ BLOCK ^ VARIABLE_INITIALIZATION
 # 方法相关的语法
 METHOD_MODIFIER = (
     Optional(KEYWORDS['static']('static'))
@@ -228,12 +231,6 @@ METHOD_SIGNATURE = (
     # 返回值类型
     + Optional(TYPE)
 )
-METHOD_DEFINITION = (
-    ZeroOrMore(METATAG)('metatag')
-    + Optional(METHOD_MODIFIER)
-    + METHOD_SIGNATURE
-    + BLOCK('body').setParseAction(parseASMethodBody)
-).setParseAction(parseASMethod)
 # 类相关的语法
 CLASS_IMPLEMENTS = (
     KEYWORDS['implements']
@@ -241,23 +238,15 @@ CLASS_IMPLEMENTS = (
         QUALIFIED_IDENTIFIER
     ).setResultsName('implements')
 )
-CLASS_BLOCK = (
-    LCURL  # {
-    + ZeroOrMore(
-        IMPORT_DEFINITION
-        ^ BASE_BLOCK
-        ^ VARIABLE_DEFINITION.setResultsName('variables', listAllMatches=True)
-        ^ METHOD_DEFINITION.setResultsName('methods', listAllMatches=True)
-    )
-    + RCURL  # }
-)
 CLASS_EXTENDS = (
     KEYWORDS['extends']
     + QUALIFIED_IDENTIFIER('extends')
 )
 INTERFACE_EXTENDS = (
     KEYWORDS['extends']
-    + delimitedList(QUALIFIED_IDENTIFIER)
+    + delimitedList(
+        QUALIFIED_IDENTIFIER
+    ).setResultsName('extends')
 )
 BASE_MODIFIERS = KEYWORDS['internal'] ^ KEYWORDS['public']
 CLASS_MODIFIERS = (
@@ -265,64 +254,370 @@ CLASS_MODIFIERS = (
     & Optional(KEYWORDS['dynamic']('dynamic'))
     & Optional(BASE_MODIFIERS('visibility'))
 )
-CLASS_DEFINITION = (
-    ZeroOrMore(METATAG)('metatag')
-    + CLASS_MODIFIERS
-    + KEYWORDS['class']
-    + QUALIFIED_IDENTIFIER('name')
-    + Optional(CLASS_EXTENDS)
-    + Optional(CLASS_IMPLEMENTS)
-    + CLASS_BLOCK
-).setParseAction(parseASClass)
-# 接口相关的语法
-INTERFACE_BLOCK = (
-    LCURL  # {
-    + ZeroOrMore(
-        IMPORT_DEFINITION
-        ^ BASE_BLOCK
-        ^ VARIABLE_DEFINITION.setResultsName('variables', listAllMatches=True)
-        ^ (METHOD_SIGNATURE + TERMINATOR).setParseAction(
+# Windows 下文件的 BOM 头
+BOM = Literal('\xEF\xBB\xBF')
+
+# 略读 {} 块时需要跳过的字符: 括号, 字符串, 注释和正则表达式
+_BLOCK_SCAN = re.compile(r'[{}"\'/]')
+_STRING_TAIL = {
+    '"': re.compile(r'(?:[^"\\\n]|\\.)*"'),
+    "'": re.compile(r"(?:[^'\\\n]|\\.)*'"),
+}
+_REGEX_TAIL = re.compile(r'(?:[^/\\\[\n]|\\.|\[(?:[^\]\\\n]|\\.)*\])+/')
+# 这些字符或关键字之后的 '/' 是正则表达式而不是除号
+_REGEX_PRECEDERS = set('(,=:[!&|?{};+-*%<>~^')
+_REGEX_KEYWORDS = set([
+    'return', 'typeof', 'instanceof', 'in', 'case', 'delete', 'void',
+    'throw', 'new', 'else', 'do',
+])
+_IDENTIFIER_CHARS = set(pyparsing.alphanums + '_$')
+
+
+def _regexAllowed(source, pos):
+    i = pos - 1
+    while i >= 0 and source[i] in ' \t\r\n':
+        i -= 1
+    if i < 0 or source[i] in _REGEX_PRECEDERS:
+        return True
+    if source[i] not in _IDENTIFIER_CHARS:
+        return False
+    end = i + 1
+    while i >= 0 and source[i] in _IDENTIFIER_CHARS:
+        i -= 1
+    return source[i + 1:end] in _REGEX_KEYWORDS
+
+
+def skipBlock(source, loc):
+    """Return the offset just past the '}' that closes the '{' at `loc`
+
+    Braces inside string literals, comments and regular expression literals
+    are ignored. Raises ValueError if the block is not closed.
+    """
+    depth = 0
+    pos = loc
+    search = _BLOCK_SCAN.search
+    while True:
+        match = search(source, pos)
+        if match is None:
+            raise ValueError('unbalanced braces')
+        char = match.group()
+        pos = match.end()
+        if char == '{':
+            depth += 1
+        elif char == '}':
+            depth -= 1
+            if depth == 0:
+                return pos
+        elif char != '/':
+            tail = _STRING_TAIL[char].match(source, pos)
+            if tail is not None:
+                pos = tail.end()
+            else:
+                # 未闭合的字符串只跳过到行尾
+                newline = source.find('\n', pos)
+                pos = len(source) if newline == -1 else newline
+        elif source.startswith('//', match.start()):
+            newline = source.find('\n', pos)
+            pos = len(source) if newline == -1 else newline
+        elif source.startswith('/*', match.start()):
+            end = source.find('*/', pos + 1)
+            pos = len(source) if end == -1 else end + 2
+        elif _regexAllowed(source, match.start()):
+            tail = _REGEX_TAIL.match(source, pos)
+            if tail is not None:
+                pos = tail.end()
+
+
+class SkimmedBlock(Token):
+    """Match a {} block without tokenizing its contents
+
+    The block is found by skipBlock and returned as a single
+    (start, end) token holding its offsets in the parsed string.
+    """
+
+    def __init__(self):
+        super(SkimmedBlock, self).__init__()
+        self.name = 'skimmed {} block'
+        self.errmsg = 'Expected ' + self.name
+        self.mayReturnEmpty = False
+        self.mayIndexError = False
+
+    def parseImpl(self, instring, loc, doActions=True):
+        if not instring.startswith('{', loc):
+            raise ParseException(instring, loc, self.errmsg, self)
+        try:
+            end = skipBlock(instring, loc)
+        except ValueError:
+            raise ParseException(instring, loc, self.errmsg, self)
+        return end, [(loc, end)]
+
+
+# 跳过成员前面的元数据标签和修饰符, 取出决定成员种类的关键字
+_MEMBER_LOOKAHEAD = re.compile(r'''
+    (?:\[(?:"(?:[^"\\]|\\.)*"|'(?:[^'\\]|\\.)*'|[^\]"'])*\]\s*)*
+    (?:(?!(?:function|var|const|import|include|use)\b)
+       [A-Za-z_$][\w$]*\s+)*
+    (?P<key>(?:function|var|const|import|include|use)\b|\{)?
+''', re.X)
+
+
+class Dispatch(ParserElement):
+    """Choose one alternative by looking at the member's leading keyword
+
+    `alternatives` maps the keyword found by _MEMBER_LOOKAHEAD to the
+    expression to try; members without one are tried against `default`.
+    If the chosen expression does not match, `fallback` (the equivalent
+    longest-match Or) is tried instead so both grammars accept the same
+    input.
+    """
+
+    def __init__(self, alternatives, default, fallback):
+        super(Dispatch, self).__init__()
+        self.alternatives = alternatives
+        self.default = default
+        self.fallback = fallback
+        self.name = 'class member'
+        self.errmsg = 'Expected ' + self.name
+        self.mayReturnEmpty = False
+        self.mayIndexError = False
+
+    def parseImpl(self, instring, loc, doActions=True):
+        key = _MEMBER_LOOKAHEAD.match(instring, loc).group('key')
+        expr = self.alternatives.get(key, self.default)
+        try:
+            return expr._parse(instring, loc, doActions)
+        except ParseException:
+            return self.fallback._parse(instring, loc, doActions)
+
+    def streamline(self):
+        super(Dispatch, self).streamline()
+        for expr in self.alternatives.values():
+            expr.streamline()
+        self.default.streamline()
+        self.fallback.streamline()
+        return self
+
+    def __str__(self):
+        return 'Dispatch({0})'.format(', '.join(sorted(self.alternatives)))
+
+
+# PackratScope 替换的 pyparsing 内部属性, 较早的版本中缺少其中一些
+_PACKRAT_INTERNALS = (
+    '_parse', '_parseCache', '_packratEnabled', 'packrat_cache',
+    '_FifoCache', 'packrat_cache_stats',
+)
+
+
+def packratSupported():
+    """Tell whether the installed pyparsing has what PackratScope patches"""
+    return all(name in ParserElement.__dict__ for name in _PACKRAT_INTERNALS)
+
+
+class PackratScope(object):
+    """Memoize the parse results of the expressions used inside a with block
+
+    pyparsing only offers packrat parsing as a process wide switch. This
+    turns it on with a fresh cache of at most `size` entries on entering
+    and restores the previous parser on leaving, dropping the cache, so
+    memory used for memoization is bounded by one file. The cache hits and
+    misses of the block are kept in `hits` and `misses`.
+    """
+
+    def __init__(self, size):
+        self.size = size
+        self.hits = 0
+        self.misses = 0
+
+    def __enter__(self):
+        # 先取出所有用到的属性, 缺少任何一个时不会只替换了一部分
+        self._saved = (
+            ParserElement.__dict__['_parse'],
+            ParserElement._packratEnabled,
+            ParserElement.packrat_cache,
+        )
+        cache = ParserElement._FifoCache(self.size)
+        stats = ParserElement.packrat_cache_stats
+        parse = ParserElement.__dict__['_parseCache']
+        ParserElement.packrat_cache = cache
+        stats[:] = [0, 0]
+        ParserElement._packratEnabled = True
+        ParserElement._parse = parse
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.hits, self.misses = ParserElement.packrat_cache_stats
+        ParserElement.packrat_cache.clear()
+        (ParserElement._parse,
+         ParserElement._packratEnabled,
+         ParserElement.packrat_cache) = self._saved
+        return False
+
+    @property
+    def hit_rate(self):
+        total = self.hits + self.misses
+        return float(self.hits) / total if total else 0.0
+
+
+# ASMetodBody 延迟解析方法体时使用
+BODY_TOKENS = nestedExpr('{', '}')
+
+
+class Grammar(object):
+    """The parts of the grammar that contain {} blocks
+
+    Method bodies are always matched by SkimmedBlock. By default they become
+    an ASMetodBody that tokenizes itself on first use; with skim=True static
+    initializer blocks are skimmed as well and methods only record the
+    offsets of their body.
+
+    With dispatch=True the members of class, interface and MXML script
+    blocks are matched by Dispatch, which tries the one alternative named
+    by the member's leading keyword instead of every alternative of an Or.
+    """
+
+    def __init__(self, skim=False, dispatch=False):
+        if skim:
+            BLOCK = SkimmedBlock()('block')
+            METHOD_BODY = SkimmedBlock()('body')
+        else:
+            BLOCK = nestedExpr('{', '}')('block')
+            # 方法体在第一次使用时才由 BODY_TOKENS 解析
+            METHOD_BODY = SkimmedBlock()('body').setParseAction(
+                parseASMethodBody
+            )
+        # 加上静态初始化块
+        BASE_BLOCK = (
+            USE_NAMESPACE ^ INCLUDE_DEFINITION ^ BLOCK
+            ^ VARIABLE_INITIALIZATION
+        )
+        METHOD_DEFINITION = (
+            ZeroOrMore(METATAG)('metatag')
+            + Optional(METHOD_MODIFIER)
+            + METHOD_SIGNATURE
+            + METHOD_BODY
+        ).setParseAction(parseASMethod)
+        VARIABLE_MEMBER = VARIABLE_DEFINITION.setResultsName(
+            'variables', listAllMatches=True
+        )
+        METHOD_MEMBER = METHOD_DEFINITION.setResultsName(
+            'methods', listAllMatches=True
+        )
+        VIRTUAL_METHOD_MEMBER = (METHOD_SIGNATURE + TERMINATOR).setParseAction(
             parseASVirtualMethod
         ).setResultsName(
             'methods', listAllMatches=True
         )
-    )
-    + RCURL  # }
-)
-INTERFACE_DEFINITION = (
-    Optional(BASE_MODIFIERS)
-    + KEYWORDS['interface']
-    + QUALIFIED_IDENTIFIER('name')
-    + Optional(INTERFACE_EXTENDS)
-    + INTERFACE_BLOCK
-).setParseAction(parseASInterface)
-# 包相关的语法
-PACKAGE_BLOCK = (
-    LCURL  # {
-    + ZeroOrMore(IMPORT_DEFINITION)('imports')
-    + ZeroOrMore(USE_NAMESPACE)('use_namespace')
-    + (
-        CLASS_DEFINITION('class_')
-        ^ INTERFACE_DEFINITION('interface')
-        ^ NAMESPACE_DEFINITION
-    )
-    + RCURL  # }
-)
-PACKAGE_DEFINITION = (
-    KEYWORDS['package']
-    + Optional(QUALIFIED_IDENTIFIER('name'))
-    + PACKAGE_BLOCK
-).setParseAction(parseASPackage)
-# Windows 下文件的 BOM 头
-BOM = Literal('\xEF\xBB\xBF')
-PROGRAM = (
-    Optional(BOM)
-    + PACKAGE_DEFINITION('package')
-)
+        CLASS_MEMBER = (
+            IMPORT_DEFINITION ^ BASE_BLOCK ^ VARIABLE_MEMBER ^ METHOD_MEMBER
+        )
+        INTERFACE_MEMBER = (
+            IMPORT_DEFINITION ^ BASE_BLOCK ^ VARIABLE_MEMBER
+            ^ VIRTUAL_METHOD_MEMBER
+        )
+        if dispatch:
+            BASE_MEMBERS = {
+                'import': IMPORT_DEFINITION,
+                'use': USE_NAMESPACE,
+                'include': INCLUDE_DEFINITION,
+                '{': BLOCK,
+                'var': VARIABLE_MEMBER,
+                'const': VARIABLE_MEMBER,
+            }
+            CLASS_MEMBER = Dispatch(
+                dict(BASE_MEMBERS, function=METHOD_MEMBER),
+                VARIABLE_INITIALIZATION, CLASS_MEMBER
+            )
+            INTERFACE_MEMBER = Dispatch(
+                dict(BASE_MEMBERS, function=VIRTUAL_METHOD_MEMBER),
+                VARIABLE_INITIALIZATION, INTERFACE_MEMBER
+            )
+        CLASS_BLOCK = (
+            LCURL  # {
+            + ZeroOrMore(CLASS_MEMBER)
+            + RCURL  # }
+        )
+        CLASS_DEFINITION = (
+            ZeroOrMore(METATAG)('metatag')
+            + CLASS_MODIFIERS
+            + KEYWORDS['class']
+            + QUALIFIED_IDENTIFIER('name')
+            + Optional(CLASS_EXTENDS)
+            + Optional(CLASS_IMPLEMENTS)
+            + CLASS_BLOCK
+        ).setParseAction(parseASClass)
+        # 接口相关的语法
+        INTERFACE_BLOCK = (
+            LCURL  # {
+            + ZeroOrMore(INTERFACE_MEMBER)
+            + RCURL  # }
+        )
+        INTERFACE_DEFINITION = (
+            Optional(BASE_MODIFIERS)
+            + KEYWORDS['interface']
+            + QUALIFIED_IDENTIFIER('name')
+            + Optional(INTERFACE_EXTENDS)
+            + INTERFACE_BLOCK
+        ).setParseAction(parseASInterface)
+        # 包相关的语法
+        PACKAGE_BLOCK = (
+            LCURL  # {
+            + ZeroOrMore(IMPORT_DEFINITION)('imports')
+            + ZeroOrMore(USE_NAMESPACE)('use_namespace')
+            + (
+                CLASS_DEFINITION('class_')
+                ^ INTERFACE_DEFINITION('interface')
+                ^ NAMESPACE_DEFINITION
+            )
+            + RCURL  # }
+        )
+        PACKAGE_DEFINITION = (
+            KEYWORDS['package']
+            + Optional(QUALIFIED_IDENTIFIER('name'))
+            + PACKAGE_BLOCK
+        ).setParseAction(parseASPackage)
+        PROGRAM = (
+            Optional(BOM)
+            + PACKAGE_DEFINITION('package')
+        )
+        MXML_SCRIPT_BLOCK = ZeroOrMore(CLASS_MEMBER)
+        if skim:
+            # 记录的偏移量对应传入的字符串, 不能展开 Tab
+            PROGRAM.parseWithTabs()
+            MXML_SCRIPT_BLOCK.parseWithTabs()
 
-MXML_SCRIPT_BLOCK = ZeroOrMore(
-    IMPORT_DEFINITION
-    ^ BASE_BLOCK
-    ^ VARIABLE_DEFINITION.setResultsName('variables', listAllMatches=True)
-    ^ METHOD_DEFINITION.setResultsName('methods', listAllMatches=True)
-)
+        self.BLOCK = BLOCK
+        self.BASE_BLOCK = BASE_BLOCK
+        self.METHOD_DEFINITION = METHOD_DEFINITION
+        self.CLASS_BLOCK = CLASS_BLOCK
+        self.CLASS_DEFINITION = CLASS_DEFINITION
+        self.INTERFACE_BLOCK = INTERFACE_BLOCK
+        self.INTERFACE_DEFINITION = INTERFACE_DEFINITION
+        self.PACKAGE_BLOCK = PACKAGE_BLOCK
+        self.PACKAGE_DEFINITION = PACKAGE_DEFINITION
+        self.PROGRAM = PROGRAM
+        self.MXML_SCRIPT_BLOCK = MXML_SCRIPT_BLOCK
+
+
+_grammars = {}
+
+
+def getGrammar(skim=False, dispatch=False):
+    """Return the Grammar for the given options, building it only once"""
+    key = (skim, dispatch)
+    if key not in _grammars:
+        _grammars[key] = Grammar(skim, dispatch)
+    return _grammars[key]
+
+
+DEFAULT_GRAMMAR = getGrammar()
+BLOCK = DEFAULT_GRAMMAR.BLOCK
+BASE_BLOCK = DEFAULT_GRAMMAR.BASE_BLOCK
+METHOD_DEFINITION = DEFAULT_GRAMMAR.METHOD_DEFINITION
+CLASS_BLOCK = DEFAULT_GRAMMAR.CLASS_BLOCK
+CLASS_DEFINITION = DEFAULT_GRAMMAR.CLASS_DEFINITION
+INTERFACE_BLOCK = DEFAULT_GRAMMAR.INTERFACE_BLOCK
+INTERFACE_DEFINITION = DEFAULT_GRAMMAR.INTERFACE_DEFINITION
+PACKAGE_BLOCK = DEFAULT_GRAMMAR.PACKAGE_BLOCK
+PACKAGE_DEFINITION = DEFAULT_GRAMMAR.PACKAGE_DEFINITION
+PROGRAM = DEFAULT_GRAMMAR.PROGRAM
+MXML_SCRIPT_BLOCK = DEFAULT_GRAMMAR.MXML_SCRIPT_BLOCK
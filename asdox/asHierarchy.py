@@ -0,0 +1,256 @@
+#!/usr/bin/env python
+# encoding=utf-8
+
+# Copyright (c) 2008, Michael Ramirez
+#
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification are permitted provided that the following conditions are met:
+#   * Redistributions of source code must retain the above copyright notice,
+#     this list of conditions and the following disclaimer.
+#   * Redistributions in binary form must reproduce the above copyright notice,
+#     this list of conditions and the following disclaimer in the documentation
+#     and/or other #materials provided with the distribution.
+#   * Neither the name of the <ORGANIZATION> nor the names of its contributors
+#     may be used to endorse or promote products derived from this software
+#     without specific #prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+# "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+# LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR
+# A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT OWNER OR
+# CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL,
+# EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO,
+# PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR
+# PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF
+# LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING
+# NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS
+# SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+"""Inheritance of classes through extends and implements
+
+ClassHierarchy follows the extends chain of a class, resolved with a
+SymbolTable, and computes the members the class has including those it
+inherits, the methods that override an inherited one, and every
+interface it implements directly or through its superclasses.
+
+As in ActionScript, private and static members and the constructor are
+not inherited. A superclass or interface that is not one of the parsed
+packages ends the chain; it contributes no members.
+
+Results are computed when first asked for and kept until invalidate is
+called for the class or for one of its superclasses or interfaces.
+"""
+
+from asSymbols import packageOf
+
+# ASClass 中保存成员的字典
+KINDS = ('variables', 'methods', 'getter_methods', 'setter_methods')
+METHOD_KINDS = ('methods', 'getter_methods', 'setter_methods')
+
+
+def _isInherited(owner, kind, name, member):
+    if member.visibility == 'private' or member.isStatic:
+        return False
+    # 构造函数
+    return not (kind == 'methods' and name == owner.name)
+
+
+class ClassHierarchy(object):
+    """Memoized inheritance over the packages of a SymbolTable
+
+    Classes are identified by their full_name. The dicts and lists that
+    are returned are shared with the cache and must not be modified.
+    """
+
+    def __init__(self, symbols):
+        self.symbols = symbols
+        # 全名 -> 基类的全名或 None
+        self._superclass = {}
+        # (全名, 种类) -> {名称: 成员}
+        self._members = {}
+        # 全名 -> 实现的接口的全名
+        self._interfaces = {}
+        # 全名 -> 直接继承或实现它的类的全名
+        self._dependents = {}
+
+    def _depends(self, name, dependent):
+        self._dependents.setdefault(name, set()).add(dependent)
+
+    def _dependsOnUnresolved(self, cls, name):
+        # 无法解析的名称在加入相应的类后可能解析成功
+        for candidate in self.symbols.candidates(name, packageOf(cls),
+                                                cls.imports):
+            self._depends(candidate, cls.full_name)
+
+    def superclassName(self, cls):
+        """Return the qualified name of the class `cls` extends, or None"""
+        key = cls.full_name
+        try:
+            return self._superclass[key]
+        except KeyError:
+            pass
+        name = None
+        if not cls.isInterface:
+            name = self.symbols.extendsOf(cls)
+            if name == key:
+                name = None
+        self._superclass[key] = name
+        if name is not None:
+            self._depends(name, key)
+        elif cls.extends and not cls.isInterface:
+            self._dependsOnUnresolved(cls, cls.extends)
+        return name
+
+    def superclass(self, cls):
+        """Return the ASClass `cls` extends, or None if it is not parsed"""
+        name = self.superclassName(cls)
+        if name is None:
+            return None
+        return self.symbols.find(name)
+
+    def ancestors(self, cls):
+        """Return the parsed superclasses of `cls`, nearest first"""
+        ancestors = []
+        seen = set([cls.full_name])
+        base = self.superclass(cls)
+        while base is not None and base.full_name not in seen:
+            seen.add(base.full_name)
+            ancestors.append(base)
+            base = self.superclass(base)
+        return ancestors
+
+    def members(self, cls, kind='methods'):
+        """Return {name: member} of `cls` for `kind`, inherited ones included
+
+        `kind` is one of KINDS. A member of `cls` hides an inherited one
+        with the same name.
+        """
+        key = (cls.full_name, kind)
+        members = self._members.get(key)
+        if members is not None:
+            return members
+        own = getattr(cls, kind)
+        # 先放入自身的成员, 循环继承时递归到这里就停止
+        self._members[key] = own
+        base = self.superclass(cls)
+        if base is None:
+            members = own
+        else:
+            members = dict(self.members(base, kind))
+            # 基类继承来的成员已经筛选过, 只需去掉基类自身不能继承的成员
+            for name, member in getattr(base, kind).items():
+                if not _isInherited(base, kind, name, member):
+                    del members[name]
+            members.update(own)
+        self._members[key] = members
+        return members
+
+    def interfaces(self, cls):
+        """Return the qualified names of every interface `cls` implements
+
+        The interfaces `cls` names come first, in order, each followed by
+        the interfaces it extends, then those of its superclasses. Names
+        that cannot be resolved are left out.
+        """
+        key = cls.full_name
+        interfaces = self._interfaces.get(key)
+        if interfaces is not None:
+            return interfaces
+        self._interfaces[key] = interfaces = []
+        seen = set()
+
+        def add(name):
+            if name not in seen:
+                seen.add(name)
+                interfaces.append(name)
+
+        for written, name in zip(cls.implements,
+                                 self.symbols.implementsOf(cls)):
+            if name is None:
+                self._dependsOnUnresolved(cls, written)
+                continue
+            add(name)
+            self._depends(name, key)
+            interface = self.symbols.find(name)
+            if interface is not None:
+                for inherited in self.interfaces(interface):
+                    add(inherited)
+        base = self.superclass(cls)
+        if base is not None:
+            for inherited in self.interfaces(base):
+                add(inherited)
+        return interfaces
+
+    def overrides(self, cls):
+        """Return {(kind, name): inherited method} for methods of `cls`
+        that replace a method of a superclass
+
+        `kind` is one of METHOD_KINDS, so a getter only overrides a getter.
+        """
+        overrides = {}
+        base = self.superclass(cls)
+        if base is None:
+            return overrides
+        for kind in METHOD_KINDS:
+            inherited = self.members(base, kind)
+            for name, method in getattr(cls, kind).items():
+                if method.isStatic or (kind == 'methods' and name == cls.name):
+                    continue
+                member = inherited.get(name)
+                if member is not None and _isInherited(base, kind, name,
+                                                       member):
+                    overrides[(kind, name)] = member
+        return overrides
+
+    def overrideMismatches(self, cls):
+        """Return the sorted (kind, name) of methods of `cls` whose
+        isOverride disagrees with the hierarchy
+
+        A method that overrides without isOverride is always reported. A
+        method with isOverride that overrides nothing is only reported
+        when every superclass of `cls` is parsed.
+        """
+        overrides = self.overrides(cls)
+        complete = self._isComplete(cls)
+        mismatches = []
+        for kind in METHOD_KINDS:
+            for name, method in getattr(cls, kind).items():
+                if (kind, name) in overrides:
+                    if not method.isOverride:
+                        mismatches.append((kind, name))
+                elif method.isOverride and complete:
+                    mismatches.append((kind, name))
+        return sorted(mismatches)
+
+    def _isComplete(self, cls):
+        # 继承链在 Object 或没有 extends 的类处结束
+        ancestors = self.ancestors(cls)
+        last = ancestors[-1] if ancestors else cls
+        name = self.superclassName(last)
+        if name is None:
+            return not last.extends
+        return name == 'Object'
+
+    def invalidate(self, names, symbols=None):
+        """Forget what was computed for the classes `names`
+
+        Everything computed for the classes that extend or implement them,
+        directly or not, is forgotten too. Pass `symbols` when the packages
+        changed so names are resolved again with a new SymbolTable.
+        """
+        if symbols is not None:
+            self.symbols = symbols
+        pending = list(names)
+        seen = set()
+        while pending:
+            name = pending.pop()
+            if name in seen:
+                continue
+            seen.add(name)
+            self._superclass.pop(name, None)
+            self._interfaces.pop(name, None)
+            for kind in KINDS:
+                self._members.pop((name, kind), None)
+            pending.extend(self._dependents.pop(name, ()))
@@ -0,0 +1,184 @@
+#!/usr/bin/env python
+# encoding=utf-8
+
+# Copyright (c) 2008, Michael Ramirez
+#
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification are permitted provided that the following conditions are met:
+#   * Redistributions of source code must retain the above copyright notice,
+#     this list of conditions and the following disclaimer.
+#   * Redistributions in binary form must reproduce the above copyright notice,
+#     this list of conditions and the following disclaimer in the documentation
+#     and/or other #materials provided with the distribution.
+#   * Neither the name of the <ORGANIZATION> nor the names of its contributors
+#     may be used to endorse or promote products derived from this software
+#     without specific #prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+# "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+# LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR
+# A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT OWNER OR
+# CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL,
+# EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO,
+# PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR
+# PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF
+# LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING
+# NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS
+# SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+"""Symbol index of classes and interfaces by fully qualified name
+
+The index file is opened with mmap, so opening it costs the same for ten
+classes or a hundred thousand. It holds a table of fixed size entries
+sorted by name; a lookup is a binary search over the table and decodes
+only the record of the class it finds, written with asSnapshot.dumpRecord.
+
+    header: magic 'ASDI', format version (uint16), 2 pad bytes,
+            entry count (uint32), little endian
+    entries: name offset (uint64), record offset (uint64),
+             name length (uint32), record length (uint32)
+    names, utf-8
+    class records
+"""
+
+import mmap
+import struct
+
+from asSnapshot import dumpRecord, loadRecord
+from asSymbols import qualifiedName
+
+MAGIC = 'ASDI'
+FORMAT_VERSION = 1
+
+_HEADER = struct.Struct('<4sHxxI')
+_ENTRY = struct.Struct('<QQII')
+
+
+def _encode(name):
+    if isinstance(name, unicode):
+        return name.encode('utf-8')
+    return name
+
+
+def write(path, packages):
+    """Write the classes and interfaces of `packages` to an index file
+
+    A class and an interface with the same qualified name cannot both be
+    looked up; the class is kept.
+    """
+    symbols = {}
+    for pkg in packages.values():
+        for cls in pkg.interfaces.values():
+            symbols[_encode(qualifiedName(pkg.name, cls.name))] = cls
+        for cls in pkg.classes.values():
+            symbols[_encode(qualifiedName(pkg.name, cls.name))] = cls
+    names = sorted(symbols)
+    entries = []
+    with open(path, 'wb') as f:
+        f.write(_HEADER.pack(MAGIC, FORMAT_VERSION, len(names)))
+        table = f.tell()
+        # 条目表的大小是固定的, 先留出位置, 写完记录后再填写
+        f.seek(table + len(names) * _ENTRY.size)
+        name_offsets = []
+        for name in names:
+            name_offsets.append(f.tell())
+            f.write(name)
+        for name, name_offset in zip(names, name_offsets):
+            data = dumpRecord(symbols[name])
+            entries.append(
+                _ENTRY.pack(name_offset, f.tell(), len(name), len(data))
+            )
+            f.write(data)
+        f.seek(table)
+        f.write(''.join(entries))
+
+
+class SymbolIndex(object):
+    """A mapped index file written by write
+
+    Every lookup decodes a new ASClass. Raises ValueError if the file is
+    not an index of this format version.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, 'rb') as f:
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if len(self._map) < _HEADER.size:
+            self.close()
+            raise ValueError('not an asdox index: {0}'.format(path))
+        magic, version, self._count = _HEADER.unpack_from(self._map)
+        if magic != MAGIC:
+            self.close()
+            raise ValueError('not an asdox index: {0}'.format(path))
+        if version != FORMAT_VERSION:
+            self.close()
+            raise ValueError(
+                'index format {0} is not supported, expected {1}: '
+                '{2}'.format(version, FORMAT_VERSION, path)
+            )
+
+    def close(self):
+        self._map.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def __len__(self):
+        return self._count
+
+    def _entry(self, i):
+        return _ENTRY.unpack_from(self._map, _HEADER.size + i * _ENTRY.size)
+
+    def _name(self, i):
+        name_offset, _, name_size, _ = self._entry(i)
+        return self._map[name_offset:name_offset + name_size]
+
+    def _bisect(self, name):
+        # 第一个不小于 name 的条目
+        low, high = 0, self._count
+        while low < high:
+            middle = (low + high) // 2
+            if self._name(middle) < name:
+                low = middle + 1
+            else:
+                high = middle
+        return low
+
+    def _find(self, name):
+        name = _encode(name)
+        i = self._bisect(name)
+        if i < self._count and self._name(i) == name:
+            return i
+        return -1
+
+    def __contains__(self, name):
+        return self._find(name) >= 0
+
+    def get(self, name, default=None):
+        """Return the ASClass `name`, or `default` if it is not indexed"""
+        i = self._find(name)
+        if i < 0:
+            return default
+        _, record_offset, _, record_size = self._entry(i)
+        return loadRecord(self._map[record_offset:record_offset + record_size])
+
+    def __getitem__(self, name):
+        cls = self.get(name)
+        if cls is None:
+            raise KeyError(name)
+        return cls
+
+    def names(self, prefix=''):
+        """Yield the indexed names starting with `prefix`, in order"""
+        prefix = _encode(prefix)
+        for i in xrange(self._bisect(prefix), self._count):
+            name = self._name(i)
+            if not name.startswith(prefix):
+                break
+            yield name
@@ -0,0 +1,129 @@
+#!/usr/bin/env python
+# encoding=utf-8
+
+# Copyright (c) 2008, Michael Ramirez
+#
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification are permitted provided that the following conditions are met:
+#   * Redistributions of source code must retain the above copyright notice,
+#     this list of conditions and the following disclaimer.
+#   * Redistributions in binary form must reproduce the above copyright notice,
+#     this list of conditions and the following disclaimer in the documentation
+#     and/or other #materials provided with the distribution.
+#   * Neither the name of the <ORGANIZATION> nor the names of its contributors
+#     may be used to endorse or promote products derived from this software
+#     without specific #prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+# "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+# LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR
+# A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT OWNER OR
+# CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL,
+# EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO,
+# PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR
+# PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF
+# LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING
+# NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS
+# SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+"""Index of the metatags on classes and their members
+
+MetadataIndex maps a metatag name, a name and parameter key, or a name,
+key and value to the places the tag is used, so a generator can ask for
+every [Column] or every [ValueObjectCollection(type="...")] without
+walking the model. Builder keeps one up to date as files are parsed.
+"""
+
+from asHierarchy import KINDS
+from asSymbols import qualifiedName
+
+
+class MetadataIndex(object):
+    """Metatags of classes and members by name, key and value
+
+    A hit is a tuple (cls, member, tag): the ASClass, the member that
+    carries the ASMetaTag, or None for a tag on the class itself, and the
+    tag. Positional parameters have their index as key.
+    """
+
+    def __init__(self):
+        # 键 -> {类全名: [命中]}, 键是 (名称,), (名称, 参数名) 或
+        # (名称, 参数名, 值)
+        self._index = {}
+        # 类全名 -> 该类出现在其下的键, 用于移除
+        self._classes = {}
+
+    def addPackage(self, pkg):
+        """Index the classes and interfaces of an ASPackage"""
+        for kind in ('classes', 'interfaces'):
+            for cls in getattr(pkg, kind).values():
+                self.addClass(qualifiedName(pkg.name, cls.name), cls)
+
+    def addClass(self, name, cls):
+        """Index `cls` under its qualified `name`, replacing what was
+        indexed under that name before"""
+        self.removeClass(name)
+        hits = {}
+
+        def add(member, tags):
+            for tag in tags:
+                hit = (cls, member, tag)
+                hits.setdefault((tag.name,), []).append(hit)
+                for key, value in tag.params.items():
+                    hits.setdefault((tag.name, key), []).append(hit)
+                    hits.setdefault((tag.name, key, value), []).append(hit)
+
+        add(None, cls.metadata)
+        for kind in KINDS:
+            for member in getattr(cls, kind).values():
+                add(member, member.metadata)
+        for key, found in hits.items():
+            self._index.setdefault(key, {})[name] = found
+        if hits:
+            self._classes[name] = list(hits)
+
+    def removeClass(self, name):
+        """Remove what was indexed under the qualified class `name`"""
+        for key in self._classes.pop(name, ()):
+            found = self._index[key]
+            del found[name]
+            if not found:
+                del self._index[key]
+
+    def update(self, other, names):
+        """Take over what the MetadataIndex `other` indexed under the
+        qualified class `names`, replacing what was indexed here under them
+
+        The classes are not walked again, so this is cheaper than addClass
+        when `other` already indexed them.
+        """
+        for name in names:
+            self.removeClass(name)
+            keys = other._classes.get(name)
+            if not keys:
+                continue
+            for key in keys:
+                self._index.setdefault(key, {})[name] = other._index[key][name]
+            self._classes[name] = keys
+
+    def find(self, name, key=None, value=None):
+        """Return the hits of the metatag `name`, in no particular order
+
+        With `key` only tags that have that parameter are returned, and
+        with `value` too only those where it has that value.
+        """
+        if key is None:
+            found = self._index.get((name,))
+        elif value is None:
+            found = self._index.get((name, key))
+        else:
+            found = self._index.get((name, key, value))
+        if not found:
+            return []
+        return [hit for hits in found.values() for hit in hits]
+
+    def names(self):
+        """Return the sorted names of the metatags in use"""
+        return sorted(key[0] for key in self._index if len(key) == 1)
@@ -29,12 +29,19 @@
 # SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
 
 
+# 模型类都使用 __slots__, 没有 __dict__. 多个基类中只能有一条继承链
+# 定义非空的 __slots__, 所以 Visible/MetaTagable 的属性由子类声明.
+
+
 class Documentable(object):
     """ActionScript Object that allows for JavaDoc declaration"""
-    pass
+    __slots__ = ()
 
 
 class Visible(object):
+    # 子类需要在 __slots__ 中声明 visibility
+    __slots__ = ()
+
     def __init__(self):
         super(Visible, self).__init__()
         self.visibility = "internal"
@@ -42,23 +49,185 @@ class Visible(object):
 
 class MetaTagable(object):
     """ActionScript Object that allows for MetaTags"""
+    # 子类需要在 __slots__ 中声明 metadata
+    __slots__ = ()
+
     def __init__(self):
         super(MetaTagable, self).__init__()
         self.metadata = []
 
 
-class FromTokens(object):
+class TokensNotRetained(Exception):
+    """Raised by toTokens when the tokens were dropped after parsing"""
+    pass
+
+
+class StringTable(object):
+    """Intern table for the identifiers and type names of the model
+
+    Equal strings share one object, so the model holds one copy of a type
+    name however often it occurs, and comparing two of them is an identity
+    check. len() is the number of distinct strings and `lookups` the
+    number of strings that were interned.
+    """
+
+    def __init__(self):
+        self._strings = {}
+        self.lookups = 0
+
+    def intern(self, string):
+        self.lookups += 1
+        return self._strings.setdefault(string, string)
+
+    def internAll(self, strings):
+        return [self.intern(string) for string in strings]
+
+    def clear(self):
+        self._strings.clear()
+        self.lookups = 0
+
+    def __len__(self):
+        return len(self._strings)
+
+
+# 解析器和反序列化共用的字符串表
+strings = StringTable()
+
+# 反序列化时重新驻留的属性, 反序列化得到的字符串都是新的对象
+_INTERNED_SLOTS = frozenset([
+    'name', 'type_', 'visibility', 'accessor', 'return_type', 'full_name',
+    'extends',
+])
+
+# 类 -> [(属性名, slot 描述符)], 由 _slotDescriptors 填充
+_slot_descriptors = {}
+
+
+def _slotDescriptors(cls):
+    descriptors = _slot_descriptors.get(cls)
+    if descriptors is None:
+        descriptors = []
+        for klass in reversed(cls.__mro__):
+            for name in klass.__dict__.get('__slots__', ()):
+                descriptors.append((name, klass.__dict__[name]))
+        _slot_descriptors[cls] = descriptors
+    return descriptors
+
+
+class Extension(object):
+    """Attribute added to a model class with extend()
+
+    The value lives in the node's extension dict, which is only created
+    when the first extension attribute of that node is set.
+    """
+
+    def __init__(self, name):
+        self.name = name
+
+    def __get__(self, obj, cls):
+        if obj is None:
+            return self
+        if obj._extensions is None or self.name not in obj._extensions:
+            raise AttributeError(self.name)
+        return obj._extensions[self.name]
+
+    def __set__(self, obj, value):
+        if obj._extensions is None:
+            obj._extensions = {}
+        obj._extensions[self.name] = value
+
+    def __delete__(self, obj):
+        if obj._extensions is None or self.name not in obj._extensions:
+            raise AttributeError(self.name)
+        del obj._extensions[self.name]
+
+
+def extend(cls, *names):
+    """Allow attributes `names` on instances of model class `cls`
+
+    The model classes use __slots__, so code that attaches its own
+    attributes to nodes, like the generators in scripts/, declares them
+    first:
+
+        asModel.extend(asModel.ASVariable, 'init', 'capitalize')
+    """
+    for name in names:
+        current = getattr(cls, name, None)
+        if isinstance(current, Extension):
+            continue
+        if current is not None or name.startswith('__'):
+            raise ValueError(
+                '{0}.{1} is already defined'.format(cls.__name__, name)
+            )
+        setattr(cls, name, Extension(name))
+
+
+class ModelNode(object):
+    """Base of the model classes: slots, pickling and extension attributes"""
+
+    __slots__ = ('_extensions',)
 
     def __init__(self):
+        self._extensions = None
+
+    def __getstate__(self):
+        # 直接使用 slot 描述符, 绕过 ASMetodBody.raw_tokens 这样的 property
+        state = {}
+        for name, descriptor in _slotDescriptors(type(self)):
+            try:
+                state[name] = descriptor.__get__(self, type(self))
+            except AttributeError:
+                continue
+        return state
+
+    def __setstate__(self, state):
+        for name, descriptor in _slotDescriptors(type(self)):
+            if name in state:
+                value = state[name]
+                if name in _INTERNED_SLOTS and isinstance(value, basestring):
+                    value = strings.intern(value)
+                descriptor.__set__(self, value)
+
+
+class FromTokens(ModelNode):
+
+    __slots__ = ('raw_tokens',)
+
+    def __init__(self):
+        super(FromTokens, self).__init__()
         self.raw_tokens = None
 
     def setTokens(self, tokens):
         self.raw_tokens = tokens.asList()
 
+    def retainedTokens(self):
+        if self.raw_tokens is None:
+            raise TokensNotRetained(
+                'no tokens kept for {0!r}, parse it with '
+                'Builder(tokens="full") or "signature"'.format(self)
+            )
+        return self.raw_tokens
+
+    def retainTokens(self, policy):
+        """Drop the tokens `policy` does not keep, here and in child nodes
+
+        'full' keeps everything, 'signature' keeps the declarations but
+        not method bodies and other blocks, 'none' keeps no tokens.
+        """
+        if policy == 'none':
+            self.raw_tokens = None
+        for child in self.childNodes():
+            child.retainTokens(policy)
+
+    def childNodes(self):
+        return []
+
 
 class ASType(FromTokens):
     """ActionScript 3 Type"""
 
+    __slots__ = ('name', 'type_')
+
     def __init__(self, name, type_):
         super(ASType, self).__init__()
         self.name = name
@@ -68,13 +237,18 @@ class ASType(FromTokens):
         return '<ASType: {0}>'.format(self.name)
 
     def toTokens(self):
-        for t in self.raw_tokens:
+        for t in self.retainedTokens():
             yield t
 
 
 class ASVariable(ASType, Visible, MetaTagable, FromTokens):
     """ActionScript 3 Variable"""
 
+    __slots__ = (
+        'visibility', 'metadata', 'isStatic', 'isConstant',
+        'readable', 'writable', 'isProperty',
+    )
+
     def __init__(self, name='', type_='*'):
         super(ASVariable, self).__init__(name, type_)
         self.isStatic = False
@@ -89,14 +263,19 @@ class ASVariable(ASType, Visible, MetaTagable, FromTokens):
             self.type_
         )
 
+    def childNodes(self):
+        return self.metadata
+
     def toTokens(self):
-        for t in self.raw_tokens:
+        for t in self.retainedTokens():
             yield t
 
 
 class ASMetaTag(FromTokens):
     """ActionScript MetaTag Definition"""
 
+    __slots__ = ('name', 'params')
+
     def __init__(self, name=''):
         super(ASMetaTag, self).__init__()
         self.name = name
@@ -105,8 +284,14 @@ class ASMetaTag(FromTokens):
     def __repr__(self):
         return '<ASMetaTag: {0}>'.format(self.name)
 
+    def toTokens(self):
+        for t in self.retainedTokens():
+            yield t
+
 
 class ASImport(FromTokens):
+    __slots__ = ('name',)
+
     def __init__(self, name):
         super(ASImport, self).__init__()
         self.name = name
@@ -115,7 +300,7 @@ class ASImport(FromTokens):
         return '<ASImport: {0}>'.format(self.name)
 
     def toTokens(self):
-        for t in self.raw_tokens:
+        for t in self.retainedTokens():
             yield t
 
 
@@ -133,6 +318,11 @@ def flatten_nested_tokens(lst):
 class ASMethod(ASType, Visible, MetaTagable, FromTokens):
     """ActionScript Method Definition"""
 
+    __slots__ = (
+        'visibility', 'metadata', 'isOverride', 'isFinal', 'isStatic',
+        'accessor', 'return_type', 'arguments', 'body', 'body_span',
+    )
+
     def __init__(self, name='', return_type='void'):
         super(ASMethod, self).__init__(name, 'function')
         self.isOverride = False
@@ -142,12 +332,31 @@ class ASMethod(ASType, Visible, MetaTagable, FromTokens):
         self.return_type = return_type
         self.arguments = {}
         self.body = None
+        # 略读模式或不保留方法体 tokens 时, 方法体在原始源码中的
+        # (起始, 结束) 偏移量
+        self.body_span = None
 
     def __repr__(self):
         return '<ASMethod: {0}>'.format(self.name)
 
+    def childNodes(self):
+        return list(self.arguments.values()) + self.metadata
+
+    def retainTokens(self, policy):
+        if policy != 'full' and isinstance(self.body, ASMetodBody):
+            # 和略读模式一样只保留方法体的位置, 不再引用整个源文件
+            span = (self.body.start, self.body.end)
+            if self.raw_tokens is not None:
+                self.raw_tokens = [
+                    span if token is self.body else token
+                    for token in self.raw_tokens
+                ]
+            self.body = None
+            self.body_span = span
+        super(ASMethod, self).retainTokens(policy)
+
     def toTokens(self):
-        for token in self.raw_tokens:
+        for token in self.retainedTokens():
             if isinstance(token, str):
                 yield token
             elif isinstance(token, list):
@@ -155,20 +364,51 @@ class ASMethod(ASType, Visible, MetaTagable, FromTokens):
                 for t in flatten_nested_tokens(token):
                     yield t
                 yield "}"
+            elif isinstance(token, tuple):
+                # 略读模式下的方法体只有位置信息
+                continue
             else:
                 for t in token.toTokens():
                     yield t
 
 
 class ASMetodBody(FromTokens):
-    def __init__(self, tokens):
+    """Method body, tokenized the first time its tokens are requested"""
+
+    __slots__ = ('_raw_tokens', 'source', 'start', 'end')
+
+    def __init__(self, source, start, end):
         super(ASMetodBody, self).__init__()
-        self.setTokens(tokens)
+        # 方法体为 source[start:end], 包括外层的 {}
+        self.source = source
+        self.start = start
+        self.end = end
+
+    @property
+    def raw_tokens(self):
+        if self._raw_tokens is None and self.source is not None:
+            import asGrammar
+            self.setTokens(
+                asGrammar.BODY_TOKENS.parseString(
+                    self.source[self.start:self.end]
+                )
+            )
+        return self._raw_tokens
+
+    @raw_tokens.setter
+    def raw_tokens(self, tokens):
+        self._raw_tokens = tokens
+
+    def toTokens(self):
+        for t in flatten_nested_tokens(self.raw_tokens):
+            yield t
 
 
 class ASVirtualMethod(ASMethod):
     """ActionScript Virtual Method Definition"""
 
+    __slots__ = ()
+
     def __init__(self, name='', return_type='void'):
         super(ASVirtualMethod, self).__init__(name, return_type)
         self.name = name
@@ -182,6 +422,12 @@ class ASVirtualMethod(ASMethod):
 class ASClass(ASType, Visible, MetaTagable, FromTokens):
     """ActionScript Class Definition"""
 
+    __slots__ = (
+        'visibility', 'metadata', 'full_name', 'variables', 'methods',
+        'getter_methods', 'setter_methods', 'extends', 'implements',
+        'imports', 'isDynamic', 'isFinal', 'isInterface', 'isPartial',
+    )
+
     def __init__(self, name):
         super(ASClass, self).__init__(name, 'class')
         self.full_name = self.name
@@ -190,16 +436,37 @@ class ASClass(ASType, Visible, MetaTagable, FromTokens):
         self.getter_methods = {}
         self.setter_methods = {}
         self.extends = ''
+        # 接口 extends 的接口也记录在这里
         self.implements = []
+        # 定义该类的文件中的导入, None 表示不知道, 使用包中所有文件的导入
+        self.imports = None
         self.isDynamic = False
         self.isFinal = False
         self.isInterface = False
+        # 大纲模式只提取了部分信息
+        self.isPartial = False
 
     def __repr__(self):
         return '<ASClass: {0}>'.format(self.name)
 
+    def childNodes(self):
+        return (
+            list(self.variables.values()) + list(self.methods.values())
+            + list(self.getter_methods.values())
+            + list(self.setter_methods.values()) + self.metadata
+        )
+
+    def retainTokens(self, policy):
+        if policy == 'signature' and self.raw_tokens is not None:
+            # 静态初始化块等嵌套的 tokens, toTokens 本来就不输出
+            self.raw_tokens = [
+                token for token in self.raw_tokens
+                if not isinstance(token, list)
+            ]
+        super(ASClass, self).retainTokens(policy)
+
     def toTokens(self):
-        for token in self.raw_tokens:
+        for token in self.retainedTokens():
             if isinstance(token, str):
                 yield token
             elif isinstance(token, list):
@@ -212,18 +479,39 @@ class ASClass(ASType, Visible, MetaTagable, FromTokens):
 class ASPackage(ASType, Visible, MetaTagable, FromTokens):
     """ActionScript Package Definition"""
 
+    __slots__ = (
+        'visibility', 'metadata', 'classes', 'interfaces', 'imports',
+        'use_namespace', 'isPartial',
+    )
+
     def __init__(self, name):
         super(ASPackage, self).__init__(name, 'package')
         self.classes = {}
         self.interfaces = {}
         self.imports = []
         self.use_namespace = []
+        # 大纲模式只提取了部分信息
+        self.isPartial = False
 
     def __repr__(self):
         return '<ASPackage: {0}>'.format(self.name)
 
+    def childNodes(self):
+        return (
+            self.imports + list(self.classes.values())
+            + list(self.interfaces.values())
+        )
+
+    def retainTokens(self, policy):
+        if policy == 'signature' and self.raw_tokens is not None:
+            self.raw_tokens = [
+                token for token in self.raw_tokens
+                if not isinstance(token, list)
+            ]
+        super(ASPackage, self).retainTokens(policy)
+
     def toTokens(self):
-        for token in self.raw_tokens:
+        for token in self.retainedTokens():
             if isinstance(token, str):
                 yield token
             elif isinstance(token, list):
@@ -0,0 +1,186 @@
+#!/usr/bin/env python
+# encoding=utf-8
+
+"""Outline of an ActionScript source file without parsing it
+
+outlinePackage finds the package, its imports, the classes and interfaces
+it defines with what they extend and implement, and the names of their
+members. One precompiled regular expression finds the keywords, braces,
+strings and comments, and a small expression per keyword reads the name
+that follows. The brace depth is tracked: package level is depth 1 and
+members live at depth 2. Any other block, such as a method body or an
+object initializer, is jumped over with skipBlock.
+
+The ASPackage and ASClass objects it returns have isPartial set. Their
+variables and methods only carry a name, and a getter or setter accessor
+where there is one.
+"""
+
+import re
+
+from pyparsing import ParseException
+from asGrammar import skipBlock
+from asModel import (
+    ASClass, ASPackage, ASImport,
+    ASVariable, ASMethod, ASVirtualMethod,
+    strings,
+)
+
+# 每个分支都以字面字符开头, search 可以直接跳到可能匹配的位置
+_OUTLINE = re.compile(r'''
+    "(?:[^"\\\n]|\\.)*"
+  | '(?:[^'\\\n]|\\.)*'
+  | //[^\n]*
+  | /\*
+  | \{
+  | \}
+  | c(?<![\w$.]c)(?:lass|onst)(?![\w$])
+  | f(?<![\w$.]f)unction(?![\w$])
+  | i(?<![\w$.]i)(?:mport|nterface)(?![\w$])
+  | p(?<![\w$.]p)ackage(?![\w$])
+  | v(?<![\w$.]v)ar(?![\w$])
+''', re.X)
+# 关键字之后的声明
+_PACKAGE = re.compile(r'\s+([\w$.]+)')
+_IMPORT = re.compile(r'\s+([\w$]+(?:\.[\w$]+)*(?:\.\*)?)')
+_TYPE = re.compile(r'\s+([\w$.]+)([^{};]*)')
+_FUNCTION = re.compile(r'\s+(?:(get|set)\s+(?=[\w$]+\s*\())?([\w$]+)')
+_VARIABLE = re.compile(r'\s+([\w$]+)')
+_EXTENDS = re.compile(r'(?<![\w$])extends\s+([\w$.<>]+)')
+_IMPLEMENTS = re.compile(
+    r'(?<![\w$])implements\s+([\w$.]+(?:\s*,\s*[\w$.]+)*)'
+)
+_INTERFACE_EXTENDS = re.compile(
+    r'(?<![\w$])extends\s+([\w$.]+(?:\s*,\s*[\w$.]+)*)'
+)
+_COMMA = re.compile(r'\s*,\s*')
+_BOM = '\xEF\xBB\xBF'
+
+_intern = strings.intern
+
+# 大括号深度: 包内为 1, 类/接口的成员为 2
+_PACKAGE_DEPTH = 1
+_MEMBER_DEPTH = 2
+
+
+def _outlineClass(kind, match):
+    cls = ASClass(_intern(match.group(1)))
+    cls.isPartial = True
+    header = match.group(2)
+    if kind == 'interface':
+        cls.isInterface = True
+        extends = _INTERFACE_EXTENDS.search(header)
+        if extends is not None:
+            cls.implements = strings.internAll(_COMMA.split(extends.group(1)))
+        return cls
+    extends = _EXTENDS.search(header)
+    if extends is not None:
+        cls.extends = _intern(extends.group(1))
+    implements = _IMPLEMENTS.search(header)
+    if implements is not None:
+        cls.implements = strings.internAll(_COMMA.split(implements.group(1)))
+    return cls
+
+
+def _addClass(pkg, cls):
+    if pkg.name:
+        cls.full_name = pkg.name + '.' + cls.name
+    if cls.isInterface:
+        pkg.interfaces[cls.name] = cls
+    else:
+        pkg.classes[cls.name] = cls
+
+
+def _addMethod(cls, accessor, name):
+    name = _intern(name)
+    if cls.isInterface:
+        cls.methods[name] = ASVirtualMethod(name)
+        return
+    method = ASMethod(name)
+    method.accessor = accessor
+    if accessor == 'get':
+        cls.getter_methods[name] = method
+    elif accessor == 'set':
+        cls.setter_methods[name] = method
+    else:
+        cls.methods[name] = method
+
+
+def outlinePackage(source):
+    """Return a partial ASPackage for `source`
+
+    Raises pyparsing.ParseException if there is no package block, like
+    the parsers do.
+    """
+    pkg = None
+    cls = None
+    pending = None
+    depth = 0
+    pos = len(_BOM) if source.startswith(_BOM) else 0
+    search = _OUTLINE.search
+    while True:
+        match = search(source, pos)
+        if match is None:
+            break
+        token = match.group()
+        pos = match.end()
+        if token == '/*':
+            end = source.find('*/', pos)
+            pos = len(source) if end == -1 else end + 2
+        elif token == '{':
+            if depth == 0 and pkg is not None:
+                depth = _PACKAGE_DEPTH
+            elif depth == _PACKAGE_DEPTH and pending is not None:
+                cls, pending = pending, None
+                _addClass(pkg, cls)
+                depth = _MEMBER_DEPTH
+            else:
+                # 方法体, 静态初始化块, 对象初始值等
+                try:
+                    pos = skipBlock(source, match.start())
+                except ValueError:
+                    break
+        elif token == '}':
+            depth -= 1
+            if depth < _MEMBER_DEPTH:
+                cls = None
+            if depth <= 0:
+                # 和语法一样, 忽略包之后的内容
+                break
+        elif token[0] in '"\'/':
+            # 字符串和单行注释
+            continue
+        elif depth == 0:
+            if pkg is None and token == 'package':
+                name = _PACKAGE.match(source, pos)
+                pkg = ASPackage(
+                    _intern(name.group(1)) if name is not None else ''
+                )
+                pkg.isPartial = True
+        elif depth == _PACKAGE_DEPTH:
+            if token == 'import':
+                name = _IMPORT.match(source, pos)
+                if name is not None:
+                    pkg.imports.append(ASImport(_intern(name.group(1))))
+            elif token in ('class', 'interface'):
+                header = _TYPE.match(source, pos)
+                if header is not None:
+                    pending = _outlineClass(token, header)
+                    pos = header.end()
+        elif depth == _MEMBER_DEPTH and cls is not None:
+            if token == 'function':
+                name = _FUNCTION.match(source, pos)
+                if name is not None:
+                    _addMethod(cls, name.group(1), name.group(2))
+            elif token in ('var', 'const'):
+                name = _VARIABLE.match(source, pos)
+                if name is not None:
+                    name = _intern(name.group(1))
+                    cls.variables[name] = ASVariable(name)
+    if pkg is None:
+        raise ParseException(source, 0, 'Expected "package"')
+    # 类/接口记录本文件的导入
+    imports = list(pkg.imports)
+    for cls in list(pkg.classes.values()) + list(pkg.interfaces.values()):
+        cls.imports = imports
+    return pkg
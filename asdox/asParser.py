@@ -0,0 +1,879 @@
+#!/usr/bin/env python
+# encoding=utf-8
+
+"""Hand-written recursive-descent parser for ActionScript declarations
+
+DeclarationParser builds the same asModel objects, raw_tokens included, as
+asGrammar.PROGRAM with the asAction parse actions, but scans the source
+with a few precompiled regular expressions instead of pyparsing elements.
+
+It reproduces the behaviour of the pyparsing grammar on purpose, including
+its quirks:
+
+  * whitespace is ' \\n\\t\\r' and is skipped before every token, and an
+    optional element that does not match still consumes it;
+  * alternatives joined with ^ take the longest match, the first one on
+    ties, and nothing backtracks into an element that already matched;
+  * modifiers joined with & are matched in rounds like pyparsing's Each;
+  * results names that are not consumed by a parse action leak upwards,
+    e.g. a variable initialization inside a class renames the class.
+
+Syntax errors are raised as pyparsing.ParseException so callers handle
+both backends the same way.
+"""
+
+import re
+
+import pyparsing
+from pyparsing import ParseException
+from asGrammar import skipBlock
+from asModel import (
+    ASClass, ASPackage, ASMetaTag,
+    ASVirtualMethod, ASMethod, ASMetodBody,
+    ASType, ASVariable,
+    ASImport,
+    strings,
+)
+from asSymbols import importedNames
+
+# 和 asAction 一样驻留标识符, 类型名和可见性
+_intern = strings.intern
+_internAll = strings.internAll
+
+_IDENT_CHARS = frozenset(pyparsing.alphanums + '_$')
+_WHITESPACE = re.compile(r'[ \n\t\r]*').match
+_IDENTIFIER = re.compile(r'[A-Za-z_$][A-Za-z0-9_]*').match
+_QUALIFIED_IDENTIFIER = re.compile(
+    r'[A-Za-z_$][A-Za-z0-9_]*(?:\.[A-Za-z_$][A-Za-z0-9_]*)*'
+).match
+_IMPORT_NAME = re.compile(
+    r'[A-Za-z_$][A-Za-z0-9_]*(?:\.[A-Za-z_$][A-Za-z0-9_]*)*(?:\.\*)?'
+).match
+_FLOAT = re.compile(r'[+-]?[0-9]+(?:\.[0-9]*)?(?:([eE])[+-]?[0-9]+)?').match
+_HEX_DIGITS = re.compile(r'[0-9a-fA-F]+').match
+# 与 asGrammar 中 QuotedString 生成的正则表达式相同
+_QUOTED_STRING = {
+    '"': re.compile(r'"(?:[^"\n\r\\]|(?:\\.))*"').match,
+    "'": re.compile(r"'(?:[^'\n\r\\]|(?:\\.))*'").match,
+}
+_INIT_STRING = re.compile(r'=(?:[^;])*;', re.M | re.S).match
+_ESCAPED_CHAR = re.compile(r'\\(.)')
+_WHITESPACE_ESCAPES = [('\\t', '\t'), ('\\n', '\n'), ('\\f', '\f'),
+                       ('\\r', '\r')]
+# nestedExpr 中保留引号的字符串, 正则之后还需要一个结束引号
+_NESTED_STRING = {
+    '"': re.compile(
+        r'"(?:[^"\n\r\\]|(?:"")|(?:\\(?:[^x]|x[0-9a-fA-F]+)))*'
+    ).match,
+    "'": re.compile(
+        r"'(?:[^'\n\r\\]|(?:'')|(?:\\(?:[^x]|x[0-9a-fA-F]+)))*"
+    ).match,
+}
+_NESTED_STOP = frozenset('{} \n\t\r')
+_BOM = '\xEF\xBB\xBF'
+
+
+def _unquote(text, escaped):
+    # 与 QuotedString 去掉引号后的处理相同
+    text = text[1:-1]
+    if '\\' in text:
+        for escape, char in _WHITESPACE_ESCAPES:
+            text = text.replace(escape, char)
+        if escaped:
+            text = _ESCAPED_CHAR.sub(r'\g<1>', text)
+    return text
+
+
+class DeclarationParser(object):
+    """Parse a tidied source file into an ASPackage
+
+    With skim=True method bodies and static initializer blocks are recorded
+    as (start, end) offsets like asGrammar.getGrammar(skim=True); otherwise
+    method bodies become ASMetodBody objects and tabs are expanded before
+    parsing, as pyparsing does.
+    """
+
+    def __init__(self, skim=False):
+        self.skim = skim
+
+    def parseProgram(self, source):
+        if not self.skim:
+            source = source.expandtabs()
+        return _Program(source, self.skim).parse()
+
+
+class _Program(object):
+    # 一次解析的状态; 每个方法从 pos 开始匹配, 返回结束位置和 tokens
+
+    def __init__(self, source, skim):
+        self.s = source
+        self.skim = skim
+
+    def fail(self, pos, expected):
+        raise ParseException(self.s, pos, 'Expected ' + expected)
+
+    def skip(self, pos):
+        return _WHITESPACE(self.s, pos).end()
+
+    def keyword(self, pos, word):
+        # 与 pyparsing.Keyword 相同, 前后都不能紧接标识符字符
+        s = self.s
+        pos = _WHITESPACE(s, pos).end()
+        end = pos + len(word)
+        if (s.startswith(word, pos)
+                and (end >= len(s) or s[end] not in _IDENT_CHARS)
+                and (pos == 0 or s[pos - 1] not in _IDENT_CHARS)):
+            return end
+        self.fail(pos, '"{0}"'.format(word))
+
+    def isKeyword(self, pos, words):
+        # 不消耗输入, 只判断 pos 处是否为 words 中的关键字
+        for word in words:
+            try:
+                self.keyword(pos, word)
+            except ParseException:
+                continue
+            return True
+        return False
+
+    def literal(self, pos, text):
+        pos = _WHITESPACE(self.s, pos).end()
+        if self.s.startswith(text, pos):
+            return pos + len(text)
+        self.fail(pos, '"{0}"'.format(text))
+
+    def match(self, pos, matcher, expected):
+        pos = _WHITESPACE(self.s, pos).end()
+        m = matcher(self.s, pos)
+        if m is None:
+            self.fail(pos, expected)
+        return m.end(), m.group()
+
+    def identifier(self, pos):
+        return self.match(pos, _IDENTIFIER, 'identifier')
+
+    def qualifiedIdentifier(self, pos):
+        return self.match(pos, _QUALIFIED_IDENTIFIER, 'qualified identifier')
+
+    def terminator(self, pos):
+        # Optional(SEMI): 不匹配时也跳过空白
+        pos = _WHITESPACE(self.s, pos).end()
+        if self.s.startswith(';', pos):
+            return pos + 1, [';']
+        return pos, []
+
+    def quotedString(self, pos):
+        pos = _WHITESPACE(self.s, pos).end()
+        quote = self.s[pos:pos + 1]
+        m = quote in _QUOTED_STRING and _QUOTED_STRING[quote](self.s, pos)
+        if not m:
+            self.fail(pos, 'quoted string')
+        return m.end(), _unquote(m.group(), True)
+
+    def each(self, pos, options):
+        """Match optional modifiers in any order like pyparsing's Each
+
+        Every round tries the remaining options in their given order, each
+        one at the position where the previous match ended. Returns the end
+        position, the tokens and a dict of the results names.
+        """
+        remaining = list(options)
+        tokens = []
+        names = {}
+        while True:
+            tried = remaining[:]
+            failed = 0
+            for option in tried:
+                try:
+                    pos, token, name = option(pos)
+                except ParseException:
+                    failed += 1
+                    continue
+                tokens.append(token)
+                names[name] = token
+                remaining.remove(option)
+            if failed == len(tried):
+                # 什么都没匹配时和 Optional 一样跳过空白
+                return pos if tokens else self.skip(pos), tokens, names
+
+    def keywordOption(self, word, name=None):
+        def option(pos):
+            return self.keyword(pos, word), word, name or word
+        return option
+
+    def identifierOption(self, exclude):
+        # Optional(~KEYWORDS[...] + IDENTIFIER('visibility'))
+        def option(pos):
+            if self.isKeyword(pos, exclude):
+                self.fail(pos, 'identifier')
+            end, name = self.identifier(pos)
+            return end, name, 'visibility'
+        return option
+
+    def longest(self, pos, alternatives):
+        """Return the result of the alternative that matches the most input
+
+        Like pyparsing's Or the first alternative wins on ties. Every
+        alternative returns a tuple starting with its end position.
+        """
+        best = None
+        error = None
+        for alternative in alternatives:
+            try:
+                result = alternative(pos)
+            except ParseException as exc:
+                if error is None or exc.loc > error.loc:
+                    error = exc
+                continue
+            if best is None or result[0] > best[0]:
+                best = result
+        if best is None:
+            raise error
+        return best
+
+    # 数值和类型
+
+    def value(self, pos):
+        s = self.s
+        pos = self.skip(pos)
+        if s.startswith('0x', pos):
+            digits = _HEX_DIGITS(s, self.skip(pos + 2))
+            if digits is not None:
+                return digits.end(), ['0x', digits.group()]
+        m = _FLOAT(s, pos)
+        if m is not None:
+            value = m.group()
+            if m.group(1) is not None:
+                # CaselessLiteral('E') 总是返回 'E'
+                e = m.start(1) - pos
+                value = value[:e] + 'E' + value[e + 1:]
+            return m.end(), [value]
+        m = _QUALIFIED_IDENTIFIER(s, pos)
+        if m is not None:
+            return m.end(), [m.group()]
+        end, text = self.quotedString(pos)
+        return end, [text]
+
+    def genericEnd(self, pos):
+        m = _IDENTIFIER(self.s, pos)
+        if m is None:
+            return -1
+        end = m.end()
+        while self.s.startswith('.<', end):
+            inner = self.genericEnd(end + 2)
+            if inner < 0 or not self.s.startswith('>', inner):
+                break
+            end = inner + 1
+        return end
+
+    def type_(self, pos):
+        pos = self.skip(self.literal(pos, ':'))
+        end = max(
+            self.genericEnd(pos),
+            pos + 1 if self.s.startswith('*', pos) else -1,
+        )
+        m = _QUALIFIED_IDENTIFIER(self.s, pos)
+        if m is not None and m.end() >= end:
+            end = m.end()
+        if end < 0:
+            self.fail(pos, 'type')
+        type_ = self.s[pos:end]
+        return end, [':', type_], type_
+
+    def optionalType(self, pos):
+        try:
+            return self.type_(pos)
+        except ParseException:
+            return self.skip(pos), [], ''
+
+    # 元数据标签
+
+    def metatag(self, pos):
+        pos = self.literal(pos, '[')
+        pos, name = self.identifier(pos)
+        tokens = ['[', name]
+        metatag = ASMetaTag(_intern(name))
+        try:
+            end, attributes = self.attributes(pos)
+        except ParseException:
+            pos = self.skip(pos)
+        else:
+            pos = end
+            tokens += ['(']
+            for index, (key, value, attribute) in enumerate(attributes):
+                metatag.params[_intern(key) if key else index] = value
+                tokens += attribute
+            tokens += [')']
+        pos = self.literal(pos, ']')
+        tokens.append(']')
+        metatag.raw_tokens = tokens
+        return pos, metatag
+
+    def attributes(self, pos):
+        # '(' + delimitedList(ATTRIBUTES) + ')', 逗号不出现在 tokens 中
+        pos, attribute = self.attribute(self.literal(pos, '('))
+        attributes = [attribute]
+        while True:
+            try:
+                end, attribute = self.attribute(self.literal(pos, ','))
+            except ParseException:
+                break
+            attributes.append(attribute)
+            pos = end
+        return self.literal(pos, ')'), attributes
+
+    def attribute(self, pos):
+        key = ''
+        tokens = []
+        try:
+            end, name = self.identifier(pos)
+            end = self.literal(end, '=')
+        except ParseException:
+            pass
+        else:
+            key = name
+            tokens = [name, '=']
+            pos = end
+        pos, value = self.value(pos)
+        return pos, (key, value[0], tokens + value)
+
+    def metatags(self, pos):
+        metatags = []
+        while True:
+            try:
+                pos, metatag = self.metatag(pos)
+            except ParseException:
+                return self.skip(pos), metatags
+            metatags.append(metatag)
+
+    # 变量
+
+    def init(self, pos):
+        # INIT ^ TERMINATOR
+        pos = self.skip(pos)
+        if not self.s.startswith('=', pos):
+            return self.terminator(pos)
+        return self.longest(pos, [self.initString, self.initValue])
+
+    def initString(self, pos):
+        m = _INIT_STRING(self.s, pos)
+        if m is None:
+            self.fail(pos, 'initializer')
+        return m.end(), [_unquote(m.group(), False)]
+
+    def initValue(self, pos):
+        # EQUAL + (DBL_QUOTED_STRING ^ ARRAY_INIT ^ OBJECT_INIT) + TERMINATOR
+        pos = self.skip(pos + 1)
+        char = self.s[pos:pos + 1]
+        if char == '[':
+            pos = self.literal(pos + 1, ']')
+            tokens = ['=', '[', ']']
+        elif char == '{':
+            pos, group = self.nested(pos)
+            tokens = ['=', group]
+        elif char == '"':
+            pos, text = self.quotedString(pos)
+            tokens = ['=', text]
+        else:
+            self.fail(pos, 'initial value')
+        pos, terminator = self.terminator(pos)
+        return pos, tokens + terminator
+
+    def variable(self, pos):
+        pos, metatags = self.metatags(pos)
+        pos, modifiers, names = self.each(pos, self.variableModifiers)
+        pos = self.skip(pos)
+        if self.isKeyword(pos, ('const',)):
+            kind = 'const'
+        else:
+            kind = 'var'
+        pos = self.keyword(pos, kind)
+        pos, name = self.identifier(pos)
+        pos, type_tokens, type_ = self.optionalType(pos)
+        pos, init = self.init(pos)
+
+        var = ASVariable(_intern(name), _intern(type_))
+        if names.get('visibility'):
+            var.visibility = _intern(names['visibility'])
+        if names.get('static') == 'static':
+            var.isStatic = True
+        if kind == 'const':
+            var.isConstant = True
+            var.readable = True
+            var.writable = False
+        else:
+            var.readable = True
+            var.writable = True
+        if metatags:
+            var.metadata = list(metatags)
+        var.raw_tokens = (
+            metatags + modifiers + [kind, name] + type_tokens + init
+        )
+        return pos, [var], 'variables', var
+
+    def variableInitialization(self, pos):
+        pos, name = self.identifier(pos)
+        pos, init = self.init(pos)
+        return pos, [name] + init, 'name', name
+
+    # 方法
+
+    def signature(self, pos):
+        pos = self.keyword(pos, 'function')
+        tokens = ['function']
+        accessor = ''
+        for word in ('get', 'set'):
+            try:
+                pos = self.keyword(pos, word)
+            except ParseException:
+                continue
+            accessor = word
+            tokens.append(word)
+            break
+        pos, name = self.identifier(pos)
+        pos = self.literal(pos, '(')
+        tokens += [name, '(']
+        arguments = []
+        try:
+            pos, arguments = self.parameters(pos)
+        except ParseException:
+            pos = self.skip(pos)
+        tokens += arguments
+        try:
+            pos, rest = self.rest(pos)
+        except ParseException:
+            pos = self.skip(pos)
+        else:
+            tokens += rest
+        pos = self.literal(pos, ')')
+        tokens.append(')')
+        pos, type_tokens, type_ = self.optionalType(pos)
+        tokens += type_tokens
+        return pos, tokens, name, accessor, arguments, type_
+
+    def parameters(self, pos):
+        # delimitedList(METHOD_PARAMETER), 逗号不出现在 tokens 中
+        pos, arg = self.parameter(pos)
+        arguments = [arg]
+        while True:
+            try:
+                end, arg = self.parameter(self.literal(pos, ','))
+            except ParseException:
+                return self.skip(pos), arguments
+            arguments.append(arg)
+            pos = end
+
+    def parameter(self, pos):
+        pos, name = self.identifier(pos)
+        pos, type_tokens, type_ = self.type_(pos)
+        tokens = [name] + type_tokens
+        try:
+            end, value = self.value(self.literal(pos, '='))
+        except ParseException:
+            pos = self.skip(pos)
+        else:
+            tokens += ['='] + value
+            pos = end
+        arg = ASType(_intern(name), _intern(type_))
+        arg.raw_tokens = tokens
+        return pos, arg
+
+    def rest(self, pos):
+        # Optional(COMMA) + REST + IDENTIFIER
+        tokens = []
+        try:
+            pos = self.literal(pos, ',')
+        except ParseException:
+            pos = self.skip(pos)
+        else:
+            tokens.append(',')
+        pos = self.literal(pos, '...')
+        pos, name = self.identifier(pos)
+        return pos, tokens + ['...', name]
+
+    def method(self, pos):
+        pos, metatags = self.metatags(pos)
+        pos, modifiers, names = self.each(pos, self.methodModifiers)
+        pos, signature, name, accessor, arguments, type_ = self.signature(pos)
+        pos = self.skip(pos)
+        if not self.s.startswith('{', pos):
+            self.fail(pos, 'method body')
+        try:
+            end = skipBlock(self.s, pos)
+        except ValueError:
+            self.fail(pos, 'method body')
+
+        if type_:
+            method = ASMethod(_intern(name), _intern(type_))
+        else:
+            method = ASMethod(_intern(name))
+        method.visibility = _intern(names.get('visibility') or 'internal')
+        if names.get('override'):
+            method.isOverride = True
+        if names.get('final'):
+            method.isFinal = True
+        if names.get('static'):
+            method.isStatic = True
+        if accessor:
+            method.accessor = _intern(accessor)
+        for arg in arguments:
+            method.arguments[arg.name] = arg
+        if self.skim:
+            body = method.body_span = (pos, end)
+        else:
+            body = method.body = ASMetodBody(self.s, pos, end)
+        if metatags:
+            method.metadata = list(metatags)
+        method.raw_tokens = metatags + modifiers + signature + [body]
+        return end, [method], 'methods', method
+
+    def virtualMethod(self, pos):
+        pos, signature, name, accessor, arguments, type_ = self.signature(pos)
+        pos, terminator = self.terminator(pos)
+        if type_:
+            method = ASVirtualMethod(_intern(name), _intern(type_))
+        else:
+            method = ASVirtualMethod(_intern(name))
+        for arg in arguments:
+            method.arguments[arg.name] = arg
+        method.raw_tokens = signature + terminator
+        return pos, [method], 'methods', method
+
+    # 类和接口的成员
+
+    def import_(self, pos):
+        pos = self.keyword(pos, 'import')
+        pos, name = self.match(pos, _IMPORT_NAME, 'import name')
+        pos, terminator = self.terminator(pos)
+        imp = ASImport(_intern(name))
+        imp.raw_tokens = ['import', name] + terminator
+        return pos, imp
+
+    def importMember(self, pos):
+        pos, imp = self.import_(pos)
+        return pos, [imp], None, None
+
+    def useNamespace(self, pos):
+        pos = self.keyword(self.keyword(pos, 'use'), 'namespace')
+        pos, name = self.qualifiedIdentifier(pos)
+        pos, terminator = self.terminator(pos)
+        return pos, ['use', 'namespace', name] + terminator, None, None
+
+    def include(self, pos):
+        pos = self.keyword(pos, 'include')
+        pos, filename = self.quotedString(pos)
+        pos, terminator = self.terminator(pos)
+        return pos, ['include', filename] + terminator, None, None
+
+    def block(self, pos):
+        pos = self.skip(pos)
+        if self.skim:
+            if not self.s.startswith('{', pos):
+                self.fail(pos, 'block')
+            try:
+                end = skipBlock(self.s, pos)
+            except ValueError:
+                self.fail(pos, 'block')
+            return end, [(pos, end)], None, None
+        pos, group = self.nested(pos)
+        return pos, [group], None, None
+
+    def nested(self, pos):
+        """Tokenize a {} block like nestedExpr('{', '}')"""
+        s = self.s
+        pos = self.skip(pos)
+        if not s.startswith('{', pos):
+            self.fail(pos, 'nested {} expression')
+        length = len(s)
+        groups = [[]]
+        pos += 1
+        while True:
+            pos = _WHITESPACE(s, pos).end()
+            if pos >= length:
+                self.fail(pos, '"}"')
+            char = s[pos]
+            if char == '}':
+                group = groups.pop()
+                pos += 1
+                if not groups:
+                    return pos, group
+                groups[-1].append(group)
+            elif char == '{':
+                groups.append([])
+                pos += 1
+            else:
+                end = self.nestedString(pos)
+                if end is None:
+                    # 直到空白, 括号或字符串为止
+                    end = pos + 1
+                    while (end < length and s[end] not in _NESTED_STOP
+                           and self.nestedString(end) is None):
+                        end += 1
+                    groups[-1].append(s[pos:end].strip())
+                else:
+                    groups[-1].append(s[pos:end])
+                pos = end
+
+    def nestedString(self, pos):
+        matcher = _NESTED_STRING.get(self.s[pos])
+        if matcher is None:
+            return None
+        end = matcher(self.s, pos).end()
+        if self.s.startswith(self.s[pos], end):
+            return end + 1
+        return None
+
+    def member(self, pos, virtual=False):
+        """Match one member of a class or interface block
+
+        Only the alternatives that can start with the character at `pos`
+        are tried, in the order they have in the grammar.
+        """
+        pos = self.skip(pos)
+        char = self.s[pos:pos + 1]
+        if char == '{':
+            return self.block(pos)
+        if char == '[':
+            alternatives = [self.variable]
+        else:
+            alternatives = []
+            if self.isKeyword(pos, ('import',)):
+                alternatives.append(self.importMember)
+            elif self.isKeyword(pos, ('use',)):
+                alternatives.append(self.useNamespace)
+            elif self.isKeyword(pos, ('include',)):
+                alternatives.append(self.include)
+            alternatives += [self.variableInitialization, self.variable]
+        if virtual:
+            alternatives.append(self.virtualMethod)
+        else:
+            alternatives.append(self.method)
+        return self.longest(pos, alternatives)
+
+    def members(self, pos, virtual=False):
+        """Match '{' members '}' and return the tokens and results names"""
+        pos = self.literal(pos, '{')
+        tokens = ['{']
+        names = {'name': None, 'variables': [], 'methods': []}
+        while True:
+            try:
+                pos, member_tokens, name, value = self.member(pos, virtual)
+            except ParseException:
+                break
+            tokens += member_tokens
+            if name == 'name':
+                names['name'] = value
+            elif name is not None:
+                names[name].append(value)
+        pos = self.literal(pos, '}')
+        tokens.append('}')
+        return pos, tokens, names
+
+    # 类, 接口和包
+
+    def class_(self, pos):
+        pos, metatags = self.metatags(pos)
+        pos, modifiers, modifier_names = self.each(pos, self.classModifiers)
+        pos = self.keyword(pos, 'class')
+        pos, name = self.qualifiedIdentifier(pos)
+        tokens = metatags + modifiers + ['class', name]
+        extends = ''
+        try:
+            end, extends = self.qualifiedIdentifier(
+                self.keyword(pos, 'extends')
+            )
+        except ParseException:
+            pos = self.skip(pos)
+        else:
+            tokens += ['extends', extends]
+            pos = end
+        implements = []
+        try:
+            end, implements = self.identifierList(
+                self.keyword(pos, 'implements')
+            )
+        except ParseException:
+            pos = self.skip(pos)
+        else:
+            tokens += ['implements'] + implements
+            pos = end
+        pos, block, names = self.members(pos)
+
+        # 成员中的变量初始化会覆盖类名
+        cls = ASClass(_intern(names['name'] or name))
+        cls.extends = _intern(extends)
+        if implements:
+            cls.implements = _internAll(implements)
+        cls.visibility = _intern(
+            modifier_names.get('visibility') or 'internal'
+        )
+        if modifier_names.get('dynamic') == 'dynamic':
+            cls.isDynamic = True
+        if modifier_names.get('final') == 'final':
+            cls.isFinal = True
+        if metatags:
+            cls.metadata = list(metatags)
+        for variable in names['variables']:
+            cls.variables[variable.name] = variable
+        for method in names['methods']:
+            if not method.accessor:
+                cls.methods[method.name] = method
+            elif method.accessor == 'get':
+                cls.getter_methods[method.name] = method
+            elif method.accessor == 'set':
+                cls.setter_methods[method.name] = method
+        cls.raw_tokens = tokens + block
+        return pos, cls, 'class_', None
+
+    def identifierList(self, pos):
+        # delimitedList(QUALIFIED_IDENTIFIER)
+        pos, name = self.qualifiedIdentifier(pos)
+        names = [name]
+        while True:
+            try:
+                end, name = self.qualifiedIdentifier(self.literal(pos, ','))
+            except ParseException:
+                return self.skip(pos), names
+            names.append(name)
+            pos = end
+
+    def interface(self, pos):
+        tokens = []
+        pos = self.skip(pos)
+        for word in ('internal', 'public'):
+            if self.isKeyword(pos, (word,)):
+                pos = self.keyword(pos, word)
+                tokens.append(word)
+                break
+        pos = self.keyword(pos, 'interface')
+        pos, name = self.qualifiedIdentifier(pos)
+        tokens += ['interface', name]
+        extends = []
+        try:
+            end, extends = self.identifierList(self.keyword(pos, 'extends'))
+        except ParseException:
+            pos = self.skip(pos)
+        else:
+            tokens += ['extends'] + extends
+            pos = end
+        pos, block, names = self.members(pos, virtual=True)
+
+        interface = ASClass(_intern(names['name'] or name))
+        interface.isInterface = True
+        if extends:
+            interface.implements = _internAll(extends)
+        for method in names['methods']:
+            interface.methods[method.name] = method
+        interface.raw_tokens = tokens + block
+        return pos, interface, 'interface', None
+
+    def namespace(self, pos):
+        tokens = []
+        pos = self.skip(pos)
+        if self.isKeyword(pos, ('public',)):
+            pos = self.keyword(pos, 'public')
+            tokens.append('public')
+        pos = self.keyword(pos, 'namespace')
+        pos, name = self.identifier(pos)
+        pos, terminator = self.terminator(pos)
+        return pos, tokens + ['namespace', name] + terminator, 'name', name
+
+    def parse(self):
+        pos = self.skip(0)
+        if self.s.startswith(_BOM, pos):
+            pos += len(_BOM)
+        pos = self.keyword(pos, 'package')
+        tokens = ['package']
+        name = ''
+        try:
+            pos, name = self.qualifiedIdentifier(pos)
+        except ParseException:
+            pos = self.skip(pos)
+        else:
+            tokens.append(name)
+        pos = self.literal(pos, '{')
+        tokens.append('{')
+        imports = []
+        while True:
+            try:
+                pos, imp = self.import_(pos)
+            except ParseException:
+                pos = self.skip(pos)
+                break
+            imports.append(imp)
+        use_namespace = []
+        while True:
+            try:
+                pos, use, _, _ = self.useNamespace(pos)
+            except ParseException:
+                pos = self.skip(pos)
+                break
+            use_namespace += use
+        pos, definition, kind, value = self.longest(
+            pos, [self.class_, self.interface, self.namespace]
+        )
+        pos = self.literal(pos, '}')
+
+        if kind == 'name':
+            # NAMESPACE_DEFINITION 的名称会覆盖包名
+            name = value
+            definition_tokens = definition
+        else:
+            definition_tokens = [definition]
+        pkg = ASPackage(_intern(name))
+        pkg.imports += imports
+        pkg.use_namespace += _internAll(use_namespace)
+        if kind == 'class_':
+            cls = definition
+            if pkg.name:
+                cls.full_name = pkg.name + '.' + cls.name
+            # 类/接口记录本文件的导入, 与 pkg.imports 不共用列表
+            cls.imports = list(imports)
+            pkg.classes[cls.name] = cls
+            # 把成员变量类名替换为全名
+            imported = importedNames(imports)
+            for var in cls.variables.values():
+                imp = imported.get(var.type_)
+                if imp is not None:
+                    var.type_ = imp
+        elif kind == 'interface':
+            interface = definition
+            if pkg.name:
+                interface.full_name = pkg.name + '.' + interface.name
+            interface.imports = list(imports)
+            pkg.interfaces[interface.name] = interface
+        pkg.raw_tokens = (
+            tokens + imports + use_namespace + definition_tokens + ['}']
+        )
+        return pkg
+
+    @property
+    def variableModifiers(self):
+        return [
+            self.keywordOption('static'),
+            self.identifierOption(('var', 'const')),
+        ]
+
+    @property
+    def methodModifiers(self):
+        return [
+            self.keywordOption('static'),
+            self.keywordOption('override'),
+            self.keywordOption('final'),
+            self.identifierOption(('function',)),
+        ]
+
+    @property
+    def classModifiers(self):
+        def visibility(pos):
+            for word in ('internal', 'public'):
+                try:
+                    return self.keyword(pos, word), word, 'visibility'
+                except ParseException:
+                    continue
+            self.fail(self.skip(pos), 'class visibility')
+        return [
+            self.keywordOption('final'),
+            self.keywordOption('dynamic'),
+            visibility,
+        ]
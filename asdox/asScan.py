@@ -0,0 +1,249 @@
+#!/usr/bin/env python
+# encoding=utf-8
+
+# Copyright (c) 2008, Michael Ramirez
+#
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification are permitted provided that the following conditions are met:
+#   * Redistributions of source code must retain the above copyright notice,
+#     this list of conditions and the following disclaimer.
+#   * Redistributions in binary form must reproduce the above copyright notice,
+#     this list of conditions and the following disclaimer in the documentation
+#     and/or other #materials provided with the distribution.
+#   * Neither the name of the <ORGANIZATION> nor the names of its contributors
+#     may be used to endorse or promote products derived from this software
+#     without specific #prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+# "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+# LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR
+# A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT OWNER OR
+# CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL,
+# EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO,
+# PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR
+# PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF
+# LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING
+# NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS
+# SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+"""Find source files under a directory
+
+Scanner walks a tree once with scandir, so the type of most entries is
+known without a stat call. Files are selected with include globs and
+left out with gitignore style exclude patterns:
+
+    *.as          a name, at any depth
+    bin-debug/    a directory name, at any depth
+    /src/gen      a path relative to the root
+    **/test/*.as  ** matches any number of directories
+    !Keep.as      includes again what an earlier pattern excluded
+
+The last pattern that matches decides. An excluded directory is not
+entered at all, so nothing under it can be included again, as in git.
+
+Symbolic links are followed. Every directory and file is visited once,
+however many links lead to it, which also stops link cycles. Each file
+is returned as a ScanEntry that carries its stat result.
+
+os.scandir is used where there is one, then the scandir package, then
+os.listdir with one lstat per entry.
+"""
+
+import os
+import re
+from operator import attrgetter
+from stat import S_ISDIR, S_ISLNK, S_ISREG
+
+try:
+    from os import scandir as _scandir
+except ImportError:
+    try:
+        from scandir import scandir as _scandir
+    except ImportError:
+        _scandir = None
+
+
+class _DirEntry(object):
+    # 没有 scandir 时代替 os.DirEntry
+
+    __slots__ = ('name', 'path', '_lstat', '_stat')
+
+    def __init__(self, directory, name):
+        self.name = name
+        self.path = os.path.join(directory, name)
+        self._lstat = None
+        self._stat = None
+
+    def stat(self, follow_symlinks=True):
+        if self._lstat is None:
+            self._lstat = os.lstat(self.path)
+        if not follow_symlinks or not S_ISLNK(self._lstat.st_mode):
+            return self._lstat
+        if self._stat is None:
+            self._stat = os.stat(self.path)
+        return self._stat
+
+    def is_symlink(self):
+        return S_ISLNK(self.stat(follow_symlinks=False).st_mode)
+
+    def is_dir(self, follow_symlinks=True):
+        try:
+            return S_ISDIR(self.stat(follow_symlinks).st_mode)
+        except OSError:
+            # 失效的符号链接
+            return False
+
+
+def _listdir(path):
+    return [_DirEntry(path, name) for name in os.listdir(path)]
+
+
+if _scandir is None:
+    _scandir = _listdir
+
+
+def _translate(pattern):
+    # gitignore 风格的模式转换为正则表达式, * 和 ? 不匹配 /
+    i, n = 0, len(pattern)
+    regex = []
+    while i < n:
+        c = pattern[i]
+        if pattern.startswith('**/', i):
+            regex.append('(?:.*/)?')
+            i += 3
+            continue
+        if pattern.startswith('**', i):
+            regex.append('.*')
+            i += 2
+            continue
+        if c == '*':
+            regex.append('[^/]*')
+        elif c == '?':
+            regex.append('[^/]')
+        elif c == '[':
+            end = pattern.find(']', i + 2)
+            if end == -1:
+                regex.append('\\[')
+            else:
+                chars = pattern[i + 1:end].replace('\\', '\\\\')
+                if chars[0] == '!':
+                    chars = '^' + chars[1:]
+                regex.append('[' + chars + ']')
+                i = end
+        else:
+            regex.append(re.escape(c))
+        i += 1
+    return ''.join(regex) + '$'
+
+
+class _Rule(object):
+    # 一个 include 或 exclude 模式
+
+    def __init__(self, pattern):
+        self.negate = pattern.startswith('!')
+        if self.negate:
+            pattern = pattern[1:]
+        self.directory = pattern.endswith('/')
+        pattern = pattern.rstrip('/')
+        # 含有 / 的模式相对于根目录, 否则匹配任意深度的名称
+        self.anchored = '/' in pattern
+        self.regex = re.compile(_translate(pattern.lstrip('/')))
+
+    def matches(self, relpath, name, isdir):
+        if self.directory and not isdir:
+            return False
+        return self.regex.match(relpath if self.anchored else name) is not None
+
+
+class ScanEntry(object):
+    """A file found by Scanner
+
+    `path` is absolute, `relpath` is relative to the scanned root with /
+    as separator, and `stat` is the os.stat result of the file.
+    """
+
+    __slots__ = ('path', 'relpath', 'stat')
+
+    def __init__(self, path, relpath, stat):
+        self.path = path
+        self.relpath = relpath
+        self.stat = stat
+
+    def __repr__(self):
+        return '<ScanEntry: {0}>'.format(self.relpath)
+
+
+class Scanner(object):
+    """Select files by include globs and gitignore style exclude patterns
+
+    `include` and `exclude` are a pattern or a list of patterns.
+    """
+
+    def __init__(self, include='*.as', exclude=()):
+        if isinstance(include, basestring):
+            include = [include]
+        if isinstance(exclude, basestring):
+            exclude = [exclude]
+        self.include = [_Rule(pattern) for pattern in include]
+        self.exclude = [_Rule(pattern) for pattern in exclude]
+
+    def _excluded(self, relpath, name, isdir):
+        excluded = False
+        for rule in self.exclude:
+            if rule.matches(relpath, name, isdir):
+                excluded = not rule.negate
+        return excluded
+
+    def includes(self, relpath):
+        """Tell if `relpath` matches an include glob, ignoring the excludes"""
+        name = relpath.rpartition('/')[2]
+        for rule in self.include:
+            if rule.matches(relpath, name, False):
+                return True
+        return False
+
+    def scan(self, root):
+        """Yield a ScanEntry for each selected file under `root`
+
+        Directories are walked depth first, in name order.
+        """
+        root = os.path.abspath(root)
+        st = os.stat(root)
+        seen_dirs = set([(st.st_dev, st.st_ino)])
+        seen_files = set()
+        stack = [(root, '')]
+        while stack:
+            path, prefix = stack.pop()
+            try:
+                entries = sorted(_scandir(path), key=attrgetter('name'))
+            except OSError:
+                # 和 os.walk 一样忽略无法读取的目录
+                continue
+            dirs = []
+            for entry in entries:
+                name = entry.name
+                relpath = prefix + name
+                if entry.is_dir():
+                    if self._excluded(relpath, name, True):
+                        continue
+                    st = entry.stat()
+                    key = (st.st_dev, st.st_ino)
+                    if key not in seen_dirs:
+                        seen_dirs.add(key)
+                        dirs.append((entry.path, relpath + '/'))
+                    continue
+                if (not self.includes(relpath)
+                        or self._excluded(relpath, name, False)):
+                    continue
+                try:
+                    st = entry.stat()
+                except OSError:
+                    continue
+                key = (st.st_dev, st.st_ino)
+                if not S_ISREG(st.st_mode) or key in seen_files:
+                    continue
+                seen_files.add(key)
+                yield ScanEntry(entry.path, relpath, st)
+            stack.extend(reversed(dirs))
@@ -0,0 +1,474 @@
+#!/usr/bin/env python
+# encoding=utf-8
+
+# Copyright (c) 2008, Michael Ramirez
+#
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification are permitted provided that the following conditions are met:
+#   * Redistributions of source code must retain the above copyright notice,
+#     this list of conditions and the following disclaimer.
+#   * Redistributions in binary form must reproduce the above copyright notice,
+#     this list of conditions and the following disclaimer in the documentation
+#     and/or other #materials provided with the distribution.
+#   * Neither the name of the <ORGANIZATION> nor the names of its contributors
+#     may be used to endorse or promote products derived from this software
+#     without specific #prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+# "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+# LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR
+# A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT OWNER OR
+# CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL,
+# EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO,
+# PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR
+# PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF
+# LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING
+# NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS
+# SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+"""Versioned binary snapshots of parsed packages
+
+A record is one model tree converted to plain tuples and written with
+marshal, so it cannot hold pyparsing or any other objects. It has two
+string tables, one for identifiers and type names, which are interned
+when the record is loaded, and one for token text. Method body sources
+are kept apart, and every node is an entry of a flat node table.
+
+A reference in a node is an int. n >= 0 is entry n of a string table,
+where entry 0 is None, and n < 0 is node ~n. Nodes that are reached
+twice, such as an ASImport that is also a variable's type, are stored
+once and stay shared after loading.
+
+A snapshot file is a header, one record per package and a directory of
+the packages and of the Builder manifest:
+
+    magic 'ASDS', format version (uint16), 2 pad bytes,
+    directory offset (uint64), little endian
+    package records
+    directory: marshal of (packages, manifest)
+
+Snapshot reads the header and directory only and decodes a package the
+first time it is requested. Attributes added with asModel.extend are not
+saved.
+"""
+
+import marshal
+import struct
+
+from asModel import (
+    ASClass, ASPackage, ASMetaTag,
+    ASVirtualMethod, ASMethod, ASMetodBody,
+    ASType, ASVariable,
+    ASImport,
+    strings,
+)
+
+MAGIC = 'ASDS'
+# 记录的格式变化时递增, 旧的快照不能再读取
+FORMAT_VERSION = 2
+# marshal 的格式版本, Python 2.5 起为 2
+MARSHAL_VERSION = 2
+
+_HEADER = struct.Struct('<4sHxxQ')
+
+# 节点种类, 是节点元组的第一项
+_IMPORT, _METATAG, _TYPE, _VARIABLE, _METHOD, _VIRTUAL_METHOD, _BODY, \
+    _CLASS, _PACKAGE = range(9)
+
+
+class _StringTable(object):
+    # 记录中的字符串表, 第 0 项是 None
+
+    def __init__(self):
+        self.values = [None]
+        self.index = {}
+
+    def ref(self, value):
+        index = self.index.get(value)
+        if index is None:
+            index = self.index[value] = len(self.values)
+            self.values.append(value)
+        return index
+
+
+class _Encoder(object):
+    """Convert one model tree into the tuples of a record"""
+
+    def __init__(self):
+        self.names = _StringTable()
+        self.texts = _StringTable()
+        self.sources = []
+        self.source_index = {}
+        self.nodes = []
+        self.node_index = {}
+
+    def record(self, root):
+        ref = self.node(root)
+        return (self.names.values, self.texts.values, self.sources,
+                self.nodes, ref)
+
+    def node(self, node):
+        index = self.node_index.get(id(node))
+        if index is None:
+            encode = self._ENCODERS.get(type(node))
+            if encode is None:
+                raise TypeError(
+                    'cannot serialize {0!r}'.format(type(node).__name__)
+                )
+            # 先占位, 节点之间的循环引用也能得到编号
+            index = self.node_index[id(node)] = len(self.nodes)
+            self.nodes.append(None)
+            self.nodes[index] = encode(self, node)
+        return ~index
+
+    def name(self, value):
+        if value is None:
+            return 0
+        if isinstance(value, basestring):
+            return self.names.ref(value)
+        return self.node(value)
+
+    def text(self, value):
+        if value is None:
+            return 0
+        if isinstance(value, basestring):
+            return self.texts.ref(value)
+        return self.node(value)
+
+    def nodeList(self, nodes):
+        return [self.node(node) for node in nodes]
+
+    def items(self, mapping):
+        return [(self.name(key), self.node(value))
+                for key, value in mapping.items()]
+
+    def tokens(self, tokens):
+        if tokens is None:
+            return None
+        encoded = []
+        for token in tokens:
+            if isinstance(token, list):
+                encoded.append(self.tokens(token))
+            elif isinstance(token, tuple):
+                # 略读模式下代码块的位置
+                encoded.append(tuple(int(offset) for offset in token))
+            else:
+                encoded.append(self.text(token))
+        return encoded
+
+    def source(self, source):
+        if source is None:
+            return None
+        index = self.source_index.get(id(source))
+        if index is None:
+            index = self.source_index[id(source)] = len(self.sources)
+            self.sources.append(source)
+        return index
+
+    def importNode(self, node):
+        return (_IMPORT, self.name(node.name), self.tokens(node.raw_tokens))
+
+    def metatag(self, node):
+        positional = []
+        named = []
+        for key, value in node.params.items():
+            if isinstance(key, int):
+                positional.append((key, self.text(value)))
+            else:
+                named.append((self.name(key), self.text(value)))
+        return (_METATAG, self.name(node.name), positional, named,
+                self.tokens(node.raw_tokens))
+
+    def type_(self, node):
+        return (_TYPE, self.name(node.name), self.name(node.type_),
+                self.tokens(node.raw_tokens))
+
+    def variable(self, node):
+        return (_VARIABLE, self.name(node.name), self.name(node.type_),
+                self.name(node.visibility), self.nodeList(node.metadata),
+                node.isStatic, node.isConstant, node.readable, node.writable,
+                node.isProperty, self.tokens(node.raw_tokens))
+
+    def method(self, node):
+        kind = _VIRTUAL_METHOD if isinstance(node, ASVirtualMethod) \
+            else _METHOD
+        body = None if node.body is None else self.node(node.body)
+        return (kind, self.name(node.name), self.name(node.type_),
+                self.name(node.visibility), self.nodeList(node.metadata),
+                node.isOverride, node.isFinal, node.isStatic,
+                self.name(node.accessor), self.name(node.return_type),
+                self.items(node.arguments), body, node.body_span,
+                self.tokens(node.raw_tokens))
+
+    def body(self, node):
+        return (_BODY, self.source(node.source), node.start, node.end,
+                self.tokens(node._raw_tokens))
+
+    def class_(self, node):
+        return (_CLASS, self.name(node.name), self.name(node.type_),
+                self.name(node.full_name), self.name(node.visibility),
+                self.nodeList(node.metadata), self.items(node.variables),
+                self.items(node.methods), self.items(node.getter_methods),
+                self.items(node.setter_methods), self.name(node.extends),
+                [self.name(name) for name in node.implements],
+                None if node.imports is None else self.nodeList(node.imports),
+                node.isDynamic, node.isFinal, node.isInterface,
+                node.isPartial, self.tokens(node.raw_tokens))
+
+    def package(self, node):
+        return (_PACKAGE, self.name(node.name), self.name(node.type_),
+                self.name(node.visibility), self.nodeList(node.metadata),
+                self.nodeList(node.imports),
+                [self.name(name) for name in node.use_namespace],
+                self.items(node.classes), self.items(node.interfaces),
+                node.isPartial, self.tokens(node.raw_tokens))
+
+    _ENCODERS = {
+        ASImport: importNode,
+        ASMetaTag: metatag,
+        ASType: type_,
+        ASVariable: variable,
+        ASMethod: method,
+        ASVirtualMethod: method,
+        ASMetodBody: body,
+        ASClass: class_,
+        ASPackage: package,
+    }
+
+
+class _Decoder(object):
+    """Rebuild the model tree of a record"""
+
+    def __init__(self, record):
+        names, texts, self.sources, self.nodes, self.root = record
+        # 先创建所有节点, 再填充属性, 这样引用可以指向任意节点.
+        # 节点的所有属性都由 _FILL 设置, 不需要调用 __init__
+        self.objects = [
+            self._CLASSES[node[0]].__new__(self._CLASSES[node[0]])
+            for node in self.nodes
+        ]
+        # 负数下标 ~n 正好是倒序的节点表中的第 n 项
+        nodes = self.objects[::-1]
+        intern = strings.intern
+        self.names = [None] + [intern(name) for name in names[1:]] + nodes
+        self.texts = list(texts) + nodes
+
+    def decode(self):
+        for obj, node in zip(self.objects, self.nodes):
+            obj._extensions = None
+            self._FILL[node[0]](self, obj, node)
+        return self.names[self.root]
+
+    def items(self, items):
+        names = self.names
+        return dict((names[key], names[value]) for key, value in items)
+
+    def tokens(self, tokens):
+        if tokens is None:
+            return None
+        texts = self.texts
+        tokens_ = self.tokens
+        return [
+            texts[token] if token.__class__ is int
+            else tokens_(token) if token.__class__ is list
+            else token
+            for token in tokens
+        ]
+
+    def importNode(self, obj, node):
+        _, name, tokens = node
+        obj.name = self.names[name]
+        obj.raw_tokens = self.tokens(tokens)
+
+    def metatag(self, obj, node):
+        _, name, positional, named, tokens = node
+        names, texts = self.names, self.texts
+        obj.name = names[name]
+        obj.params = params = {}
+        for key, value in positional:
+            params[key] = texts[value]
+        for key, value in named:
+            params[names[key]] = texts[value]
+        obj.raw_tokens = self.tokens(tokens)
+
+    def type_(self, obj, node):
+        _, name, type_, tokens = node
+        names = self.names
+        obj.name = names[name]
+        obj.type_ = names[type_]
+        obj.raw_tokens = self.tokens(tokens)
+
+    def variable(self, obj, node):
+        (_, name, type_, visibility, metadata, obj.isStatic, obj.isConstant,
+         obj.readable, obj.writable, obj.isProperty, tokens) = node
+        names = self.names
+        obj.name = names[name]
+        obj.type_ = names[type_]
+        obj.visibility = names[visibility]
+        obj.metadata = [names[ref] for ref in metadata]
+        obj.raw_tokens = self.tokens(tokens)
+
+    def method(self, obj, node):
+        (_, name, type_, visibility, metadata, obj.isOverride, obj.isFinal,
+         obj.isStatic, accessor, return_type, arguments, body, obj.body_span,
+         tokens) = node
+        names = self.names
+        obj.name = names[name]
+        obj.type_ = names[type_]
+        obj.visibility = names[visibility]
+        obj.metadata = [names[ref] for ref in metadata]
+        obj.accessor = names[accessor]
+        obj.return_type = names[return_type]
+        obj.arguments = self.items(arguments)
+        obj.body = None if body is None else names[body]
+        obj.raw_tokens = self.tokens(tokens)
+
+    def body(self, obj, node):
+        _, source, obj.start, obj.end, tokens = node
+        obj.source = None if source is None else self.sources[source]
+        obj.raw_tokens = self.tokens(tokens)
+
+    def class_(self, obj, node):
+        (_, name, type_, full_name, visibility, metadata, variables, methods,
+         getter_methods, setter_methods, extends, implements, imports,
+         obj.isDynamic, obj.isFinal, obj.isInterface, obj.isPartial,
+         tokens) = node
+        names = self.names
+        obj.name = names[name]
+        obj.type_ = names[type_]
+        obj.full_name = names[full_name]
+        obj.visibility = names[visibility]
+        obj.metadata = [names[ref] for ref in metadata]
+        obj.variables = self.items(variables)
+        obj.methods = self.items(methods)
+        obj.getter_methods = self.items(getter_methods)
+        obj.setter_methods = self.items(setter_methods)
+        obj.extends = names[extends]
+        obj.implements = [names[ref] for ref in implements]
+        obj.imports = None if imports is None \
+            else [names[ref] for ref in imports]
+        obj.raw_tokens = self.tokens(tokens)
+
+    def package(self, obj, node):
+        (_, name, type_, visibility, metadata, imports, use_namespace,
+         classes, interfaces, obj.isPartial, tokens) = node
+        names = self.names
+        obj.name = names[name]
+        obj.type_ = names[type_]
+        obj.visibility = names[visibility]
+        obj.metadata = [names[ref] for ref in metadata]
+        obj.imports = [names[ref] for ref in imports]
+        obj.use_namespace = [names[ref] for ref in use_namespace]
+        obj.classes = self.items(classes)
+        obj.interfaces = self.items(interfaces)
+        obj.raw_tokens = self.tokens(tokens)
+
+    _CLASSES = {
+        _IMPORT: ASImport,
+        _METATAG: ASMetaTag,
+        _TYPE: ASType,
+        _VARIABLE: ASVariable,
+        _METHOD: ASMethod,
+        _VIRTUAL_METHOD: ASVirtualMethod,
+        _BODY: ASMetodBody,
+        _CLASS: ASClass,
+        _PACKAGE: ASPackage,
+    }
+
+    _FILL = {
+        _IMPORT: importNode,
+        _METATAG: metatag,
+        _TYPE: type_,
+        _VARIABLE: variable,
+        _METHOD: method,
+        _VIRTUAL_METHOD: method,
+        _BODY: body,
+        _CLASS: class_,
+        _PACKAGE: package,
+    }
+
+
+def dumpRecord(node):
+    """Serialize the model tree under `node` to a string"""
+    return marshal.dumps(_Encoder().record(node), MARSHAL_VERSION)
+
+
+def loadRecord(data):
+    """Rebuild a model tree serialized with dumpRecord"""
+    return _Decoder(marshal.loads(data)).decode()
+
+
+def save(path, packages, manifest=()):
+    """Write `packages`, a dict of ASPackage, to a snapshot file
+
+    `manifest` is a list of tuples describing the ingested files, as
+    Builder.save passes it; it is stored as it is.
+    """
+    directory = []
+    with open(path, 'wb') as f:
+        f.write(_HEADER.pack(MAGIC, FORMAT_VERSION, 0))
+        for name in sorted(packages):
+            data = dumpRecord(packages[name])
+            directory.append((name, f.tell(), len(data)))
+            f.write(data)
+        offset = f.tell()
+        marshal.dump((directory, list(manifest)), f, MARSHAL_VERSION)
+        f.seek(0)
+        f.write(_HEADER.pack(MAGIC, FORMAT_VERSION, offset))
+
+
+class Snapshot(object):
+    """A snapshot file whose packages are decoded when first requested
+
+    Raises ValueError if the file is not a snapshot of this format
+    version.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, 'rb') as f:
+            header = f.read(_HEADER.size)
+            if len(header) < _HEADER.size:
+                raise ValueError('not an asdox snapshot: {0}'.format(path))
+            magic, version, offset = _HEADER.unpack(header)
+            if magic != MAGIC:
+                raise ValueError('not an asdox snapshot: {0}'.format(path))
+            if version != FORMAT_VERSION:
+                raise ValueError(
+                    'snapshot format {0} is not supported, expected {1}: '
+                    '{2}'.format(version, FORMAT_VERSION, path)
+                )
+            f.seek(offset)
+            directory, self.manifest = marshal.load(f)
+        # 包名 -> (偏移量, 长度)
+        self._directory = dict(
+            (name, (start, size)) for name, start, size in directory
+        )
+        self._packages = {}
+
+    def names(self):
+        return sorted(self._directory)
+
+    def __contains__(self, name):
+        return name in self._directory
+
+    def __len__(self):
+        return len(self._directory)
+
+    def package(self, name):
+        """Return the ASPackage `name`, decoding it on first use"""
+        pkg = self._packages.get(name)
+        if pkg is None:
+            start, size = self._directory[name]
+            with open(self.path, 'rb') as f:
+                f.seek(start)
+                pkg = self._packages[name] = loadRecord(f.read(size))
+        return pkg
+
+    def packages(self, names=None):
+        """Return {name: ASPackage} for `names`, or for every package"""
+        if names is None:
+            names = self.names()
+        return dict((name, self.package(name)) for name in names)
@@ -0,0 +1,227 @@
+#!/usr/bin/env python
+# encoding=utf-8
+
+# Copyright (c) 2008, Michael Ramirez
+#
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification are permitted provided that the following conditions are met:
+#   * Redistributions of source code must retain the above copyright notice,
+#     this list of conditions and the following disclaimer.
+#   * Redistributions in binary form must reproduce the above copyright notice,
+#     this list of conditions and the following disclaimer in the documentation
+#     and/or other #materials provided with the distribution.
+#   * Neither the name of the <ORGANIZATION> nor the names of its contributors
+#     may be used to endorse or promote products derived from this software
+#     without specific #prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+# "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+# LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR
+# A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT OWNER OR
+# CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL,
+# EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO,
+# PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR
+# PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF
+# LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING
+# NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS
+# SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+"""Resolve the type names used in a set of packages
+
+A name written in a package is looked up, in this order, among
+
+  1. the single type imports, by their last segment
+  2. the classes and interfaces of the package itself
+  3. the packages imported with a wildcard
+  4. the classes and interfaces of the default package and the built in
+     top level types
+
+A name that contains a dot is taken to be fully qualified already. The
+names used in a class are resolved against the imports of the file that
+defines it, kept in ASClass.imports, so two files of a package may give
+the same short name different meanings. Without them the imports of all
+files of the package are used, as Builder merges them.
+
+Nothing is resolved up front: SymbolTable indexes the types the first
+time it is queried, and remembers every name it resolves.
+"""
+
+from asModel import ASImport, ASMethod
+
+# ActionScript 3 内置的顶级类型
+TOP_LEVEL_TYPES = frozenset([
+    '*', 'void', 'Array', 'Boolean', 'Class', 'Date', 'Error', 'Function',
+    'Namespace', 'Number', 'Object', 'QName', 'RegExp', 'String', 'Vector',
+    'XML', 'XMLList', 'int', 'uint',
+])
+
+
+def qualifiedName(pkgname, name):
+    if pkgname:
+        return pkgname + '.' + name
+    return name
+
+
+def packageOf(cls):
+    """Return the name of the package that defines `cls`"""
+    return cls.full_name.rpartition('.')[0]
+
+
+def importedNames(imports):
+    """Map the last name segment of each single type import to the ASImport
+
+    Wildcard imports are left out. When two imports end in the same name
+    the first one is kept.
+    """
+    names = {}
+    for imp in imports:
+        name = imp.name.rpartition('.')[2]
+        if name != '*':
+            names.setdefault(name, imp)
+    return names
+
+
+class _Scope(object):
+    # 包中一组导入可见的名称, 以及在其中已经解析过的名称
+
+    def __init__(self, pkgname, imports):
+        self.pkgname = pkgname
+        # 保留列表的引用, 它的 id 可能是 _scopes 的键
+        self.imports = imports
+        self.imported = dict(
+            (name, imp.name) for name, imp in importedNames(imports).items()
+        )
+        self.wildcards = [
+            imp.name[:-2] for imp in imports if imp.name.endswith('.*')
+        ]
+        # 名称 -> 全名或 None
+        self.resolved = {}
+
+
+class SymbolTable(object):
+    """Type resolution over `packages`, a dict of ASPackage by name
+
+    The table does not follow changes to the packages; build a new one
+    after parsing more files. Builder.symbols does this for a Builder.
+    """
+
+    def __init__(self, packages):
+        self.packages = packages
+        # 全名 -> ASClass, 第一次查询时建立
+        self._types = None
+        # 包名或文件导入列表的 id -> _Scope
+        self._scopes = {}
+
+    def types(self):
+        """Return {qualified name: ASClass} of every class and interface"""
+        if self._types is None:
+            types = {}
+            for pkg in self.packages.values():
+                for cls in pkg.interfaces.values():
+                    types[qualifiedName(pkg.name, cls.name)] = cls
+                for cls in pkg.classes.values():
+                    types[qualifiedName(pkg.name, cls.name)] = cls
+            self._types = types
+        return self._types
+
+    def find(self, name):
+        """Return the ASClass with the qualified `name`, or None"""
+        return self.types().get(name)
+
+    def resolve(self, name, pkgname='', imports=None):
+        """Return the qualified name `name` refers to in package `pkgname`
+
+        `name` may be an ASImport, as parsers put in variable types.
+        `imports` are those of the file the name is written in, such as
+        ASClass.imports; None stands for the imports of every file of the
+        package. Returns None if the name cannot be resolved.
+        """
+        if isinstance(name, ASImport):
+            name = name.name
+        if not name:
+            return None
+        scope = self._scope(pkgname, imports)
+        try:
+            return scope.resolved[name]
+        except KeyError:
+            resolved = scope.resolved[name] = self._resolve(name, scope)
+            return resolved
+
+    def _resolve(self, name, scope):
+        if '.' in name:
+            return name
+        types = self.types()
+        resolved = scope.imported.get(name)
+        if resolved is not None:
+            return resolved
+        resolved = qualifiedName(scope.pkgname, name)
+        if resolved in types:
+            return resolved
+        for prefix in scope.wildcards:
+            resolved = prefix + '.' + name
+            if resolved in types:
+                return resolved
+        if name in types or name in TOP_LEVEL_TYPES:
+            return name
+        return None
+
+    def candidates(self, name, pkgname='', imports=None):
+        """Return the qualified names `name` may resolve to in `pkgname`
+
+        These are the names to watch for a name that does not resolve yet:
+        once one of them is defined, resolving it gives a new result.
+        `imports` is as for resolve.
+        """
+        if isinstance(name, ASImport):
+            name = name.name
+        if not name:
+            return []
+        if '.' in name:
+            return [name]
+        scope = self._scope(pkgname, imports)
+        imported = scope.imported.get(name)
+        if imported is not None:
+            return [imported]
+        names = [qualifiedName(scope.pkgname, name)]
+        names.extend(prefix + '.' + name for prefix in scope.wildcards)
+        if scope.pkgname:
+            names.append(name)
+        return names
+
+    def _scope(self, pkgname, imports=None):
+        # 一个文件的导入只属于一个包, 按列表的 id 查找即可
+        key = pkgname if imports is None else id(imports)
+        scope = self._scopes.get(key)
+        if scope is None:
+            if imports is None:
+                pkg = self.packages.get(pkgname)
+                imports = pkg.imports if pkg is not None else []
+            scope = self._scopes[key] = _Scope(pkgname, imports)
+        return scope
+
+    def typeOf(self, cls, node):
+        """Resolve the type of a member or argument `node` of `cls`
+
+        For an ASMethod this is its return type, for a variable or an
+        argument its declared type.
+        """
+        if isinstance(node, ASMethod):
+            return self.resolve(node.return_type, packageOf(cls), cls.imports)
+        return self.resolve(node.type_, packageOf(cls), cls.imports)
+
+    def extendsOf(self, cls):
+        """Return the qualified name of the class `cls` extends, or None"""
+        return self.resolve(cls.extends, packageOf(cls), cls.imports)
+
+    def implementsOf(self, cls):
+        """Return the qualified names of the interfaces `cls` implements
+
+        The list matches cls.implements, with None for a name that cannot
+        be resolved.
+        """
+        pkgname = packageOf(cls)
+        return [
+            self.resolve(name, pkgname, cls.imports) for name in cls.implements
+        ]
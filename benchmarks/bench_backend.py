@@ -0,0 +1,49 @@
+#!/usr/bin/env python
+# encoding=utf-8
+"""Compare the pyparsing grammar with the hand-written descent parser.
+
+Each resource is parsed with the Or grammar, the keyword-dispatched grammar
+and the descent backend, with and without skim mode.
+
+Usage: python benchmarks/bench_backend.py [repeat]
+"""
+
+from __future__ import print_function
+
+import sys
+
+from helper import load, parseTime
+
+from asdox import asBuilder
+
+RESOURCES = [
+    'tests/resources/Button.as',
+    'tests/resources/Filter.as',
+    'tests/resources/mx/utils/StringUtil.as',
+]
+
+
+def main():
+    repeat = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+    print('{0:<28} {1:>5} {2:>8} {3:>12} {4:>11} {5:>8}'.format(
+        'file', 'skim', 'Or (s)', 'dispatch (s)', 'descent (s)', 'speedup'
+    ))
+    for filename in RESOURCES:
+        src = load(filename)
+        for skim in (False, True):
+            t_or = parseTime(asBuilder.Builder(skim=skim), src, repeat)
+            t_dispatch = parseTime(
+                asBuilder.Builder(skim=skim, dispatch=True), src, repeat
+            )
+            t_descent = parseTime(
+                asBuilder.Builder(skim=skim, backend='descent'), src, repeat
+            )
+            print('{0:<28} {1:>5} {2:>8.4f} {3:>12.4f} {4:>11.4f} '
+                  '{5:>7.1f}x'.format(
+                      filename[len('tests/resources/'):], str(skim),
+                      t_or, t_dispatch, t_descent, t_or / t_descent
+                  ))
+
+
+if __name__ == '__main__':
+    main()
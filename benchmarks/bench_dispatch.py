@@ -0,0 +1,58 @@
+#!/usr/bin/env python
+# encoding=utf-8
+"""Compare the longest-match (Or) and keyword-dispatched class member grammar.
+
+For each kind of member a class with `count` members of that kind is
+parsed with both grammars and the time per member is reported.
+
+Usage: python benchmarks/bench_dispatch.py [count] [repeat]
+"""
+
+from __future__ import print_function
+
+import sys
+
+from helper import parseTime
+
+from asdox import asBuilder
+
+MEMBERS = [
+    ('var', 'private var v{0}:String = "value";'),
+    ('const', 'public static const C{0}:int = 0x{0};'),
+    ('metatag var', '[Bindable(event="change")] public var b{0}:Object;'),
+    ('method', 'public function m{0}(a:int, b:String = "x"):void {{ a++; }}'),
+    ('getter', 'override public function get g{0}():Number {{ return 1; }}'),
+    ('metatag method', '[Inspectable(category="General")] '
+                       'protected function i{0}(...rest):* {{ }}'),
+    ('import', 'import flash.events.Event{0};'),
+    ('use', 'use namespace ns{0};'),
+    ('static block', '{{ init{0}(); }}'),
+    ('initialization', 'v{0} = [];'),
+]
+
+
+def classSource(template, count):
+    return 'package bench {{ public class Bench {{\n{0}\n}} }}'.format(
+        '\n'.join(template.format(i) for i in range(count))
+    )
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    repeat = int(sys.argv[2]) if len(sys.argv) > 2 else 3
+    default = asBuilder.Builder()
+    dispatch = asBuilder.Builder(dispatch=True)
+    print('{0:<16} {1:>12} {2:>13} {3:>8}'.format(
+        'member', 'Or (us)', 'dispatch (us)', 'speedup'
+    ))
+    for kind, template in MEMBERS:
+        src = classSource(template, count)
+        t_default = parseTime(default, src, repeat) / count * 1e6
+        t_dispatch = parseTime(dispatch, src, repeat) / count * 1e6
+        print('{0:<16} {1:>12.1f} {2:>13.1f} {3:>7.1f}x'.format(
+            kind, t_default, t_dispatch, t_default / t_dispatch
+        ))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,89 @@
+#!/usr/bin/env python
+# encoding=utf-8
+"""Effective members of every class in deep inheritance chains.
+
+`chains` chains of `depth` classes are generated, each class extending
+the previous one and declaring a few variables and methods. The report
+compares walking the extends chain by hand for every class, as
+generators did, with ClassHierarchy.members, both the first time and
+once memoized.
+
+Usage: python benchmarks/bench_hierarchy.py [chains] [depth]
+"""
+
+from __future__ import print_function
+
+import sys
+
+from helper import timed
+
+from asdox import asBuilder
+
+MEMBERS = 5
+
+
+def source(chain, level):
+    members = []
+    for i in range(MEMBERS):
+        members.append('public var v{0}_{1}:int;'.format(level, i))
+        members.append(
+            'public function m{0}_{1}():void {{ }}'.format(level, i)
+        )
+    return '''
+    package c{0}
+    {{
+        public class C{1}{2}
+        {{
+            {3}
+        }}
+    }}
+    '''.format(
+        chain, level,
+        ' extends C{0}'.format(level - 1) if level else '',
+        '\n'.join(members)
+    )
+
+
+def byHand(builder):
+    # 逐个类沿 extends 向上查找
+    for pkg in builder.packages.values():
+        for cls in pkg.classes.values():
+            members = {}
+            base = cls
+            while base is not None:
+                for kind in ('variables', 'methods'):
+                    for name, member in getattr(base, kind).items():
+                        members.setdefault((kind, name), member)
+                base = pkg.classes.get(base.extends) if base.extends else None
+
+
+def memoized(builder):
+    hierarchy = builder.hierarchy()
+    for pkg in builder.packages.values():
+        for cls in pkg.classes.values():
+            hierarchy.members(cls, 'variables')
+            hierarchy.members(cls, 'methods')
+
+
+def main():
+    chains = int(sys.argv[1]) if len(sys.argv) > 1 else 50
+    depth = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+    builder = asBuilder.Builder(backend='descent')
+    for chain in range(chains):
+        for level in range(depth):
+            builder.addSource(source(chain, level))
+    hand, _ = timed(byHand, builder)
+    first, _ = timed(memoized, builder)
+    again, _ = timed(memoized, builder)
+    print('classes             {0:>10}'.format(chains * depth))
+    print('by hand (ms)        {0:>10.2f}'.format(hand * 1000))
+    print('first (ms)          {0:>10.2f} {1:>7.1f}x'.format(
+        first * 1000, hand / first
+    ))
+    print('memoized (ms)       {0:>10.2f} {1:>7.1f}x'.format(
+        again * 1000, hand / again
+    ))
+
+
+if __name__ == '__main__':
+    main()
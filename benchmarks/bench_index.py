@@ -0,0 +1,79 @@
+#!/usr/bin/env python
+# encoding=utf-8
+"""Open a large symbol index and look up classes in it.
+
+The classes of the test resources are put in `packages` packages, so the
+index holds four classes per package, 100k in total by default.
+The model keeps no tokens, as lookup tools would build it. The
+report shows the time to write the index, to open it, and the average
+time of a lookup that decodes one class, next to the time to load every
+package of a snapshot of the same model.
+
+Usage: python benchmarks/bench_index.py [packages]
+"""
+
+from __future__ import print_function
+
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+
+from helper import RESOURCES, load, timed
+
+from asdox import asBuilder, asIndex, asModel, asSnapshot
+
+LOOKUPS = 1000
+
+
+def makePackages(count):
+    builder = asBuilder.Builder(backend='descent', tokens='none')
+    classes = []
+    for filename in RESOURCES:
+        pkg = builder.parsePackage(load(filename))
+        classes.extend(pkg.classes.values())
+        classes.extend(pkg.interfaces.values())
+    packages = {}
+    for i in range(count):
+        # 同一批类对象放进不同的包, 只有名字不同
+        pkg = packages['p{0}'.format(i)] = asModel.ASPackage('p{0}'.format(i))
+        for cls in classes:
+            pkg.classes[cls.name] = cls
+    return packages
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 25000
+    root = tempfile.mkdtemp(prefix='asdox-index-')
+    try:
+        packages = makePackages(count)
+        path = os.path.join(root, 'symbols.asdi')
+        snapshot = os.path.join(root, 'packages.asds')
+        write, _ = timed(asIndex.write, path, packages)
+        asSnapshot.save(snapshot, packages)
+        open_, index = timed(asIndex.SymbolIndex, path)
+        names = list(index.names())
+        # 类比 LOOKUPS 少时查找每一个类
+        names = random.Random(0).sample(names, min(LOOKUPS, len(names)))
+        start = time.time()
+        for name in names:
+            index[name]
+        lookup = (time.time() - start) / len(names)
+        load_all, _ = timed(asSnapshot.Snapshot(snapshot).packages)
+        print('classes             {0:>10}'.format(len(index)))
+        print('write (s)           {0:>10.3f}'.format(write))
+        print('index size (KB)     {0:>10.0f}'.format(
+            os.path.getsize(path) / 1024.0
+        ))
+        print('open (ms)           {0:>10.3f}'.format(open_ * 1000))
+        print('lookup (ms)         {0:>10.3f}'.format(lookup * 1000))
+        print('load snapshot (s)   {0:>10.3f}'.format(load_all))
+        index.close()
+    finally:
+        shutil.rmtree(root)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,48 @@
+#!/usr/bin/env python
+# encoding=utf-8
+"""Count the distinct model strings of a corpus and the memory they take.
+
+The test resources are copied `copies` times, each copy in its own
+package, and ingested without tokens. The report shows how many strings
+were interned, how many of them are distinct, and the size of every
+object reachable from Builder.packages, each counted once.
+
+Usage: python benchmarks/bench_intern.py [copies] [backend]
+"""
+
+from __future__ import print_function
+
+import shutil
+import sys
+import tempfile
+import time
+
+from helper import RESOURCES, load, makeTree, reachableSize
+
+from asdox import asBuilder, asModel
+
+
+def main():
+    copies = int(sys.argv[1]) if len(sys.argv) > 1 else 50
+    backend = sys.argv[2] if len(sys.argv) > 2 else 'descent'
+    root = tempfile.mkdtemp(prefix='asdox-intern-')
+    try:
+        makeTree(root, copies)
+        asModel.strings.clear()
+        builder = asBuilder.Builder(backend=backend, tokens='none')
+        start = time.time()
+        builder.addSource(root)
+        elapsed = time.time() - start
+        print('files            {0:>10}'.format(len(builder.manifest)))
+        print('interned strings {0:>10}'.format(asModel.strings.lookups))
+        print('distinct strings {0:>10}'.format(len(asModel.strings)))
+        print('model size (KB)  {0:>10.0f}'.format(
+            reachableSize(builder.packages) / 1024.0
+        ))
+        print('parse time (s)   {0:>10.2f}'.format(elapsed))
+    finally:
+        shutil.rmtree(root)
+
+
+if __name__ == '__main__':
+    main()
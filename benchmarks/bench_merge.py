@@ -0,0 +1,81 @@
+#!/usr/bin/env python
+# encoding=utf-8
+"""Merge the files of one large package.
+
+`files` parsed files of the same package, each importing `imports` names
+drawn from a pool shared by the package, are merged with mergePackage
+the old way, scanning the package's import list for every import, and
+with the name index Builder keeps per package.
+
+Usage: python benchmarks/bench_merge.py [files] [imports]
+"""
+
+from __future__ import print_function
+
+import random
+import sys
+
+from helper import timed
+
+from asdox import asBuilder, asModel
+
+POOL = 2000
+
+
+class ScanningBuilder(asBuilder.Builder):
+    # 以前的做法: 每个导入都重新建立并扫描包的导入名称列表
+
+    def _mergeDeclarations(self, pkg):
+        if self.packages.get(pkg.name) is None:
+            self.packages[pkg.name] = pkg
+            return
+        for imp in pkg.imports:
+            if imp.name not in list(map(
+                lambda imp: imp.name, self.packages[pkg.name].imports
+            )):
+                self.packages[pkg.name].imports.append(imp)
+        for cls in pkg.classes.values():
+            self.packages[pkg.name].classes[cls.name] = cls
+        for interface in pkg.interfaces.values():
+            self.packages[pkg.name].interfaces[interface.name] = interface
+
+
+def makePackages(files, imports):
+    # 直接构造模型, 只测量合并
+    random.seed(0)
+    pool = ['app.module{0}.Type{0}'.format(i) for i in range(POOL)]
+    packages = []
+    for i in range(files):
+        pkg = asModel.ASPackage('app.views')
+        for name in random.sample(pool, imports):
+            pkg.imports.append(asModel.ASImport(name))
+        cls = asModel.ASClass('View{0}'.format(i))
+        cls.full_name = 'app.views.' + cls.name
+        pkg.classes[cls.name] = cls
+        packages.append(pkg)
+    return packages
+
+
+def merge(cls, packages):
+    builder = cls()
+    for pkg in packages:
+        builder.mergePackage(pkg)
+    return builder
+
+
+def main():
+    files = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    imports = int(sys.argv[2]) if len(sys.argv) > 2 else 30
+    old, expected = timed(merge, ScanningBuilder, makePackages(files, imports))
+    new, builder = timed(merge, asBuilder.Builder, makePackages(files, imports))
+    pkg, other = builder.packages['app.views'], expected.packages['app.views']
+    assert [imp.name for imp in pkg.imports] == \
+        [imp.name for imp in other.imports]
+    assert sorted(pkg.classes) == sorted(other.classes)
+    print('imports             {0:>10}'.format(len(pkg.imports)))
+    print('scanning (s)        {0:>10.3f}'.format(old))
+    print('indexed (s)         {0:>10.3f} {1:>7.1f}x'.format(new, old / new))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,113 @@
+#!/usr/bin/env python
+# encoding=utf-8
+"""Combine builders that parsed shards of a tree.
+
+`files` classes spread over 40 packages are parsed by `shards` builders,
+each taking every shards-th file. The builders are combined the old way,
+saving each as a snapshot and loading the snapshots into one Builder,
+and with Builder.mergeAll, from the live builders and from the
+snapshots. Then one small builder and the rest of the tree are merged
+with merge, each way round; the small side sets the cost.
+
+Usage: python benchmarks/bench_merge_builders.py [files] [shards]
+"""
+
+from __future__ import print_function
+
+import os
+import shutil
+import sys
+import tempfile
+
+from helper import timed
+
+from asdox import asBuilder
+
+PACKAGES = 40
+
+CLASS = '''
+package app.module{0}
+{{
+    import flash.events.Event;
+    import app.module{1}.Model{2};
+    [Bindable]
+    public class Model{3} extends Model{2}
+    {{
+        public var id:int;
+        public var name:String;
+        public function save(event:Event):void {{ }}
+    }}
+}}
+'''
+
+
+def makeTree(root, files):
+    paths = []
+    for i in range(files):
+        pkg = i % PACKAGES
+        directory = os.path.join(root, 'app', 'module{0}'.format(pkg))
+        if not os.path.isdir(directory):
+            os.makedirs(directory)
+        path = os.path.join(directory, 'Model{0}.as'.format(i))
+        with open(path, 'w') as f:
+            f.write(CLASS.format(pkg, (i - 1) % PACKAGES, max(i - 1, 0), i))
+        paths.append(path)
+    return paths
+
+
+def build(paths):
+    builder = asBuilder.Builder(backend='descent', tokens='none')
+    for path in paths:
+        builder.addSource(path)
+    return builder
+
+
+def saveAndLoad(builders, snapshots):
+    # 以前的做法: 保存每个 Builder, 再把快照依次 load 到同一个 Builder 中
+    for builder, path in zip(builders, snapshots):
+        builder.save(path)
+    builder = asBuilder.Builder()
+    for path in snapshots:
+        builder.load(path)
+    return builder
+
+
+def mergeAll(others):
+    return asBuilder.Builder().mergeAll(others)
+
+
+def main():
+    files = int(sys.argv[1]) if len(sys.argv) > 1 else 4000
+    shards = int(sys.argv[2]) if len(sys.argv) > 2 else 8
+    root = tempfile.mkdtemp(prefix='asdox-merge-')
+    try:
+        paths = makeTree(root, files)
+        builders = [build(paths[i::shards]) for i in range(shards)]
+        snapshots = [
+            os.path.join(root, 'shard{0}.snapshot'.format(i))
+            for i in range(shards)
+        ]
+        old, expected = timed(saveAndLoad, builders, snapshots)
+        new, builder = timed(mergeAll, builders)
+        loaded, merged = timed(mergeAll, snapshots)
+        for result in (builder, merged):
+            assert sorted(result.manifest) == sorted(expected.manifest)
+            assert sorted(result.symbols().types()) == \
+                sorted(expected.symbols().types())
+        small = paths[:10]
+        large, small_builder = build(paths[10:]), build(small)
+        into_large, _ = timed(large.merge, small_builder)
+        large, small_builder = build(paths[10:]), build(small)
+        into_small, _ = timed(small_builder.merge, large)
+        print('classes             {0:>10}'.format(len(builder.manifest)))
+        print('save and load (s)   {0:>10.3f}'.format(old))
+        print('mergeAll (s)        {0:>10.3f} {1:>7.1f}x'.format(new, old / new))
+        print('from snapshots (s)  {0:>10.3f}'.format(loaded))
+        print('small into large (s){0:>10.4f}'.format(into_large))
+        print('large into small (s){0:>10.4f}'.format(into_small))
+    finally:
+        shutil.rmtree(root)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,85 @@
+#!/usr/bin/env python
+# encoding=utf-8
+"""Find members by metatag with a scan and with the metadata index.
+
+`classes` generated classes each have `members` variables, one in four
+carrying a [Column] tag and a few a [ValueObject] tag. For each tag the
+report compares scanning every variable's metadata, as the generators
+do, with MetadataIndex.find, and shows what indexing adds to ingestion.
+
+Usage: python benchmarks/bench_metadata.py [classes] [members]
+"""
+
+from __future__ import print_function
+
+import sys
+import time
+
+from helper import timed
+
+from asdox import asBuilder, asMetadata
+
+TAGS = ['Column', 'ValueObject', 'Missing']
+
+
+def source(index, members):
+    lines = []
+    for i in range(members):
+        if i % 4 == 0:
+            lines.append('[Column(name="c{0}")]'.format(i))
+        if i % 10 == 1:
+            lines.append('[ValueObject]')
+        lines.append('public var v{0}:String;'.format(i))
+    return '''
+    package p{0}
+    {{
+        public class C{0}
+        {{
+            {1}
+        }}
+    }}
+    '''.format(index, '\n'.join(lines))
+
+
+def scan(builder, name):
+    found = []
+    for pkg in builder.packages.values():
+        for cls in pkg.classes.values():
+            for var in cls.variables.values():
+                for meta in var.metadata:
+                    if meta.name == name:
+                        found.append((cls, var, meta))
+    return found
+
+
+def index(packages):
+    metatags = asMetadata.MetadataIndex()
+    for pkg in packages.values():
+        metatags.addPackage(pkg)
+
+
+def main():
+    classes = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    members = int(sys.argv[2]) if len(sys.argv) > 2 else 40
+    builder = asBuilder.Builder(backend='descent')
+    start = time.time()
+    for i in range(classes):
+        builder.addSource(source(i, members))
+    ingest = time.time() - start
+    build, _ = timed(index, builder.packages)
+    print('classes x members   {0:>10}'.format(classes * members))
+    print('ingestion (s)       {0:>10.3f}'.format(ingest))
+    print('indexing (s)        {0:>10.3f} {1:>7.1%}'.format(
+        build, build / ingest
+    ))
+    for name in TAGS:
+        scanned, found = timed(scan, builder, name)
+        looked_up, hits = timed(builder.metatags.find, name)
+        assert len(found) == len(hits)
+        print('{0:<12} scan {1:>8.2f}ms  find {2:>8.3f}ms  {3:>6} hits'.format(
+            name, scanned * 1000, looked_up * 1000, len(hits)
+        ))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,108 @@
+#!/usr/bin/env python
+# encoding=utf-8
+"""Peak memory of reading a large MXML view.
+
+A generated view of `elements` nested components with a few Script
+blocks is read in a child process for each way of reading it: loading
+the whole tree with etree.parse, as addMXMLSource used to, and streaming
+the Script elements with mxmlScripts. The report shows the file size,
+the time and the peak resident size of each child, and the time of
+addMXMLSource.
+
+Usage: python benchmarks/bench_mxml.py [elements]
+"""
+
+from __future__ import print_function
+
+import os
+import resource
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+import helper  # 把仓库根目录加入 sys.path
+
+from lxml import etree
+from asdox import asBuilder
+
+SCRIPT = '''
+    <mx:Script><![CDATA[
+        import mx.controls.Alert;
+        [Bindable] public var title{0}:String;
+        public function handler{0}(event:Event):void {{ Alert.show(title{0}); }}
+    ]]></mx:Script>
+'''
+
+
+def makeView(path, elements):
+    with open(path, 'wb') as f:
+        f.write('<?xml version="1.0" encoding="utf-8"?>\n')
+        f.write('<mx:Canvas xmlns:mx="http://www.adobe.com/2006/mxml">\n')
+        for i in range(elements // 10):
+            f.write('<mx:VBox id="box{0}">\n'.format(i))
+            for j in range(10):
+                f.write(
+                    '<mx:Button id="b{0}_{1}" label="Button {0} {1}" '
+                    'click="handler(event)"/>\n'.format(i, j)
+                )
+            if i % 1000 == 0:
+                f.write(SCRIPT.format(i))
+            f.write('</mx:VBox>\n')
+        f.write('</mx:Canvas>\n')
+
+
+def readTree(path):
+    # 以前 addMXMLSource 的做法
+    scripts = []
+    root = etree.parse(path).getroot()
+    for element in root.iter():
+        if isinstance(element.tag, basestring) and element.tag.endswith('Script'):
+            scripts.append(element.text)
+    return scripts
+
+
+def child(mode, path):
+    start = time.time()
+    if mode == 'tree':
+        readTree(path)
+    else:
+        list(asBuilder.mxmlScripts(path))
+    print(time.time() - start, resource.getrusage(resource.RUSAGE_SELF).ru_maxrss)
+
+
+def measure(mode, path):
+    output = subprocess.check_output(
+        [sys.executable, os.path.abspath(__file__), '--child', mode, path]
+    )
+    seconds, maxrss = output.split()
+    return float(seconds), int(maxrss)
+
+
+def main():
+    if sys.argv[1:2] == ['--child']:
+        return child(sys.argv[2], sys.argv[3])
+    elements = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    root = tempfile.mkdtemp(prefix='asdox-mxml-')
+    try:
+        path = os.path.join(root, 'View.mxml')
+        makeView(path, elements)
+        print('file size (KB)      {0:>10.0f}'.format(
+            os.path.getsize(path) / 1024.0
+        ))
+        for mode in ('tree', 'stream'):
+            seconds, maxrss = measure(mode, path)
+            print('{0:<8} {1:>8.3f}s  peak {2:>8} KB'.format(
+                mode, seconds, maxrss
+            ))
+        builder = asBuilder.Builder(backend='descent')
+        start = time.time()
+        builder.addMXMLSource(path, 'views')
+        print('addMXMLSource (s)   {0:>10.3f}'.format(time.time() - start))
+    finally:
+        shutil.rmtree(root)
+
+
+if __name__ == '__main__':
+    main()
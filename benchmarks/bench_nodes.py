@@ -0,0 +1,70 @@
+#!/usr/bin/env python
+# encoding=utf-8
+"""Report the memory used by each kind of model node.
+
+Every test resource is parsed and the nodes are walked with childNodes.
+A node's size is the size of the object itself plus its __dict__, if it
+has one; the objects its attributes refer to are not counted.
+
+Usage: python benchmarks/bench_nodes.py [backend]
+"""
+
+from __future__ import print_function
+
+import collections
+import sys
+
+from helper import load
+
+from asdox import asBuilder
+
+RESOURCES = [
+    'tests/resources/Button.as',
+    'tests/resources/Filter.as',
+    'tests/resources/Filter2.as',
+    'tests/resources/com/gurufaction/asFile1.as',
+    'tests/resources/com/gurufaction/asFile2.as',
+    'tests/resources/mx/utils/StringUtil.as',
+]
+
+
+def nodeSize(node):
+    size = sys.getsizeof(node)
+    if hasattr(node, '__dict__'):
+        size += sys.getsizeof(node.__dict__)
+    return size
+
+
+def walk(node, sizes, seen):
+    if id(node) in seen:
+        return
+    seen.add(id(node))
+    sizes[type(node).__name__].append(nodeSize(node))
+    for child in node.childNodes():
+        walk(child, sizes, seen)
+
+
+def main():
+    backend = sys.argv[1] if len(sys.argv) > 1 else 'pyparsing'
+    builder = asBuilder.Builder(backend=backend)
+    sizes = collections.defaultdict(list)
+    seen = set()
+    # 保留所有的包, 否则对象的 id 会被重用
+    packages = [builder.parsePackage(load(filename)) for filename in RESOURCES]
+    for pkg in packages:
+        walk(pkg, sizes, seen)
+    print('{0:<16} {1:>6} {2:>12}'.format('node', 'count', 'bytes/node'))
+    total = count = 0
+    for name, values in sorted(sizes.items()):
+        print('{0:<16} {1:>6} {2:>12.0f}'.format(
+            name, len(values), float(sum(values)) / len(values)
+        ))
+        total += sum(values)
+        count += len(values)
+    print('{0:<16} {1:>6} {2:>12.0f}'.format(
+        'all', count, float(total) / count
+    ))
+
+
+if __name__ == '__main__':
+    main()
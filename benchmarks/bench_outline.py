@@ -0,0 +1,80 @@
+#!/usr/bin/env python
+# encoding=utf-8
+"""Measure how fast outline mode indexes a directory tree.
+
+The test resources are copied `copies` times into a temporary tree, which
+is then ingested with Builder(outline=True). The throughput is
+extrapolated to a 50k-file tree and compared with a full parse of the same
+files with the descent backend.
+
+Usage: python benchmarks/bench_outline.py [copies] [workers]
+"""
+
+from __future__ import print_function
+
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+from helper import load
+
+from asdox import asBuilder
+
+RESOURCES = [
+    'tests/resources/Button.as',
+    'tests/resources/Filter.as',
+    'tests/resources/Filter2.as',
+    'tests/resources/com/gurufaction/asFile1.as',
+    'tests/resources/com/gurufaction/asFile2.as',
+    'tests/resources/mx/utils/StringUtil.as',
+]
+TREE_SIZE = 50000
+
+
+def makeTree(root, copies):
+    count = 0
+    for i in range(copies):
+        directory = os.path.join(root, 'p{0:03d}'.format(i // 100),
+                                 'q{0:03d}'.format(i))
+        os.makedirs(directory)
+        for filename in RESOURCES:
+            name = os.path.basename(filename)
+            with open(os.path.join(directory, name), 'wb') as f:
+                f.write(load(filename))
+            count += 1
+    return count
+
+
+def timeit(builder, root):
+    start = time.time()
+    builder.addSource(root)
+    return time.time() - start
+
+
+def main():
+    copies = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+    workers = int(sys.argv[2]) if len(sys.argv) > 2 else 1
+    root = tempfile.mkdtemp(prefix='asdox-outline-')
+    try:
+        count = makeTree(root, copies)
+        print('{0:<10} {1:>8} {2:>9} {3:>10} {4:>14}'.format(
+            'mode', 'files', 'time (s)', 'files/s', '50k files (s)'
+        ))
+        for mode, options in [
+            ('outline', {'outline': True}),
+            ('descent', {'backend': 'descent'}),
+        ]:
+            builder = asBuilder.Builder(workers=workers, **options)
+            elapsed = timeit(builder, root)
+            print('{0:<10} {1:>8} {2:>9.2f} {3:>10.0f} {4:>14.1f}'.format(
+                mode, count, elapsed, count / elapsed,
+                elapsed / count * TREE_SIZE
+            ))
+    finally:
+        shutil.rmtree(root)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,57 @@
+#!/usr/bin/env python
+# encoding=utf-8
+"""Measure bounded packrat memoization on each of the test resources.
+
+Every file is parsed without memoization and with a per-file packrat cache
+of each given size, for both the Or and the keyword-dispatched grammar.
+The cache hit rate and speedup show which files benefit.
+
+Usage: python benchmarks/bench_packrat.py [repeat] [size ...]
+"""
+
+from __future__ import print_function
+
+import sys
+
+from helper import load, parseTime
+
+from asdox import asBuilder
+
+RESOURCES = [
+    'tests/resources/Button.as',
+    'tests/resources/Filter.as',
+    'tests/resources/Filter2.as',
+    'tests/resources/com/gurufaction/asFile1.as',
+    'tests/resources/com/gurufaction/asFile2.as',
+    'tests/resources/mx/utils/StringUtil.as',
+]
+
+
+def main():
+    repeat = int(sys.argv[1]) if len(sys.argv) > 1 else 3
+    sizes = [int(size) for size in sys.argv[2:]] or [128, 1024]
+    print('{0:<10} {1:<28} {2:>6} {3:>8} {4:>8} {5:>8}'.format(
+        'grammar', 'file', 'size', 'time (s)', 'hit rate', 'speedup'
+    ))
+    for dispatch in (False, True):
+        grammar = 'dispatch' if dispatch else 'Or'
+        for filename in RESOURCES:
+            src = load(filename)
+            name = filename[len('tests/resources/'):]
+            plain = parseTime(asBuilder.Builder(dispatch=dispatch), src, repeat)
+            print('{0:<10} {1:<28} {2:>6} {3:>8.3f}'.format(
+                grammar, name, '-', plain
+            ))
+            for size in sizes:
+                builder = asBuilder.Builder(dispatch=dispatch, packrat=size)
+                elapsed = parseTime(builder, src, repeat)
+                hits, misses = builder.packrat_stats
+                print('{0:<10} {1:<28} {2:>6} {3:>8.3f} {4:>7.0%} '
+                      '{5:>7.2f}x'.format(
+                          grammar, name, size, elapsed,
+                          float(hits) / (hits + misses), plain / elapsed
+                      ))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,102 @@
+#!/usr/bin/env python
+# encoding=utf-8
+"""Ingest a mixed .as and MXML project.
+
+A tree of `dirs` package directories, each with a few .as classes and
+MXML views, is ingested the old way, addSource for the .as files and a
+second walk calling addMXMLSource for every view, and with addProject,
+one process and a pool of `workers`.
+
+Usage: python benchmarks/bench_project.py [dirs] [workers]
+"""
+
+from __future__ import print_function
+
+import os
+import shutil
+import sys
+import tempfile
+
+from helper import timed
+
+from asdox import asBuilder
+
+FILES = 4
+
+CLASS = '''
+package {0}
+{{
+    public class Model{1}
+    {{
+        public var id:int;
+        public var name:String;
+        public function save():void {{ }}
+    }}
+}}
+'''
+
+VIEW = '''<?xml version="1.0"?>
+<mx:Panel xmlns:mx="http://www.adobe.com/2006/mxml">
+    <mx:Script><![CDATA[
+        import {0}.Model{1};
+        [Bindable] public var model:Model{1};
+        private function onSave():void {{ model.save(); }}
+    ]]></mx:Script>
+    <mx:Form><mx:TextInput text="{{model.name}}"/></mx:Form>
+</mx:Panel>
+'''
+
+
+def makeTree(root, dirs):
+    for i in range(dirs):
+        pkgname = 'app.module{0}'.format(i)
+        directory = os.path.join(root, *pkgname.split('.'))
+        os.makedirs(directory)
+        for j in range(FILES):
+            with open(os.path.join(directory, 'Model{0}.as'.format(j)), 'w') as f:
+                f.write(CLASS.format(pkgname, j))
+            with open(os.path.join(directory, 'View{0}.mxml'.format(j)), 'w') as f:
+                f.write(VIEW.format(pkgname, j))
+
+
+def twoWalks(root):
+    # 以前的做法: .as 文件和 MXML 文件分别遍历
+    builder = asBuilder.Builder(backend='descent')
+    builder.addSource(root)
+    for path, dirs, files in os.walk(root):
+        for filename in files:
+            if filename.endswith('.mxml'):
+                pkgname = os.path.relpath(path, root).replace(os.sep, '.')
+                builder.addMXMLSource(os.path.join(path, filename), pkgname)
+    return builder
+
+
+def project(root, workers=1):
+    builder = asBuilder.Builder(workers=workers, backend='descent')
+    builder.addProject(root)
+    return builder
+
+
+def main():
+    dirs = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    workers = int(sys.argv[2]) if len(sys.argv) > 2 else 4
+    root = tempfile.mkdtemp(prefix='asdox-project-')
+    try:
+        makeTree(root, dirs)
+        old, expected = timed(twoWalks, root)
+        new, builder = timed(project, root)
+        pooled, parallel = timed(project, root, workers)
+        assert sorted(builder.packages) == sorted(expected.packages)
+        assert sorted(parallel.manifest) == sorted(builder.manifest)
+        print('files               {0:>10}'.format(len(builder.manifest)))
+        print('two walks (s)       {0:>10.3f}'.format(old))
+        print('addProject (s)      {0:>10.3f} {1:>7.1f}x'.format(new, old / new))
+        print('{0} workers (s)     {1:>10.3f} {2:>7.1f}x'.format(
+            workers, pooled, old / pooled
+        ))
+    finally:
+        shutil.rmtree(root)
+
+
+if __name__ == '__main__':
+    main()
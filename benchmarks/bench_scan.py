@@ -0,0 +1,91 @@
+#!/usr/bin/env python
+# encoding=utf-8
+"""Find the source files of a project tree.
+
+A tree of `dirs` package directories with .as and MXML files sits next to
+a bin-debug output directory and a .git directory holding `junk` files
+each. The files are found the old way, one os.walk per pattern with the
+output directories filtered out afterwards and an os.stat per file for
+the manifest, and with a single Scanner pass that prunes the output
+directories and returns each file with its stat result.
+
+Usage: python benchmarks/bench_scan.py [dirs] [junk]
+"""
+
+from __future__ import print_function
+
+import fnmatch
+import os
+import shutil
+import sys
+import tempfile
+
+from helper import timed
+
+from asdox import asScan
+
+FILES = 4
+INCLUDE = ['*.as', '*.mxml']
+EXCLUDE = ['bin-debug/', '.git/']
+
+
+def touch(path):
+    open(path, 'w').close()
+
+
+def makeTree(root, dirs, junk):
+    for i in range(dirs):
+        directory = os.path.join(root, 'src', 'app', 'module{0}'.format(i))
+        os.makedirs(directory)
+        for j in range(FILES):
+            touch(os.path.join(directory, 'Model{0}.as'.format(j)))
+            touch(os.path.join(directory, 'View{0}.mxml'.format(j)))
+            touch(os.path.join(directory, 'icon{0}.png'.format(j)))
+    for name in ('bin-debug', '.git'):
+        for i in range(junk // 100):
+            directory = os.path.join(root, name, 'd{0}'.format(i))
+            os.makedirs(directory)
+            for j in range(100):
+                # 输出目录中也有 .as 文件, 必须被排除
+                touch(os.path.join(directory, 'f{0}.as'.format(j)))
+
+
+def walks(root):
+    # 以前的做法: 每个模式遍历一次, 遍历后再过滤, 每个文件再 stat 一次
+    found = []
+    for pattern in INCLUDE:
+        for path, dirs, files in os.walk(root):
+            relative = os.path.relpath(path, root).split(os.sep)
+            if 'bin-debug' in relative or '.git' in relative:
+                continue
+            for filename in files:
+                if fnmatch.fnmatch(filename, pattern):
+                    filename = os.path.join(path, filename)
+                    found.append((filename, os.stat(filename)))
+    return found
+
+
+def scan(root):
+    scanner = asScan.Scanner(INCLUDE, EXCLUDE)
+    return [(entry.path, entry.stat) for entry in scanner.scan(root)]
+
+
+def main():
+    dirs = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+    junk = int(sys.argv[2]) if len(sys.argv) > 2 else 20000
+    root = tempfile.mkdtemp(prefix='asdox-scan-')
+    try:
+        makeTree(root, dirs, junk)
+        old, expected = timed(walks, root)
+        new, found = timed(scan, root)
+        assert sorted(path for path, st in found) == \
+            sorted(path for path, st in expected)
+        print('files               {0:>10}'.format(len(found)))
+        print('os.walk (s)         {0:>10.3f}'.format(old))
+        print('Scanner (s)         {0:>10.3f} {1:>7.1f}x'.format(new, old / new))
+    finally:
+        shutil.rmtree(root)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,71 @@
+#!/usr/bin/env python
+# encoding=utf-8
+"""Compare default, skim and fully tokenized parsing of the test resources.
+
+Method bodies are tokenized lazily by default; the "tokenized" column also
+requests the tokens of every method body after parsing. Each file is parsed
+with both the pyparsing and the descent backend. The speedup columns compare
+skim with the tokenized and with the default parse.
+
+Usage: python benchmarks/bench_skim.py [repeat]
+"""
+
+from __future__ import print_function
+
+import sys
+import time
+
+from helper import load
+
+from asdox import asBuilder
+
+RESOURCES = [
+    'tests/resources/Button.as',
+    'tests/resources/Filter.as',
+    'tests/resources/mx/utils/StringUtil.as',
+]
+
+
+def tokenizeBodies(pkg):
+    for cls in pkg.classes.values():
+        for methods in (cls.methods, cls.getter_methods, cls.setter_methods):
+            for method in methods.values():
+                if method.body is not None:
+                    method.body.raw_tokens
+
+
+def timeit(builder, src, repeat, tokenize=False):
+    best = None
+    for _ in range(repeat):
+        start = time.time()
+        pkg = builder.parsePackage(src)
+        if tokenize:
+            tokenizeBodies(pkg)
+        elapsed = time.time() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def main():
+    repeat = int(sys.argv[1]) if len(sys.argv) > 1 else 3
+    print('{0:<40} {1:>9} {2:>13} {3:>11} {4:>8} {5:>12} {6:>10}'.format(
+        'file', 'backend', 'tokenized (s)', 'default (s)', 'skim (s)',
+        'vs tokenized', 'vs default'
+    ))
+    for filename in RESOURCES:
+        src = load(filename)
+        for backend in asBuilder.BACKENDS:
+            full = asBuilder.Builder(backend=backend)
+            skim = asBuilder.Builder(backend=backend, skim=True)
+            t_tokenized = timeit(full, src, repeat, tokenize=True)
+            t_full = timeit(full, src, repeat)
+            t_skim = timeit(skim, src, repeat)
+            print('{0:<40} {1:>9} {2:>13.3f} {3:>11.3f} {4:>8.3f} '
+                  '{5:>11.1f}x {6:>9.2f}x'.format(
+                      filename, backend, t_tokenized, t_full, t_skim,
+                      t_tokenized / t_skim, t_full / t_skim
+                  ))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,72 @@
+#!/usr/bin/env python
+# encoding=utf-8
+"""Compare loading a snapshot with parsing the tree again.
+
+The test resources are copied `copies` times, each copy in its own
+package, and ingested once. The packages are then saved as a snapshot
+and as a pickle. The report shows the parse time, the time to load every
+package from each file, the time to load a single package from the
+snapshot, and the file sizes.
+
+Usage: python benchmarks/bench_snapshot.py [copies] [backend]
+"""
+
+from __future__ import print_function
+
+import cPickle as pickle
+import os
+import shutil
+import sys
+import tempfile
+
+from helper import RESOURCES, load, makeTree, timed
+
+from asdox import asBuilder, asSnapshot
+
+
+def loadPickle(path):
+    with open(path, 'rb') as f:
+        return pickle.load(f)
+
+
+def main():
+    copies = int(sys.argv[1]) if len(sys.argv) > 1 else 50
+    backend = sys.argv[2] if len(sys.argv) > 2 else 'descent'
+    root = tempfile.mkdtemp(prefix='asdox-snapshot-')
+    try:
+        tree = os.path.join(root, 'src')
+        makeTree(tree, copies)
+        snapshot = os.path.join(root, 'packages.asds')
+        pickled = os.path.join(root, 'packages.pickle')
+        builder = asBuilder.Builder(backend=backend)
+        parse, _ = timed(builder.addSource, tree)
+        save, _ = timed(builder.save, snapshot)
+        with open(pickled, 'wb') as f:
+            pickle.dump(builder.packages, f, pickle.HIGHEST_PROTOCOL)
+        load_all, _ = timed(asBuilder.Builder().load, snapshot)
+        load_pickle, _ = timed(loadPickle, pickled)
+        names = asSnapshot.Snapshot(snapshot).names()
+        name = names[len(names) // 2]
+        load_one, _ = timed(asBuilder.Builder().load, snapshot, [name])
+        print('packages            {0:>10}'.format(len(builder.packages)))
+        print('parse (s)           {0:>10.3f}'.format(parse))
+        print('save (s)            {0:>10.3f}'.format(save))
+        print('load snapshot (s)   {0:>10.3f} {1:>7.1f}x'.format(
+            load_all, parse / load_all
+        ))
+        print('load pickle (s)     {0:>10.3f} {1:>7.1f}x'.format(
+            load_pickle, parse / load_pickle
+        ))
+        print('load one package (s){0:>10.4f}'.format(load_one))
+        print('snapshot size (KB)  {0:>10.0f}'.format(
+            os.path.getsize(snapshot) / 1024.0
+        ))
+        print('pickle size (KB)    {0:>10.0f}'.format(
+            os.path.getsize(pickled) / 1024.0
+        ))
+    finally:
+        shutil.rmtree(root)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,88 @@
+#!/usr/bin/env python
+# encoding=utf-8
+"""Type resolution with the symbol table.
+
+The first part replaces member variable types with their imports the way
+parseASPackage did before, one scan of the imports per variable, and
+with the hash of importedNames, for a class with many imports and
+variables. The second part resolves every variable, argument, return,
+extends and implements type of a tree of `copies` copies of the test
+resources, twice, to show the cost of the first query and of the
+memoized ones.
+
+Usage: python benchmarks/bench_symbols.py [copies] [imports]
+"""
+
+from __future__ import print_function
+
+import sys
+
+from helper import RESOURCES, load, renamePackage, timed
+
+from asdox import asBuilder, asModel, asSymbols
+
+
+def scan(variables, imports):
+    # 以前 parseASPackage 中的做法
+    for var in variables:
+        for imported_cls in imports:
+            imported_cls_name = imported_cls.name.split('.')[-1]
+            if var.type_ == imported_cls_name:
+                break
+
+
+def hashed(variables, imports):
+    imported = asSymbols.importedNames(imports)
+    for var in variables:
+        imported.get(var.type_)
+
+
+def resolveAll(builder):
+    symbols = builder.symbols()
+    count = 0
+    for pkg in builder.packages.values():
+        for cls in list(pkg.classes.values()) + list(pkg.interfaces.values()):
+            symbols.extendsOf(cls)
+            symbols.implementsOf(cls)
+            for var in cls.variables.values():
+                symbols.typeOf(cls, var)
+                count += 1
+            for method in cls.methods.values():
+                symbols.typeOf(cls, method)
+                count += 1
+                for arg in method.arguments.values():
+                    symbols.typeOf(cls, arg)
+                    count += 1
+    return count
+
+
+def main():
+    copies = int(sys.argv[1]) if len(sys.argv) > 1 else 100
+    count = int(sys.argv[2]) if len(sys.argv) > 2 else 300
+    imports = [asModel.ASImport('p.q.T{0}'.format(i)) for i in range(count)]
+    variables = []
+    for i in range(count):
+        var = asModel.ASVariable('v{0}'.format(i))
+        var.type_ = 'T{0}'.format(i)
+        variables.append(var)
+    old, _ = timed(scan, variables, imports)
+    new, _ = timed(hashed, variables, imports)
+    print('imports x variables {0:>10}'.format(count))
+    print('scan (ms)           {0:>10.2f}'.format(old * 1000))
+    print('hash (ms)           {0:>10.2f} {1:>7.1f}x'.format(
+        new * 1000, old / new
+    ))
+
+    builder = asBuilder.Builder(backend='descent')
+    for i in range(copies):
+        for filename in RESOURCES:
+            builder.addSource(renamePackage(load(filename), 'p{0}'.format(i)))
+    first, types = timed(resolveAll, builder)
+    again, _ = timed(resolveAll, builder)
+    print('types resolved      {0:>10}'.format(types))
+    print('first pass (ms)     {0:>10.2f}'.format(first * 1000))
+    print('memoized (ms)       {0:>10.2f}'.format(again * 1000))
+
+
+if __name__ == '__main__':
+    main()
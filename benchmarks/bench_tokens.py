@@ -0,0 +1,85 @@
+#!/usr/bin/env python
+# encoding=utf-8
+"""Compare the memory held by the packages under each token policy.
+
+The test resources are copied `copies` times into a temporary tree and
+ingested with Builder(tokens=...) for 'full', 'signature' and 'none'.
+For 'full' the size is also reported after toTokens was called on every
+class, which tokenizes and keeps the method bodies. The time taken by
+addSource is reported too, since a policy should save memory without
+slowing down parsing.
+
+The memory is measured with tracemalloc where the interpreter has it.
+Otherwise, as on Python 2, it is the size of every object reachable from
+Builder.packages, each counted once.
+
+Usage: python benchmarks/bench_tokens.py [copies] [backend]
+"""
+
+from __future__ import print_function
+
+import gc
+import shutil
+import sys
+import tempfile
+
+from helper import makeTree, reachableSize, timed
+
+from asdox import asBuilder
+
+try:
+    import tracemalloc
+except ImportError:
+    tracemalloc = None
+
+
+def expandTokens(builder):
+    for pkg in builder.packages.values():
+        for cls in list(pkg.classes.values()):
+            list(cls.toTokens())
+
+
+def measure(root, backend, tokens, expand=False):
+    gc.collect()
+    if tracemalloc is not None:
+        tracemalloc.start()
+    builder = asBuilder.Builder(backend=backend, tokens=tokens)
+    elapsed = timed(builder.addSource, root)[0]
+    if expand:
+        expandTokens(builder)
+    gc.collect()
+    if tracemalloc is not None:
+        size = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+    else:
+        size = reachableSize(builder.packages)
+    return size, elapsed
+
+
+def main():
+    copies = int(sys.argv[1]) if len(sys.argv) > 1 else 50
+    backend = sys.argv[2] if len(sys.argv) > 2 else 'descent'
+    root = tempfile.mkdtemp(prefix='asdox-tokens-')
+    try:
+        makeTree(root, copies)
+        print('measured with {0}'.format(
+            'tracemalloc' if tracemalloc is not None else 'reachable objects'
+        ))
+        print('{0:<22} {1:>10} {2:>8} {3:>10}'.format(
+            'tokens', 'size (KB)', 'ratio', 'parse (s)'
+        ))
+        full = None
+        for tokens, expand in [('full', True), ('full', False),
+                               ('signature', False), ('none', False)]:
+            size, elapsed = measure(root, backend, tokens, expand)
+            full = full or size
+            print('{0:<22} {1:>10.0f} {2:>7.2f}x {3:>10.3f}'.format(
+                tokens + (' + toTokens' if expand else ''), size / 1024.0,
+                float(size) / full, elapsed
+            ))
+    finally:
+        shutil.rmtree(root)
+
+
+if __name__ == '__main__':
+    main()
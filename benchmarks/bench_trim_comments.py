@@ -0,0 +1,98 @@
+#!/usr/bin/env python
+# encoding=utf-8
+"""Compare the old pyparsing based comment removal with the single pass one,
+and the separate clean-up passes with the fused one, on a generated,
+heavily documented 10k-line file.
+
+Usage: python benchmarks/bench_trim_comments.py [lines]
+"""
+
+from __future__ import print_function
+
+import sys
+import time
+
+import helper  # 把仓库根目录加入 sys.path
+
+from asdox import asGrammar
+from asdox.asBuilder import TidySourceFile, OffsetMap
+
+MEMBER = '''
+    /**
+     *  The value of member {0}.
+     *
+     *  @default null
+     */
+    public var member{0}:String; // trailing comment {0}
+
+    /*
+     * Returns member {0}.
+     */
+    public function getMember{0}():String
+    {{
+        // url literals must survive: "http://example.com/{0}"
+        return member{0};
+    }}
+'''
+
+
+def generate(lines):
+    parts = ['package com.example\n{\n    public class Documented\n    {\n']
+    count = 0
+    i = 0
+    while count < lines:
+        member = MEMBER.format(i)
+        parts.append(member)
+        count += member.count('\n')
+        i += 1
+    parts.append('    }\n}\n')
+    return ''.join(parts)
+
+
+def legacy_trim_comments(source):
+    comments_positions = []
+    asGrammar.COMMENTS.parseWithTabs()
+    for _, begin, end in asGrammar.COMMENTS.scanString(source):
+        comments_positions.append((begin, end))
+    for begin, end in reversed(comments_positions):
+        source = source[:begin] + source[end:]
+    return source
+
+
+def timeit(func, source):
+    start = time.time()
+    func(source)
+    return time.time() - start
+
+
+def main():
+    lines = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+    source = generate(lines)
+    print('{0} lines, {1} bytes'.format(source.count('\n'), len(source)))
+    t_legacy = timeit(legacy_trim_comments, source)
+    t_single = timeit(TidySourceFile.trim_comments, source)
+    t_mapped = timeit(
+        lambda s: TidySourceFile.trim_comments(s, OffsetMap()), source
+    )
+    print('pyparsing scanString + slicing: {0:8.3f}s'.format(t_legacy))
+    print('single pass:                    {0:8.3f}s ({1:.0f}x)'.format(
+        t_single, t_legacy / t_single
+    ))
+    print('single pass with offset map:    {0:8.3f}s ({1:.0f}x)'.format(
+        t_mapped, t_legacy / t_mapped
+    ))
+    t_passes = timeit(
+        lambda s: TidySourceFile.tidy(TidySourceFile.trim_comments(
+            TidySourceFile.trim_bomflag(s)
+        )),
+        source
+    )
+    t_fused = timeit(TidySourceFile.process, source)
+    print('trim_comments + tidy passes:    {0:8.3f}s'.format(t_passes))
+    print('fused process:                  {0:8.3f}s ({1:.1f}x)'.format(
+        t_fused, t_passes / t_fused
+    ))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,87 @@
+#!/usr/bin/env python
+# encoding=utf-8
+"""Helpers shared by the benchmarks.
+
+Importing this module puts the repository root on sys.path, so that a
+benchmark run as python benchmarks/bench_x.py can import asdox.
+"""
+
+import gc
+import os
+import re
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+RESOURCES = [
+    'tests/resources/Button.as',
+    'tests/resources/Filter.as',
+    'tests/resources/Filter2.as',
+    'tests/resources/mx/utils/StringUtil.as',
+]
+
+
+def load(filename):
+    src = open(os.path.join(ROOT, filename), 'rb').read()
+    # 语法还不支持包级别的 include, Button.as 需要去掉这些行
+    return re.sub(r'(?m)^include .*\n', '', src)
+
+
+def renamePackage(src, prefix):
+    # 把 src 的包移到 prefix 之下, 默认包就成为 prefix
+    return re.sub(
+        r'\bpackage\b\s*([\w.]*)',
+        lambda m: 'package ' + '.'.join(
+            name for name in (prefix, m.group(1)) if name
+        ) + ' ',
+        src, 1
+    )
+
+
+def makeTree(root, copies, resources=RESOURCES):
+    for i in range(copies):
+        # 每份放在不同的包中, 避免同名类互相覆盖
+        directory = os.path.join(root, 'p{0:04d}'.format(i))
+        os.makedirs(directory)
+        for filename in resources:
+            name = os.path.join(directory, os.path.basename(filename))
+            with open(name, 'wb') as f:
+                f.write(renamePackage(load(filename), 'p{0}'.format(i)))
+
+
+def timed(function, *args):
+    start = time.time()
+    result = function(*args)
+    return time.time() - start, result
+
+
+def parseTime(builder, src, repeat):
+    # 解析 repeat 次, 取最短的时间
+    best = None
+    for _ in range(repeat):
+        start = time.time()
+        builder.parsePackage(src)
+        elapsed = time.time() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def reachableSize(root):
+    # 从 root 可达的所有对象的大小, 每个对象只计一次
+    seen = set()
+    size = 0
+    pending = [root]
+    while pending:
+        obj = pending.pop()
+        if id(obj) in seen:
+            continue
+        seen.add(id(obj))
+        size += sys.getsizeof(obj)
+        pending.extend(
+            ref for ref in gc.get_referents(obj)
+            if not isinstance(ref, type) and id(ref) not in seen
+        )
+    return size
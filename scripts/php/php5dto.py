@@ -15,6 +15,10 @@ if len(sys.argv) > 3:
 else:
     sys.exit("Script required three arguments: <source> <destination> <template>")
 
+# attributes the template reads besides the parsed ones
+asModel.extend(asModel.ASVariable, 'init', 'capitalize')
+asModel.extend(asModel.ASClass, 'objects', 'collections', 'properties')
+
 builder = asBuilder.Builder()
 builder.addSource(src)
 
@@ -14,7 +14,7 @@ import sys
 try:
     from setuptools import setup
     kw = {
-        'install_requires': 'pyparsing >= 1.4',
+        'install_requires': 'pyparsing >= 2.2.2',
     }
 except ImportError:
     from distutils.core import setup
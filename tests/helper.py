@@ -7,9 +7,16 @@ import unittest
 sys.path.append(os.path.abspath('./'))
 from asdox import asModel,asBuilder
 
+# ASDOX_TEST_DISPATCH=1 runs the suite against the keyword-dispatched grammar,
+# ASDOX_TEST_BACKEND=descent against the hand-written parser
+BUILDER_OPTIONS = {
+    'dispatch': bool(os.environ.get('ASDOX_TEST_DISPATCH')),
+    'backend': os.environ.get('ASDOX_TEST_BACKEND', 'pyparsing'),
+}
+
 class BaseTestCase(unittest.TestCase):
     def setUp(self):
-        self.builder = asBuilder.Builder()
+        self.builder = asBuilder.Builder(**BUILDER_OPTIONS)
 
     def tearDown(self):
         pass
@@ -1,8 +1,11 @@
 #!/usr/bin/env python
 #encoding=utf-8
 
+import os
+import shutil
+import tempfile
 import unittest
-from helper import BaseTestCase
+from helper import BaseTestCase, BUILDER_OPTIONS
 
 class BuilderTestCase(BaseTestCase):
 
@@ -34,6 +37,35 @@ class BuilderTestCase(BaseTestCase):
         self.assertEqual(pkg.classes["MyOtherClass"].name, "MyOtherClass")
         self.assertEqual(pkg.classes["MyOtherClass"].visibility, "public")
 
+    def testMergeImports(self):
+        '''
+        Merge the imports of files in the same package in order
+        '''
+        def add(clsname, *imports):
+            self.builder.addSource(
+                "package com.gurufaction { %s class %s { } }" % (
+                    ''.join('import %s; ' % name for name in imports), clsname
+                )
+            )
+
+        def imports():
+            pkg = self.builder.packages["com.gurufaction"]
+            return [imp.name for imp in pkg.imports]
+
+        add('A', 'flash.events.Event', 'mx.core.*')
+        add('B', 'mx.core.*', 'flash.display.Sprite', 'flash.events.Event',
+            'flash.display.Sprite')
+        self.assertEqual(imports(), [
+            'flash.events.Event', 'mx.core.*', 'flash.display.Sprite'
+        ])
+        # 包被替换后按新的导入去重
+        self.builder.packages = {}
+        add('C', 'flash.utils.Timer')
+        add('D', 'mx.core.*', 'flash.utils.Timer')
+        self.assertEqual(imports(), ['flash.utils.Timer', 'mx.core.*'])
+        pkg = self.builder.packages["com.gurufaction"]
+        self.assertEqual(sorted(pkg.classes.keys()), ['C', 'D'])
+
     def testAddSourceDir(self):
         '''
         Parse directory for source files
@@ -46,3 +78,194 @@ class BuilderTestCase(BaseTestCase):
         self.assertEqual(cls1.visibility, "internal")
         self.assertEqual(cls2.name, "MyClassFile2")
         self.assertEqual(cls2.visibility, "internal")
+
+    def testAddSourceDirParallel(self):
+        '''
+        Parse directory for source files in worker processes
+        '''
+        from asdox import asBuilder
+        serial = self.builder
+        serial.addSource("tests/resources", "Filter*.as")
+        parallel = asBuilder.Builder(workers=2)
+        parallel.addSource("tests/resources", "Filter*.as")
+        self.assertEqual(
+            sorted(serial.packages.keys()),
+            sorted(parallel.packages.keys())
+        )
+        for name, pkg in serial.packages.items():
+            other = parallel.packages[name]
+            self.assertEqual(
+                list(map(lambda imp: imp.name, pkg.imports)),
+                list(map(lambda imp: imp.name, other.imports))
+            )
+            self.assertEqual(
+                sorted(pkg.classes.keys()), sorted(other.classes.keys())
+            )
+            for cls in pkg.classes.values():
+                self.assertEqual(
+                    sorted(cls.variables.keys()),
+                    sorted(other.classes[cls.name].variables.keys())
+                )
+                self.assertEqual(
+                    sorted(cls.methods.keys()),
+                    sorted(other.classes[cls.name].methods.keys())
+                )
+
+    def testParseErrorParallel(self):
+        '''
+        A file that does not parse is reported the same way in parallel
+        '''
+        import sys
+        from StringIO import StringIO
+        from asdox import asBuilder
+        path = tempfile.mkdtemp(prefix='asdox-test-')
+        try:
+            with open(os.path.join(path, 'Good.as'), 'w') as f:
+                f.write('package a { public class Good { } }')
+            with open(os.path.join(path, 'Bad.as'), 'w') as f:
+                f.write('package a { public class Bad {')
+            results = []
+            for workers in (1, 2):
+                builder = asBuilder.Builder(workers=workers, **BUILDER_OPTIONS)
+                stdout, sys.stdout = sys.stdout, StringIO()
+                try:
+                    builder.addSource(path)
+                finally:
+                    output, sys.stdout = sys.stdout.getvalue(), stdout
+                results.append((
+                    output, sorted(builder.manifest),
+                    sorted(builder.packages['a'].classes)
+                ))
+            self.assertEqual(results[0], results[1])
+            output, manifest, classes = results[0]
+            self.assertTrue(output.startswith(
+                'Caught Exception in {0} @('.format(
+                    os.path.join(path, 'Bad.as'))))
+            self.assertEqual(len(manifest), 2)
+            self.assertEqual(classes, ['Good'])
+        finally:
+            shutil.rmtree(path)
+
+    def testIterParse(self):
+        '''
+        Iterate over parsed files without keeping them in the builder
+        '''
+        results = list(self.builder.iterParse("tests/resources/com/gurufaction"))
+        self.assertEqual(
+            sorted(os.path.basename(path) for path, pkg in results),
+            ['asFile1.as', 'asFile2.as']
+        )
+        classes = set()
+        for path, pkg in results:
+            self.assertEqual(pkg.name, "com.gurufaction")
+            classes.update(pkg.classes.keys())
+        self.assertEqual(classes, set(['MyClassFile1', 'MyClassFile2']))
+        self.assertEqual(self.builder.packages, {})
+        self.assertEqual(self.builder.manifest, {})
+
+    def testRebuild(self):
+        '''
+        Rebuild only the files that were added, changed or removed
+        '''
+        def write(name, clsname):
+            with open(os.path.join(path, name), 'w') as f:
+                f.write("package com.gurufaction { class %s { } }" % clsname)
+
+        path = tempfile.mkdtemp()
+        try:
+            write('A.as', 'A')
+            write('B.as', 'B')
+            write('C.as', 'C')
+            self.builder.addSource(path)
+            pkg = self.builder.packages["com.gurufaction"]
+            self.assertEqual(sorted(pkg.classes.keys()), ['A', 'B', 'C'])
+            self.assertEqual(len(self.builder.manifest), 3)
+
+            b = pkg.classes['B']
+            write('A.as', 'A2')
+            os.remove(os.path.join(path, 'C.as'))
+            write('D.as', 'D')
+            # 只修改 mtime 的文件不重新解析
+            os.utime(os.path.join(path, 'B.as'), (0, 0))
+            changed = self.builder.rebuild(path)
+            self.assertEqual(
+                sorted(map(os.path.basename, changed)), ['A.as', 'D.as']
+            )
+            self.assertEqual(sorted(pkg.classes.keys()), ['A2', 'B', 'D'])
+            self.assertTrue(pkg.classes['B'] is b)
+            self.assertEqual(self.builder.rebuild(path), [])
+        finally:
+            shutil.rmtree(path)
+
+
+class TokenPolicyTestCase(BaseTestCase):
+
+    SOURCE = """
+    package com.gurufaction {
+        import flash.events.Event;
+        [Bindable]
+        public class A {
+            { init(); }
+            public var v:String = "s";
+            public function f(x:int = 1):void { if (x) { g(); } }
+        }
+    }
+    """
+
+    def parse(self, tokens):
+        from asdox import asBuilder
+        options = dict(BUILDER_OPTIONS, tokens=tokens)
+        return asBuilder.Builder(**options).parsePackage(self.SOURCE)
+
+    def testFull(self):
+        method = self.parse('full').classes['A'].methods['f']
+        self.assertEqual(method.body_span, None)
+        self.assertEqual(list(method.toTokens())[-4:], ['{', 'g();', '}', '}'])
+
+    def testSignature(self):
+        pkg = self.parse('signature')
+        cls = pkg.classes['A']
+        method = cls.methods['f']
+        full = self.parse('full').classes['A']
+        # 方法体和略读模式一样只剩在源码中的位置
+        self.assertEqual(method.body, None)
+        start, end = method.body_span
+        self.assertEqual(self.SOURCE[start:end], '{ if (x) { g(); } }')
+        self.assertEqual(
+            list(method.toTokens()),
+            ['public', 'function', 'f', '(', 'x', ':', 'int', '=', '1', ')',
+             ':', 'void']
+        )
+        self.assertEqual(list(cls.toTokens())[:5], list(full.toTokens())[:5])
+        self.assertFalse([t for t in cls.raw_tokens if isinstance(t, list)])
+        self.assertEqual(
+            list(cls.variables['v'].toTokens()),
+            list(full.variables['v'].toTokens())
+        )
+
+    def testSignatureTabs(self):
+        from asdox import asBuilder
+        # 非略读模式解析的是 Tab 展开后的源码, 位置要换算回来
+        source = self.SOURCE.replace('    ', '\t').replace(
+            'void { if', 'void\t/* c */\t{\tif')
+        for skim in (False, True):
+            options = dict(BUILDER_OPTIONS, tokens='signature', skim=skim)
+            pkg = asBuilder.Builder(**options).parsePackage(source)
+            start, end = pkg.classes['A'].methods['f'].body_span
+            self.assertEqual(source[start:end], '{\tif (x) { g(); } }')
+
+    def testNone(self):
+        from asdox import asModel
+        pkg = self.parse('none')
+        cls = pkg.classes['A']
+        self.assertEqual(cls.methods['f'].body, None)
+        for node in (pkg, cls, cls.methods["f"], cls.variables["v"],
+                     pkg.imports[0], cls.metadata[0]):
+            self.assertEqual(node.raw_tokens, None)
+            self.assertRaises(
+                asModel.TokensNotRetained, list, node.toTokens()
+            )
+
+    def testUnknownPolicy(self):
+        from asdox import asBuilder
+        self.assertRaises(ValueError, asBuilder.Builder, tokens='some')
@@ -0,0 +1,99 @@
+#!/usr/bin/env python
+# encoding=utf-8
+
+import os
+import shutil
+import tempfile
+import unittest
+from helper import BaseTestCase
+from asdox import asBuilder, asGrammar
+from asdox.asCache import ParseCache
+
+SOURCE = """
+package com.gurufaction.asdox
+{
+    import flash.events.Event;
+    public class MyClass
+    {
+        public var name:String;
+        public function sayHi():String
+        {
+            return "hi";
+        }
+    }
+}
+"""
+
+
+class ParseCacheTestCase(BaseTestCase):
+
+    def setUp(self):
+        self.path = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.path)
+
+    def testHitAfterMiss(self):
+        builder = asBuilder.Builder(cache=self.path)
+        builder.addSource(SOURCE)
+        self.assertEqual(builder.cache.stats()['hits'], 0)
+        self.assertEqual(builder.cache.stats()['misses'], 1)
+        # 新的 Builder 从磁盘缓存中读取
+        builder = asBuilder.Builder(cache=ParseCache(self.path))
+        builder.addSource(SOURCE)
+        self.assertEqual(builder.cache.hits, 1)
+        self.assertEqual(builder.cache.misses, 0)
+        cls = builder.packages["com.gurufaction.asdox"].classes["MyClass"]
+        self.assertEqual(cls.variables["name"].type_, "String")
+        self.assertEqual(cls.methods["sayHi"].return_type, "String")
+
+    def testChangedSourceMisses(self):
+        builder = asBuilder.Builder(cache=self.path)
+        builder.addSource(SOURCE)
+        builder.addSource(SOURCE.replace("MyClass", "MyOtherClass"))
+        self.assertEqual(builder.cache.misses, 2)
+        self.assertEqual(
+            sorted(builder.packages["com.gurufaction.asdox"].classes.keys()),
+            ["MyClass", "MyOtherClass"]
+        )
+
+    def testCorruptEntryIsMiss(self):
+        cache = ParseCache(self.path)
+        builder = asBuilder.Builder(cache=cache)
+        key = cache.key(SOURCE, builder._cacheTag())
+        builder.addSource(SOURCE)
+        with open(cache._filename(key), 'wb') as f:
+            f.write(b'garbage')
+        self.assertEqual(cache.get(key), None)
+        self.assertEqual(cache.misses, 2)
+
+    def testGrammarVersionInKey(self):
+        cache = ParseCache(self.path)
+        key = cache.key(SOURCE)
+        version = asGrammar.GRAMMAR_VERSION
+        asGrammar.GRAMMAR_VERSION = version + 1
+        try:
+            self.assertNotEqual(cache.key(SOURCE), key)
+        finally:
+            asGrammar.GRAMMAR_VERSION = version
+
+    def testEviction(self):
+        cache = ParseCache(self.path, max_size=1)
+        builder = asBuilder.Builder(cache=cache)
+        builder.addSource(SOURCE)
+        builder.addSource(SOURCE.replace("MyClass", "MyOtherClass"))
+        entries, total = cache._scan()
+        self.assertEqual(entries, [])
+        self.assertEqual(total, 0)
+
+    def testParallelWorkersShareCache(self):
+        builder = asBuilder.Builder(workers=2, cache=self.path)
+        builder.addSource("tests/resources", "Filter*.as")
+        self.assertEqual(builder.cache.misses, 2)
+        builder = asBuilder.Builder(workers=2, cache=self.path)
+        builder.addSource("tests/resources", "Filter*.as")
+        self.assertEqual(builder.cache.hits, 2)
+        self.assertEqual(
+            builder.packages["com.franklinconnections"].classes["Filter"].name,
+            "Filter"
+        )
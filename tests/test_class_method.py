@@ -2,7 +2,7 @@
 #encoding=utf-8
 
 import unittest
-from helper import BaseTestCase
+from helper import BaseTestCase, BUILDER_OPTIONS
 
 class ASMethodTestCase(BaseTestCase):
     "Test cases for class methods"
@@ -452,3 +452,68 @@ class ASMethodTestCase(BaseTestCase):
             cls.methods["setSelected"].arguments["value"].type_,
             "Boolean"
         )
+
+    def testSkimMethodBody(self):
+        '''
+        Skim mode records the span of method bodies instead of parsing them.
+        '''
+        from asdox import asBuilder
+        source = """
+        package com.gurufaction.asdox
+        {
+            /* A class; its comments are removed before parsing. */
+            public class MyClass
+            {
+                // Says hi.
+                public function sayHi(name:String):String
+                {
+                    if (name == "}") { return "{"; }  // braces in strings
+
+                    return /}/.test(name) ? "" : "Hi " + name;
+                }   /* trailing */
+                private var count:int;
+            }
+        }
+        """
+        builder = asBuilder.Builder(skim=True, **BUILDER_OPTIONS)
+        builder.addSource(source)
+        cls = builder.packages["com.gurufaction.asdox"].classes["MyClass"]
+        m = cls.methods["sayHi"]
+        self.assertEqual(m.return_type, "String")
+        self.assertEqual(m.arguments["name"].type_, "String")
+        self.assertEqual(m.body, None)
+        self.assertEqual(cls.variables["count"].type_, "int")
+        # 位置对应传入的源码
+        start, end = m.body_span
+        body = source[source.index("{", source.index("sayHi")):
+                      source.index("}   /*") + 1]
+        self.assertEqual(source[start:end], body)
+
+    def testLazyMethodBody(self):
+        '''
+        Method bodies are tokenized the first time their tokens are used.
+        '''
+        self.builder.addSource("""
+        package com.gurufaction.asdox
+        {
+            public class MyClass
+            {
+                public function sayHi():String
+                {
+                    if (ready) { return "Hi"; }
+                }
+            }
+        }
+        """)
+        pkg = self.builder.packages["com.gurufaction.asdox"]
+        body = pkg.classes["MyClass"].methods["sayHi"].body
+        self.assertEqual(body._raw_tokens, None)
+        self.assertEqual(
+            body.raw_tokens,
+            [['if', '(ready)', ['return', '"Hi"', ';']]]
+        )
+        self.assertTrue(body.raw_tokens is body.raw_tokens)
+        self.assertEqual(
+            list(body.toTokens()),
+            ['{', 'if', '(ready)', '{', 'return', '"Hi"', ';', '}', '}']
+        )
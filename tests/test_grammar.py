@@ -0,0 +1,136 @@
+#!/usr/bin/env python
+# encoding=utf-8
+
+import os
+import re
+import unittest
+from pyparsing import ParserElement
+from helper import BaseTestCase
+from asdox import asBuilder, asGrammar, asModel
+
+
+class SkipBlockTestCase(BaseTestCase):
+    "Test cases for the brace matching scan used by skim mode"
+
+    def assertSkips(self, source):
+        end = asGrammar.skipBlock(source, 0)
+        self.assertEqual(source[end:], '!')
+
+    def testNested(self):
+        self.assertSkips('{ if (a) { b(); } else { c(); } }!')
+
+    def testBracesInStrings(self):
+        self.assertSkips('{ s = "}"; t = \'{\'; u = "\\"}"; }!')
+
+    def testBracesInComments(self):
+        self.assertSkips('{ // }\n /* } */ a = 1; }!')
+
+    def testBracesInRegex(self):
+        self.assertSkips('{ r = /[}]\\}/g; s = str.replace(/{/, ""); }!')
+
+    def testDivisionIsNotRegex(self):
+        self.assertSkips('{ a = b / c; d = (e) / 2 / f; }!')
+        self.assertSkips('{ return /}/.test(s); }!')
+
+    def testUnbalanced(self):
+        self.assertRaises(ValueError, asGrammar.skipBlock, '{ { }', 0)
+
+
+def dumpModel(obj):
+    "Reduce a parsed model to plain values so two parses can be compared"
+    if isinstance(obj, dict):
+        return dict((key, dumpModel(value)) for key, value in obj.items())
+    if isinstance(obj, (list, tuple)):
+        return [dumpModel(value) for value in obj]
+    if isinstance(obj, asModel.ASMetodBody):
+        return (obj.start, obj.end, obj.raw_tokens)
+    if isinstance(obj, asModel.ModelNode):
+        return (type(obj).__name__, dumpModel(obj.__getstate__()))
+    return obj
+
+
+class DispatchTestCase(BaseTestCase):
+    "The keyword-dispatched grammar must build the same models as the Or one"
+
+    RESOURCES = [
+        'tests/resources/Button.as',
+        'tests/resources/Filter.as',
+        'tests/resources/Filter2.as',
+        'tests/resources/com/gurufaction/asFile1.as',
+        'tests/resources/com/gurufaction/asFile2.as',
+        'tests/resources/mx/utils/StringUtil.as',
+    ]
+
+    def assertSameModel(self, src):
+        default = asBuilder.Builder().parsePackage(src)
+        dispatch = asBuilder.Builder(dispatch=True).parsePackage(src)
+        self.assertEqual(dumpModel(dispatch), dumpModel(default))
+
+    def testResources(self):
+        for filename in self.RESOURCES:
+            src = open(filename, 'rb').read()
+            # 语法还不支持包级别的 include
+            src = re.sub(r'(?m)^include .*\n', '', src)
+            self.assertSameModel(src)
+
+    def testMembers(self):
+        self.assertSameModel('''
+        package a {
+            public interface IFoo extends IBar {
+                import a.b.C;
+                function get foo():int;
+                function bar(x:int = 0x1F, y:Number = -1.5e3):void
+            }
+        }''')
+        self.assertSameModel('''
+        package a {
+            [Event(name="change", type="flash.events.Event")]
+            public dynamic class Foo extends Bar implements IFoo {
+                import a.b.*;
+                use namespace mx_internal;
+                include "Version.as";
+                { init(); }
+                [Bindable("]")] public static const A:String = "a";
+                mx_internal var b:Object = {x: 1};
+                private var c;
+                d = [];
+                [Inspectable] override protected function get e():int { }
+                static public function f(...rest):* { return 1; }
+            }
+        }''')
+
+
+class PackratTestCase(BaseTestCase):
+    "Memoized parsing is scoped to one file and builds the same models"
+
+    def testSameModel(self):
+        src = open('tests/resources/Filter.as', 'rb').read()
+        default = asBuilder.Builder().parsePackage(src)
+        builder = asBuilder.Builder(packrat=64)
+        self.assertEqual(
+            dumpModel(builder.parsePackage(src)), dumpModel(default)
+        )
+        hits, misses = builder.packrat_stats
+        self.assertTrue(hits > 0 and misses > 0)
+
+    def testScoped(self):
+        builder = asBuilder.Builder(packrat=64)
+        builder.addSource('tests/resources/Filter.as')
+        builder.addSource('tests/resources/Filter2.as')
+        self.assertEqual(
+            sorted(os.path.basename(path) for path in builder.packratStats()),
+            ['Filter.as', 'Filter2.as']
+        )
+        # 解析结束后恢复 pyparsing 原来的设置并丢弃缓存
+        self.assertFalse(ParserElement._packratEnabled)
+        self.assertEqual(len(ParserElement.packrat_cache), 0)
+
+    def testUnsupportedPyparsing(self):
+        # 模拟缺少 packrat_cache_stats 的旧版本 pyparsing
+        stats = ParserElement.__dict__['packrat_cache_stats']
+        del ParserElement.packrat_cache_stats
+        try:
+            self.assertRaises(ValueError, asBuilder.Builder, packrat=64)
+            asBuilder.Builder()
+        finally:
+            ParserElement.packrat_cache_stats = stats
@@ -0,0 +1,289 @@
+#!/usr/bin/env python
+# encoding=utf-8
+
+import unittest
+from helper import BaseTestCase
+
+SOURCES = [
+    """
+    package a
+    {
+        public interface IBase
+        {
+            function run():void;
+        }
+    }
+    """,
+    """
+    package a
+    {
+        public interface IExtra
+        {
+        }
+    }
+    """,
+    """
+    package a
+    {
+        public class Base implements IBase
+        {
+            public var id:int;
+            private var secret:String;
+            public static var count:int;
+            public function Base()
+            {
+            }
+            public function run():void
+            {
+            }
+            public function get label():String
+            {
+                return "";
+            }
+            private function hidden():void
+            {
+            }
+        }
+    }
+    """,
+    """
+    package a
+    {
+        public class Middle extends Base
+        {
+            public var name:String;
+            override public function run():void
+            {
+            }
+        }
+    }
+    """,
+    """
+    package b
+    {
+        import a.Middle;
+        import a.IExtra;
+        public class Leaf extends Middle implements IExtra
+        {
+            public var size:Number;
+            public function Leaf()
+            {
+            }
+            public function run():void
+            {
+            }
+            override public function get label():String
+            {
+                return "leaf";
+            }
+            override public function stop():void
+            {
+            }
+            private function hidden():void
+            {
+            }
+        }
+    }
+    """,
+]
+
+
+class ClassHierarchyTestCase(BaseTestCase):
+
+    def setUp(self):
+        BaseTestCase.setUp(self)
+        for src in SOURCES:
+            self.builder.addSource(src)
+        self.base = self.builder.packages['a'].classes['Base']
+        self.middle = self.builder.packages['a'].classes['Middle']
+        self.leaf = self.builder.packages['b'].classes['Leaf']
+
+    def testAncestors(self):
+        hierarchy = self.builder.hierarchy()
+        self.assertEqual(hierarchy.ancestors(self.leaf), [self.middle, self.base])
+        self.assertEqual(hierarchy.superclassName(self.base), None)
+
+    def testMembers(self):
+        hierarchy = self.builder.hierarchy()
+        self.assertEqual(
+            sorted(hierarchy.members(self.leaf, 'variables')),
+            ['id', 'name', 'size']
+        )
+        methods = hierarchy.members(self.leaf, 'methods')
+        self.assertEqual(sorted(methods), ['Leaf', 'hidden', 'run', 'stop'])
+        self.assertTrue(methods['run'] is self.leaf.methods['run'])
+        self.assertTrue(
+            hierarchy.members(self.middle, 'methods')['run']
+            is self.middle.methods['run']
+        )
+        self.assertEqual(
+            list(hierarchy.members(self.leaf, 'getter_methods')), ['label']
+        )
+        # 缓存
+        self.assertTrue(hierarchy.members(self.leaf, 'methods') is methods)
+
+    def testInterfaces(self):
+        hierarchy = self.builder.hierarchy()
+        self.assertEqual(hierarchy.interfaces(self.leaf), ['a.IExtra', 'a.IBase'])
+        self.assertEqual(hierarchy.interfaces(self.middle), ['a.IBase'])
+
+    def testOverrides(self):
+        hierarchy = self.builder.hierarchy()
+        overrides = hierarchy.overrides(self.leaf)
+        self.assertEqual(
+            sorted(overrides),
+            [('getter_methods', 'label'), ('methods', 'run')]
+        )
+        self.assertTrue(
+            overrides[('methods', 'run')] is self.middle.methods['run']
+        )
+        self.assertEqual(
+            hierarchy.overrideMismatches(self.leaf),
+            [('methods', 'run'), ('methods', 'stop')]
+        )
+        self.assertEqual(hierarchy.overrideMismatches(self.middle), [])
+
+    def testUnparsedSuperclass(self):
+        self.builder.addSource("""
+        package c
+        {
+            import flash.display.Sprite;
+            public class View extends Sprite
+            {
+                override public function toString():String
+                {
+                    return "";
+                }
+            }
+        }
+        """)
+        hierarchy = self.builder.hierarchy()
+        view = self.builder.packages['c'].classes['View']
+        self.assertEqual(hierarchy.superclassName(view), 'flash.display.Sprite')
+        self.assertEqual(hierarchy.superclass(view), None)
+        # 基类没有解析, 无法判断 override 是否多余
+        self.assertEqual(hierarchy.overrideMismatches(view), [])
+
+    def testInvalidate(self):
+        hierarchy = self.builder.hierarchy()
+        hierarchy.members(self.leaf, 'variables')
+        hierarchy.members(self.base, 'variables')
+        self.builder.addSource("""
+        package a
+        {
+            public class Middle extends Base
+            {
+                public var title:String;
+            }
+        }
+        """)
+        self.assertTrue(self.builder.hierarchy() is hierarchy)
+        self.assertTrue(('a.Base', 'variables') in hierarchy._members)
+        self.assertFalse(('b.Leaf', 'variables') in hierarchy._members)
+        self.assertEqual(
+            sorted(hierarchy.members(self.leaf, 'variables')),
+            ['id', 'size', 'title']
+        )
+
+    def testInterfaceExtends(self):
+        self.builder.addSource("""
+        package f
+        {
+            public interface IBar
+            {
+            }
+        }
+        """)
+        self.builder.addSource("""
+        package f
+        {
+            import a.IExtra;
+            public interface IFoo extends IBar, IExtra
+            {
+                function foo():void;
+            }
+        }
+        """)
+        self.builder.addSource("""
+        package f
+        {
+            public class C implements IFoo
+            {
+                public function foo():void
+                {
+                }
+            }
+        }
+        """)
+        hierarchy = self.builder.hierarchy()
+        foo = self.builder.packages['f'].interfaces['IFoo']
+        self.assertEqual(foo.implements, ['IBar', 'IExtra'])
+        self.assertEqual(self.builder.symbols().implementsOf(foo),
+                         ['f.IBar', 'a.IExtra'])
+        cls = self.builder.packages['f'].classes['C']
+        self.assertEqual(hierarchy.interfaces(cls),
+                         ['f.IFoo', 'f.IBar', 'a.IExtra'])
+
+    def testSuperclassAddedLater(self):
+        self.builder.addSource("""
+        package e
+        {
+            public class Child extends Parent implements IParent
+            {
+                public var child:int;
+            }
+        }
+        """)
+        hierarchy = self.builder.hierarchy()
+        child = self.builder.packages['e'].classes['Child']
+        self.assertEqual(list(hierarchy.members(child, 'variables')), ['child'])
+        self.assertEqual(hierarchy.interfaces(child), [])
+        self.builder.addSource("""
+        package e
+        {
+            public class Parent
+            {
+                public var parent:int;
+            }
+        }
+        """)
+        self.builder.addSource("""
+        package e
+        {
+            public interface IParent
+            {
+            }
+        }
+        """)
+        self.assertEqual(
+            sorted(hierarchy.members(child, 'variables')), ['child', 'parent']
+        )
+        self.assertEqual(hierarchy.interfaces(child), ['e.IParent'])
+
+    def testCycle(self):
+        self.builder.addSource("""
+        package d
+        {
+            public class X extends Y
+            {
+                public var x:int;
+            }
+        }
+        """)
+        self.builder.addSource("""
+        package d
+        {
+            public class Y extends X
+            {
+                public var y:int;
+            }
+        }
+        """)
+        hierarchy = self.builder.hierarchy()
+        x = self.builder.packages['d'].classes['X']
+        self.assertEqual(sorted(hierarchy.members(x, 'variables')), ['x', 'y'])
+        self.assertEqual(len(hierarchy.ancestors(x)), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,69 @@
+#!/usr/bin/env python
+# encoding=utf-8
+
+import os
+import shutil
+import tempfile
+import unittest
+from helper import BaseTestCase
+from test_grammar import dumpModel
+from asdox import asIndex, asModel
+
+
+class SymbolIndexTestCase(BaseTestCase):
+
+    def setUp(self):
+        BaseTestCase.setUp(self)
+        self.root = tempfile.mkdtemp(prefix='asdox-test-')
+        self.path = os.path.join(self.root, 'symbols.asdi')
+        for filename in ('Filter.as', 'Filter2.as', 'mx/utils/StringUtil.as'):
+            src = open(os.path.join('tests/resources', filename), 'rb').read()
+            self.builder.addSource(src)
+
+    def tearDown(self):
+        shutil.rmtree(self.root)
+
+    def testLookup(self):
+        self.builder.saveIndex(self.path)
+        expected = {}
+        for pkg in self.builder.packages.values():
+            for cls in list(pkg.classes.values()) + list(pkg.interfaces.values()):
+                expected[asIndex.qualifiedName(pkg.name, cls.name)] = cls
+        with asIndex.SymbolIndex(self.path) as index:
+            self.assertEqual(len(index), len(expected))
+            self.assertEqual(list(index.names()), sorted(expected))
+            for name, cls in expected.items():
+                self.assertTrue(name in index)
+                self.assertEqual(dumpModel(index[name]), dumpModel(cls))
+            self.assertEqual(list(index.names('mx.')), ['mx.utils.StringUtil'])
+            self.assertFalse('mx.utils' in index)
+            self.assertTrue(index.get('mx.utils.Missing') is None)
+            self.assertRaises(KeyError, index.__getitem__, 'Missing')
+
+    def testSortedLookup(self):
+        pkg = asModel.ASPackage('a')
+        for i in range(100):
+            name = 'C{0}'.format(i)
+            pkg.classes[name] = asModel.ASClass(name)
+        asIndex.write(self.path, {'a': pkg, '': asModel.ASPackage('')})
+        with asIndex.SymbolIndex(self.path) as index:
+            for i in range(100):
+                self.assertEqual(index['a.C{0}'.format(i)].name, 'C{0}'.format(i))
+            self.assertFalse('a.C100' in index)
+            self.assertFalse('a' in index)
+
+    def testEmpty(self):
+        asIndex.write(self.path, {})
+        with asIndex.SymbolIndex(self.path) as index:
+            self.assertEqual(len(index), 0)
+            self.assertFalse('A' in index)
+            self.assertEqual(list(index.names()), [])
+
+    def testBadHeader(self):
+        with open(self.path, 'wb') as f:
+            f.write('ASDS' + '\0' * 8)
+        self.assertRaises(ValueError, asIndex.SymbolIndex, self.path)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,212 @@
+#!/usr/bin/env python
+# encoding=utf-8
+
+import os
+import shutil
+import tempfile
+import unittest
+from helper import BaseTestCase, BUILDER_OPTIONS
+from test_grammar import dumpModel
+from asdox import asBuilder, asSnapshot
+
+FILES = [
+    ('com/example/A.as', """
+        package com.example
+        {
+            import flash.events.Event;
+            [Bindable]
+            public class A extends B
+            {
+                public function a():void { }
+            }
+        }
+    """),
+    ('com/example/B.as', """
+        package com.example
+        {
+            import mx.core.*;
+            import flash.events.Event;
+            public class B
+            {
+                public function b():void { }
+            }
+        }
+    """),
+    ('com/other/C.as', """
+        package com.other
+        {
+            [Table(name="c")]
+            public class C
+            {
+            }
+        }
+    """),
+    ('com/example/D.as', """
+        package com.example
+        {
+            import flash.utils.Timer;
+            public class D
+            {
+            }
+        }
+    """),
+    ('E.as', """
+        package
+        {
+            public class E
+            {
+            }
+        }
+    """),
+]
+
+DUPLICATE = """
+    package com.example
+    {
+        public class Dup
+        {
+            public var %s:int;
+        }
+    }
+"""
+
+
+class MergeTestCase(BaseTestCase):
+
+    def setUp(self):
+        BaseTestCase.setUp(self)
+        self.root = tempfile.mkdtemp(prefix='asdox-test-')
+        self.paths = [self.write(name, src) for name, src in FILES]
+
+    def tearDown(self):
+        shutil.rmtree(self.root)
+
+    def write(self, name, src, mtime=None):
+        path = os.path.join(self.root, *name.split('/'))
+        if not os.path.isdir(os.path.dirname(path)):
+            os.makedirs(os.path.dirname(path))
+        with open(path, 'wb') as f:
+            f.write(src)
+        if mtime is not None:
+            os.utime(path, (mtime, mtime))
+        return path
+
+    def build(self, paths):
+        builder = asBuilder.Builder(**BUILDER_OPTIONS)
+        for path in paths:
+            builder.addSource(path)
+        return builder
+
+    def assertSameBuild(self, builder, expected):
+        self.assertEqual(dumpModel(builder.packages),
+                         dumpModel(expected.packages))
+        self.assertEqual(
+            [imp.name for imp in builder.packages['com.example'].imports],
+            [imp.name for imp in expected.packages['com.example'].imports]
+        )
+        self.assertEqual(sorted(builder.manifest), sorted(expected.manifest))
+        self.assertEqual(builder._owners, expected._owners)
+        self.assertEqual(
+            sorted(cls.name for cls, member, tag in
+                   builder.metatags.find('Bindable')),
+            ['A']
+        )
+        self.assertEqual(len(builder.metatags.find('Table', 'name', 'c')), 1)
+
+    def testShards(self):
+        expected = self.build(self.paths)
+        for sizes in ((1, 3, 1), (3, 1, 1), (1, 1, 3)):
+            shards = []
+            start = 0
+            for size in sizes:
+                shards.append(self.build(self.paths[start:start + size]))
+                start += size
+            builder = self.build([]).mergeAll(shards)
+            self.assertSameBuild(builder, expected)
+            for shard in shards:
+                self.assertEqual(shard.packages, {})
+                self.assertEqual(shard.manifest, {})
+
+    def testSnapshot(self):
+        expected = self.build(self.paths)
+        path = os.path.join(self.root, 'shard.snapshot')
+        self.build(self.paths[2:]).save(path)
+        builder = self.build(self.paths[:2]).merge(path)
+        self.assertSameBuild(builder, expected)
+        builder = self.build(self.paths[:2])
+        builder.merge(asSnapshot.Snapshot(path))
+        self.assertSameBuild(builder, expected)
+
+    def testHierarchy(self):
+        builder = self.build(self.paths[:1])
+        cls = builder.packages['com.example'].classes['A']
+        self.assertEqual(sorted(builder.hierarchy().members(cls)), ['a'])
+        builder.merge(self.build(self.paths[1:2]))
+        self.assertEqual(sorted(builder.hierarchy().members(cls)), ['a', 'b'])
+
+    def testDuplicateClass(self):
+        first = self.write('one/Dup.as', DUPLICATE % 'first')
+        second = self.write('two/Dup.as', DUPLICATE % 'second')
+        # 不同文件中的同名类: merge 的另一方获胜, 与两方的大小无关
+        for small, large in ((True, False), (False, True)):
+            mine = [first] + (self.paths if large else [])
+            theirs = [second] + (self.paths if small else [])
+            builder = self.build(mine).merge(self.build(theirs))
+            dup = builder.packages['com.example'].classes['Dup']
+            self.assertEqual(list(dup.variables), ['second'])
+            self.assertEqual(builder._owners[('com.example', 'classes', 'Dup')],
+                             second)
+            # 被覆盖的类不随原来的文件一起移除
+            builder.removeFile(first)
+            self.assertTrue('Dup' in builder.packages['com.example'].classes)
+
+    def versions(self, first, second):
+        # 同一文件的两个版本, 分别由两个 Builder 解析
+        path = self.write('Shared.as', DUPLICATE % first[0], first[1])
+        one = self.build([path])
+        self.write('Shared.as', DUPLICATE % second[0], second[1])
+        two = self.build([path])
+        return path, one, two
+
+    def mergeBothWays(self, first, second):
+        # 较大的一方分别在 merge 的两边, 这一方总是解析 first 的版本
+        path, mine, theirs = self.versions(first, second)
+        yield self.build(self.paths).merge(mine).merge(theirs)
+        path, mine, theirs = self.versions(first, second)
+        yield mine.merge(self.build(self.paths).merge(theirs))
+
+    def testSameFile(self):
+        # mtime 较新的版本获胜, 不论在哪一方
+        path = os.path.join(self.root, 'Shared.as')
+        for first, second in ((('old', 1000), ('new', 2000)),
+                              (('new', 2000), ('old', 1000))):
+            for builder in self.mergeBothWays(first, second):
+                dup = builder.packages['com.example'].classes['Dup']
+                self.assertEqual(list(dup.variables), ['new'])
+                self.assertEqual(builder.manifest[path].mtime, 2000)
+                self.assertEqual(len(builder.manifest), len(self.paths) + 1)
+
+    def testStaleClasses(self):
+        # 新版本中不再有的类被移除
+        path = self.write('Shared.as', DUPLICATE % 'old', 1000)
+        older = self.build([path])
+        self.write('Shared.as', DUPLICATE.replace('Dup', 'Renamed') % 'new',
+                   2000)
+        newer = self.build([path])
+        builder = self.build(self.paths).merge(older).merge(newer)
+        classes = builder.packages['com.example'].classes
+        self.assertTrue('Renamed' in classes)
+        self.assertFalse('Dup' in classes)
+
+    def testSameMtime(self):
+        # mtime 相同而内容不同时保留 merge 这一方的版本
+        for builder in self.mergeBothWays(('mine', 1000), ('theirs', 1000)):
+            dup = builder.packages['com.example'].classes['Dup']
+            self.assertEqual(list(dup.variables), ['mine'])
+
+    def testMergeSelf(self):
+        self.assertRaises(ValueError, self.builder.merge, self.builder)
+
+
+if __name__ == '__main__':
+    unittest.main()
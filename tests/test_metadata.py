@@ -0,0 +1,118 @@
+#!/usr/bin/env python
+# encoding=utf-8
+
+import os
+import shutil
+import tempfile
+import unittest
+from helper import BaseTestCase
+from asdox import asMetadata
+
+SOURCE = """
+package vo
+{
+    [Entity(table="users")]
+    [Bindable]
+    public class User
+    {
+        [Id]
+        [Column(name="user_id", type="integer")]
+        public var id:int;
+
+        [Column(length="40")]
+        public var name:String;
+
+        [ValueObject]
+        public var address:Address;
+
+        [ValueObjectCollection(type="Order")]
+        public var orders:Array;
+
+        public var plain:String;
+
+        [Bindable(event="change")]
+        public function get label():String
+        {
+            return name;
+        }
+    }
+}
+"""
+
+
+class MetadataIndexTestCase(BaseTestCase):
+
+    def setUp(self):
+        BaseTestCase.setUp(self)
+        self.root = tempfile.mkdtemp(prefix='asdox-test-')
+        self.path = os.path.join(self.root, 'User.as')
+        with open(self.path, 'w') as f:
+            f.write(SOURCE)
+        self.builder.addSource(self.path)
+        self.cls = self.builder.packages['vo'].classes['User']
+
+    def tearDown(self):
+        shutil.rmtree(self.root)
+
+    def members(self, *args):
+        return sorted(
+            member.name if member is not None else None
+            for cls, member, tag in self.builder.metatags.find(*args)
+        )
+
+    def testFind(self):
+        self.assertEqual(self.members('Column'), ['id', 'name'])
+        self.assertEqual(self.members('Column', 'name'), ['id'])
+        self.assertEqual(self.members('Column', 'name', 'user_id'), ['id'])
+        self.assertEqual(self.members('Column', 'name', 'other'), [])
+        self.assertEqual(self.members('ValueObject'), ['address'])
+        self.assertEqual(
+            self.members('ValueObjectCollection', 'type', 'Order'), ['orders']
+        )
+        self.assertEqual(self.members('Bindable'), [None, 'label'])
+        self.assertEqual(self.members('Missing'), [])
+        cls, member, tag = self.builder.metatags.find('Entity')[0]
+        self.assertTrue(cls is self.cls)
+        self.assertEqual(member, None)
+        self.assertEqual(tag.params['table'], 'users')
+
+    def testNames(self):
+        self.assertEqual(
+            self.builder.metatags.names(),
+            ['Bindable', 'Column', 'Entity', 'Id',
+             'ValueObject', 'ValueObjectCollection']
+        )
+
+    def testReparse(self):
+        with open(self.path, 'w') as f:
+            f.write(SOURCE.replace('[Id]', '').replace('[ValueObject]', ''))
+        # mtime 的精度可能不够, 直接重新加入文件
+        self.builder.addSource(self.path)
+        self.assertEqual(self.members('Id'), [])
+        self.assertEqual(self.members('ValueObject'), [])
+        self.assertEqual(self.members('Column'), ['id', 'name'])
+        self.assertFalse('Id' in self.builder.metatags.names())
+        self.builder.removeFile(self.path)
+        self.assertEqual(self.builder.metatags.names(), [])
+
+    def testUpdate(self):
+        other = asMetadata.MetadataIndex()
+        other.addPackage(self.builder.parsePackage(
+            SOURCE.replace('[Id]', '').replace('public class User',
+                                               'public class Account')
+        ))
+        index = self.builder.metatags
+        # vo.Missing 两边都没有, vo.Account 只取一次
+        index.update(other, ['vo.User', 'vo.Missing'])
+        self.assertEqual(index.find('Id'), [])
+        self.assertEqual(index.find('Entity'), [])
+        index.update(other, ['vo.Account'])
+        self.assertEqual(
+            [cls.name for cls, member, tag in index.find('Entity')],
+            ['Account']
+        )
+        self.assertEqual(self.members('Column', 'name'), ['id'])
+
+
+if __name__ == '__main__':
+    unittest.main()
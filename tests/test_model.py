@@ -0,0 +1,120 @@
+#!/usr/bin/env python
+# encoding=utf-8
+
+import pickle
+import unittest
+from helper import BaseTestCase
+from asdox import asModel
+
+
+class SlotsTestCase(BaseTestCase):
+
+    SOURCE = """
+    package com.gurufaction {
+        [Bindable]
+        public class A {
+            public var v:String = "s";
+            public function f(x:int = 1):void { g(); }
+        }
+    }
+    """
+
+    def testNoDict(self):
+        pkg = self.builder.parsePackage(self.SOURCE)
+        cls = pkg.classes['A']
+        for node in (pkg, cls, cls.variables['v'], cls.methods['f'],
+                     cls.methods['f'].arguments['x'], cls.metadata[0]):
+            self.assertFalse(hasattr(node, '__dict__'))
+        self.assertRaises(AttributeError, setattr, cls, 'undeclared', 1)
+
+    def testPickle(self):
+        pkg = self.builder.parsePackage(self.SOURCE)
+        body = pkg.classes['A'].methods['f'].body
+        for protocol in range(pickle.HIGHEST_PROTOCOL + 1):
+            copy = pickle.loads(pickle.dumps(pkg, protocol))
+            method = copy.classes['A'].methods['f']
+            self.assertEqual(method.arguments['x'].type_, 'int')
+            self.assertEqual(copy.classes['A'].metadata[0].name, 'Bindable')
+            # 序列化不会触发方法体的解析
+            self.assertEqual(body._raw_tokens, None)
+            self.assertEqual(method.body._raw_tokens, None)
+            self.assertEqual(
+                list(method.body.toTokens()), ['{', 'g();', '}']
+            )
+
+
+class ExtendedVariable(asModel.ASVariable):
+    # 只在这里注册扩展属性, 不影响 ASVariable
+    __slots__ = ()
+
+
+class ExtensionTestCase(unittest.TestCase):
+
+    def testExtend(self):
+        asModel.extend(ExtendedVariable, 'init', 'capitalize')
+        node = ExtendedVariable('v')
+        self.assertRaises(AttributeError, getattr, node, 'init')
+        node.init = '0'
+        self.assertEqual(node.init, '0')
+        copy = pickle.loads(pickle.dumps(node, pickle.HIGHEST_PROTOCOL))
+        self.assertEqual(copy.init, '0')
+        del node.init
+        self.assertFalse(hasattr(node, 'init'))
+        # 重复注册没有影响, 其他类不受影响
+        asModel.extend(ExtendedVariable, 'init')
+        self.assertRaises(AttributeError, setattr,
+                          asModel.ASVariable('w'), 'capitalize', 'W')
+
+    def testExtendExisting(self):
+        self.assertRaises(ValueError, asModel.extend, ExtendedVariable, 'name')
+        self.assertRaises(ValueError, asModel.extend, ExtendedVariable, 'toTokens')
+
+
+class InternTestCase(BaseTestCase):
+
+    def parse(self, name):
+        return self.builder.parsePackage("""
+        package com.gurufaction {
+            [Event(name="change")]
+            public class %s extends Base implements IBase {
+                public var items:mx.collections.ArrayCollection;
+                public function get count():int { return 0; }
+            }
+        }
+        """ % name)
+
+    def testShared(self):
+        a = self.parse('A').classes['A']
+        b = self.parse('B').classes['B']
+        self.assertTrue(a.extends is b.extends)
+        self.assertTrue(a.implements[0] is b.implements[0])
+        self.assertTrue(a.visibility is b.visibility)
+        self.assertTrue(
+            a.variables['items'].type_ is b.variables['items'].type_
+        )
+        self.assertTrue(
+            a.getter_methods['count'].name is b.getter_methods['count'].name
+        )
+        self.assertTrue(a.metadata[0].name is b.metadata[0].name)
+        self.assertTrue(
+            list(a.metadata[0].params)[0] is list(b.metadata[0].params)[0]
+        )
+
+    def testUnpickled(self):
+        a = self.parse('A').classes['A']
+        copy = pickle.loads(pickle.dumps(a, pickle.HIGHEST_PROTOCOL))
+        self.assertTrue(copy.extends is a.extends)
+        self.assertTrue(
+            copy.variables['items'].type_ is a.variables['items'].type_
+        )
+
+    def testStringTable(self):
+        table = asModel.StringTable()
+        first = table.intern(''.join(['St', 'ring']))
+        second = table.intern(''.join(['Str', 'ing']))
+        self.assertTrue(first is second)
+        self.assertEqual(table.internAll(['int', 'String']), ['int', 'String'])
+        self.assertEqual(len(table), 2)
+        self.assertEqual(table.lookups, 4)
+        table.clear()
+        self.assertEqual((len(table), table.lookups), (0, 0))
@@ -0,0 +1,122 @@
+#!/usr/bin/env python
+# encoding=utf-8
+
+import os
+import shutil
+import tempfile
+import unittest
+from helper import BaseTestCase
+from asdox import asBuilder, asModel
+
+VIEW = """<?xml version="1.0" encoding="utf-8"?>
+<mx:Canvas xmlns:mx="http://www.adobe.com/2006/mxml">
+    <!-- <mx:Script>var commented:int;</mx:Script> -->
+    <mx:Script>
+        <![CDATA[
+            import mx.controls.Alert;
+            // import not.Imported;
+            import flash.events.*;
+
+            [Bindable]
+            public var title:String = "\xc3\xa9";
+            private var _count:int;
+
+            public function get count():int { return _count; }
+            public function set count(value:int):void { _count = value; }
+
+            private function onClick(event:MouseEvent):void
+            {
+                Alert.show("<b>" + title + "</b>");
+            }
+        ]]>
+    </mx:Script>
+    <mx:VBox>
+        <mx:Button label="b"/>
+        <mx:Script><![CDATA[
+            protected var nested:Alert;
+        ]]></mx:Script>
+    </mx:VBox>
+    <mx:Script source="external.as"/>
+</mx:Canvas>
+"""
+
+EXTERNAL = """import mx.utils.StringUtil;
+public function trimmed(s:String):String { return StringUtil.trim(s); }
+"""
+
+
+class MXMLTestCase(BaseTestCase):
+
+    def setUp(self):
+        BaseTestCase.setUp(self)
+        self.root = tempfile.mkdtemp(prefix='asdox-test-')
+        self.path = os.path.join(self.root, 'View.mxml')
+        with open(self.path, 'wb') as f:
+            f.write(VIEW)
+        with open(os.path.join(self.root, 'external.as'), 'wb') as f:
+            f.write(EXTERNAL)
+
+    def tearDown(self):
+        shutil.rmtree(self.root)
+
+    def testScripts(self):
+        scripts = list(asBuilder.mxmlScripts(self.path))
+        self.assertEqual(len(scripts), 3)
+        self.assertTrue('nested' in scripts[1])
+        self.assertEqual(scripts[2], EXTERNAL)
+
+    def testMembers(self):
+        self.builder.addMXMLSource(self.path, 'views')
+        pkg = self.builder.packages['views']
+        self.assertEqual(
+            [imp.name for imp in pkg.imports],
+            ['mx.controls.Alert', 'flash.events.*', 'mx.utils.StringUtil']
+        )
+        cls = pkg.classes['View']
+        self.assertEqual(cls.full_name, 'views.View')
+        self.assertEqual(sorted(cls.variables), ['_count', 'nested', 'title'])
+        self.assertEqual(sorted(cls.methods), ['onClick', 'trimmed'])
+        self.assertEqual(list(cls.getter_methods), ['count'])
+        self.assertEqual(list(cls.setter_methods), ['count'])
+        self.assertTrue(isinstance(cls.variables['nested'].type_, asModel.ASImport))
+        self.assertEqual(self.builder.metatags.names(), ['Bindable'])
+        self.assertEqual(list(self.builder.manifest), [self.path])
+
+    def testDefaultPackage(self):
+        self.builder.addMXMLSource(self.path, '')
+        cls = self.builder.packages[''].classes['View']
+        self.assertEqual(cls.full_name, 'View')
+
+    def testNonePackage(self):
+        self.builder.addMXMLSource(self.path, None)
+        self.assertFalse('None' in self.builder.packages)
+        self.assertEqual(self.builder.packages[''].classes['View'].full_name,
+                         'View')
+
+    def testLeadingComment(self):
+        # 根元素之前的注释和处理指令不影响读取
+        source = VIEW.replace(
+            '<mx:Canvas', '<!-- license -->\n<?pi data?>\n<mx:Canvas', 1)
+        with open(self.path, 'wb') as f:
+            f.write(source)
+        self.assertEqual(len(list(asBuilder.mxmlScripts(self.path))), 3)
+        project = os.path.join(self.root, 'project', 'views')
+        os.makedirs(project)
+        with open(os.path.join(project, 'View.mxml'), 'wb') as f:
+            f.write(source.replace('<mx:Script source="external.as"/>', ''))
+        self.builder.addProject(os.path.dirname(project))
+        cls = self.builder.packages['views'].classes['View']
+        self.assertEqual(sorted(cls.methods), ['onClick'])
+
+    def testReplace(self):
+        self.builder.addMXMLSource(self.path, 'views')
+        with open(self.path, 'wb') as f:
+            f.write('<mx:Canvas xmlns:mx="http://www.adobe.com/2006/mxml"/>')
+        self.builder.addMXMLSource(self.path, 'views')
+        cls = self.builder.packages['views'].classes['View']
+        self.assertEqual(cls.variables, {})
+        self.assertEqual(self.builder.metatags.names(), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,83 @@
+#!/usr/bin/env python
+# encoding=utf-8
+
+import os
+import re
+import unittest
+import pyparsing
+from helper import BaseTestCase
+from asdox import asBuilder, asOutline
+
+
+def outline(pkg):
+    "The part of a package that outline mode extracts"
+    types = {}
+    for cls in list(pkg.classes.values()) + list(pkg.interfaces.values()):
+        types[cls.name] = (
+            cls.full_name, cls.isInterface, cls.extends, cls.implements,
+            sorted(cls.variables), sorted(cls.methods),
+            sorted(cls.getter_methods), sorted(cls.setter_methods),
+        )
+    return pkg.name, [imp.name for imp in pkg.imports], types
+
+
+class OutlineTestCase(BaseTestCase):
+
+    def testResources(self):
+        count = 0
+        for path, dirs, files in os.walk('tests/resources'):
+            for filename in sorted(files):
+                if not filename.endswith('.as'):
+                    continue
+                src = open(os.path.join(path, filename), 'rb').read()
+                pkg = asOutline.outlinePackage(src)
+                # 完整解析还不支持包级别的 include
+                full = self.builder.parsePackage(
+                    re.sub(r'(?m)^include .*\n', '', src)
+                )
+                self.assertEqual(outline(pkg), outline(full))
+                self.assertTrue(pkg.isPartial)
+                self.assertFalse(full.isPartial)
+                count += 1
+        self.assertTrue(count > 0)
+
+    def testSkipsBodiesAndComments(self):
+        pkg = asOutline.outlinePackage('''
+        package a.b {
+            import flash.events.*;
+            // class Commented {}
+            public interface I extends J { function f():void; }
+            public class A extends B implements I, K {
+                var s:String = "class Quoted { var q; }";
+                /* var hidden; */
+                public function get v():int { var local = {}; return 1; }
+                public function set v(value:int):void { }
+                function get(x) { function nested() {} }
+            }
+        }''')
+        self.assertEqual(pkg.name, 'a.b')
+        self.assertEqual([imp.name for imp in pkg.imports], ['flash.events.*'])
+        self.assertEqual(list(pkg.interfaces), ['I'])
+        self.assertEqual(list(pkg.interfaces['I'].methods), ['f'])
+        self.assertEqual(pkg.interfaces['I'].implements, ['J'])
+        cls = pkg.classes['A']
+        self.assertTrue(cls.isPartial)
+        self.assertEqual(cls.full_name, 'a.b.A')
+        self.assertEqual(cls.extends, 'B')
+        self.assertEqual(cls.implements, ['I', 'K'])
+        self.assertEqual(list(cls.variables), ['s'])
+        self.assertEqual(list(cls.methods), ['get'])
+        self.assertEqual(list(cls.getter_methods), ['v'])
+        self.assertEqual(list(cls.setter_methods), ['v'])
+
+    def testNoPackage(self):
+        self.assertRaises(
+            pyparsing.ParseException, asOutline.outlinePackage, 'class A {}'
+        )
+
+    def testBuilder(self):
+        builder = asBuilder.Builder(outline=True)
+        builder.addSource('tests/resources')
+        self.assertTrue(builder.packages)
+        for pkg in builder.packages.values():
+            self.assertTrue(pkg.isPartial)
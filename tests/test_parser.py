@@ -0,0 +1,59 @@
+#!/usr/bin/env python
+# encoding=utf-8
+
+import os
+import re
+import unittest
+import pyparsing
+from helper import BaseTestCase
+from test_grammar import dumpModel
+from asdox import asBuilder
+
+
+class ConformanceTestCase(BaseTestCase):
+    "The descent backend must build the same models as the pyparsing one"
+
+    def assertConforms(self, src):
+        for skim in (False, True):
+            results = []
+            for backend in asBuilder.BACKENDS:
+                builder = asBuilder.Builder(skim=skim, backend=backend)
+                try:
+                    results.append(dumpModel(builder.parsePackage(src)))
+                except pyparsing.ParseBaseException as exc:
+                    results.append((exc.lineno, exc.col))
+            self.assertEqual(results[1], results[0])
+
+    def testResources(self):
+        count = 0
+        for path, dirs, files in os.walk('tests/resources'):
+            for filename in sorted(files):
+                if filename.endswith('.as'):
+                    src = open(os.path.join(path, filename), 'rb').read()
+                    # 语法还不支持包级别的 include, 去掉后才能比较模型,
+                    # 而不只是比较两边的出错位置
+                    src = re.sub(r'(?m)^include .*\n', '', src)
+                    self.assertConforms(src)
+                    # 每个资源都能解析, 抛出异常即失败
+                    self.builder.parsePackage(src)
+                    count += 1
+        self.assertTrue(count > 0)
+
+    def testQuirks(self):
+        # 成员中的变量初始化会覆盖类名, 修饰符的顺序影响方法能否匹配
+        self.assertConforms('''
+        package a {
+            [X(0x1F, 1e5, k="v")]
+            public class A {
+                static public function f(...rest):* { }
+                override static public function g():void { }
+                const c = [];
+                var d:Object = {a: "b;c"};
+                e = "x\\\\ty";
+            }
+        }''')
+        self.assertConforms('package { public namespace ns; }')
+        self.assertConforms('package a { class B { public function ( } }')
+
+    def testUnknownBackend(self):
+        self.assertRaises(ValueError, asBuilder.Builder, backend='yacc')
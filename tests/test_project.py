@@ -0,0 +1,115 @@
+#!/usr/bin/env python
+# encoding=utf-8
+
+import os
+import shutil
+import tempfile
+import unittest
+from helper import BaseTestCase, BUILDER_OPTIONS
+from test_grammar import dumpModel
+from asdox import asBuilder
+
+FILES = {
+    'com/example/Model.as': """
+        package com.example
+        {
+            public class Model
+            {
+                public var name:String;
+            }
+        }
+    """,
+    'com/example/views/Form.mxml': """<?xml version="1.0"?>
+        <mx:Panel xmlns:mx="http://www.adobe.com/2006/mxml">
+            <mx:Script><![CDATA[
+                import com.example.Model;
+                public var model:Model;
+            ]]></mx:Script>
+        </mx:Panel>
+    """,
+    'Main.mxml': """<?xml version="1.0"?>
+        <mx:Application xmlns:mx="http://www.adobe.com/2006/mxml">
+            <mx:Script><![CDATA[
+                public function start():void { }
+            ]]></mx:Script>
+        </mx:Application>
+    """,
+    'README.txt': 'not a source file',
+}
+
+
+class ProjectTestCase(BaseTestCase):
+
+    def setUp(self):
+        BaseTestCase.setUp(self)
+        self.root = tempfile.mkdtemp(prefix='asdox-test-')
+        for name, content in FILES.items():
+            path = os.path.join(self.root, *name.split('/'))
+            if not os.path.isdir(os.path.dirname(path)):
+                os.makedirs(os.path.dirname(path))
+            with open(path, 'wb') as f:
+                f.write(content)
+
+    def tearDown(self):
+        shutil.rmtree(self.root)
+
+    def testProjectFiles(self):
+        files = [
+            (entry.relpath, pkgname)
+            for entry, pkgname in self.builder.projectFiles(self.root)
+        ]
+        self.assertEqual(files, [
+            ('Main.mxml', ''),
+            ('com/example/Model.as', None),
+            ('com/example/views/Form.mxml', 'com.example.views'),
+        ])
+
+    def testAddProject(self):
+        self.builder.addProject(self.root)
+        self.assertEqual(
+            sorted(self.builder.packages),
+            ['', 'com.example', 'com.example.views']
+        )
+        form = self.builder.packages['com.example.views'].classes['Form']
+        self.assertEqual(form.full_name, 'com.example.views.Form')
+        self.assertEqual(
+            self.builder.symbols().typeOf(form, form.variables['model']),
+            'com.example.Model'
+        )
+        main = self.builder.packages[''].classes['Main']
+        self.assertEqual(list(main.methods), ['start'])
+        self.assertEqual(len(self.builder.manifest), 3)
+
+    def testWorkers(self):
+        self.builder.addProject(self.root)
+        builder = asBuilder.Builder(workers=2, **BUILDER_OPTIONS)
+        builder.addProject(self.root)
+        self.assertEqual(dumpModel(builder.packages),
+                         dumpModel(self.builder.packages))
+        self.assertEqual(sorted(builder.manifest), sorted(self.builder.manifest))
+
+    def testRebuild(self):
+        self.builder.addProject(self.root)
+        pattern = ('*.as', '*.mxml')
+        self.assertEqual(self.builder.rebuild(self.root, pattern), [])
+        path = os.path.join(self.root, 'com', 'example', 'views', 'Form.mxml')
+        with open(path, 'wb') as f:
+            f.write(FILES['com/example/views/Form.mxml'].replace(
+                'public var model:Model;', 'public var other:Model;'))
+        # mtime 的精度可能不够
+        st = os.stat(path)
+        os.utime(path, (st.st_atime, st.st_mtime + 10))
+        self.assertEqual(self.builder.rebuild(self.root, pattern), [path])
+        form = self.builder.packages['com.example.views'].classes['Form']
+        self.assertEqual(list(form.variables), ['other'])
+        self.assertEqual(sorted(self.builder.packages),
+                         ['', 'com.example', 'com.example.views'])
+        os.remove(path)
+        self.builder.rebuild(self.root, pattern)
+        self.assertEqual(
+            self.builder.packages['com.example.views'].classes, {}
+        )
+
+
+if __name__ == '__main__':
+    unittest.main()
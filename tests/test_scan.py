@@ -0,0 +1,198 @@
+#!/usr/bin/env python
+# encoding=utf-8
+
+import os
+import shutil
+import tempfile
+import unittest
+from helper import BaseTestCase, BUILDER_OPTIONS
+from asdox import asBuilder, asScan
+
+FILES = [
+    'Main.as',
+    'Main.mxml',
+    'README.txt',
+    'com/example/Model.as',
+    'com/example/Model.txt',
+    'com/example/gen/Generated.as',
+    'com/example/gen/Keep.as',
+    'bin-debug/Main.as',
+    'src/bin-debug',
+    'test/ModelTest.as',
+]
+
+CLASS = """
+    package {0}
+    {{
+        public class {1}
+        {{
+        }}
+    }}
+"""
+
+
+class ScanTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.root = tempfile.mkdtemp(prefix='asdox-test-')
+        for name in FILES:
+            self.write(name)
+
+    def tearDown(self):
+        shutil.rmtree(self.root)
+
+    def write(self, name, content=''):
+        path = os.path.join(self.root, *name.split('/'))
+        if not os.path.isdir(os.path.dirname(path)):
+            os.makedirs(os.path.dirname(path))
+        with open(path, 'wb') as f:
+            f.write(content)
+        return path
+
+    def scan(self, include='*.as', exclude=()):
+        scanner = asScan.Scanner(include, exclude)
+        return [entry.relpath for entry in scanner.scan(self.root)]
+
+    def testInclude(self):
+        self.assertEqual(self.scan(), [
+            'Main.as',
+            'bin-debug/Main.as',
+            'com/example/Model.as',
+            'com/example/gen/Generated.as',
+            'com/example/gen/Keep.as',
+            'test/ModelTest.as',
+        ])
+        self.assertEqual(self.scan(['*.mxml', '*.txt']), [
+            'Main.mxml', 'README.txt', 'com/example/Model.txt'
+        ])
+        self.assertEqual(self.scan('com/*/*.as'), ['com/example/Model.as'])
+
+    def testExclude(self):
+        # 目录模式不匹配同名文件
+        self.assertEqual(self.scan('*', ['bin-debug/', '*.as', '*.txt']), [
+            'Main.mxml', 'src/bin-debug'
+        ])
+        self.assertEqual(self.scan(exclude=['/com/example/gen', 'test']), [
+            'Main.as', 'bin-debug/Main.as', 'com/example/Model.as'
+        ])
+        self.assertEqual(self.scan(exclude=['**/gen/*.as', '!Keep.as']), [
+            'Main.as',
+            'bin-debug/Main.as',
+            'com/example/Model.as',
+            'com/example/gen/Keep.as',
+            'test/ModelTest.as',
+        ])
+        # 被排除的目录中的文件不能再被包含
+        self.assertEqual(self.scan(exclude=['gen/', '!Keep.as']), [
+            'Main.as',
+            'bin-debug/Main.as',
+            'com/example/Model.as',
+            'test/ModelTest.as',
+        ])
+        self.assertEqual(self.scan(exclude=['/Main.as', 'M?del*.as']), [
+            'bin-debug/Main.as',
+            'com/example/gen/Generated.as',
+            'com/example/gen/Keep.as',
+        ])
+
+    def testPrune(self):
+        listed = []
+        scandir = asScan._scandir
+
+        def recording(path):
+            listed.append(os.path.relpath(path, self.root))
+            return scandir(path)
+
+        asScan._scandir = recording
+        try:
+            self.scan(exclude=['com/', 'bin-debug/'])
+        finally:
+            asScan._scandir = scandir
+        self.assertEqual(listed, [os.curdir, 'src', 'test'])
+
+    def testListdir(self):
+        scandir = asScan._scandir
+        asScan._scandir = asScan._listdir
+        try:
+            found = self.scan(exclude=['gen/'])
+        finally:
+            asScan._scandir = scandir
+        self.assertEqual(found, self.scan(exclude=['gen/']))
+
+    def testStat(self):
+        path = self.write('Sized.as', 'x' * 10)
+        entry = [e for e in asScan.Scanner().scan(self.root)
+                 if e.relpath == 'Sized.as'][0]
+        self.assertEqual(entry.path, path)
+        self.assertEqual(entry.stat.st_size, 10)
+        self.assertEqual(entry.stat.st_mtime, os.stat(path).st_mtime)
+
+    @unittest.skipUnless(hasattr(os, 'symlink'), 'needs symbolic links')
+    def testSymlinks(self):
+        os.symlink(os.path.join(self.root, 'com'),
+                   os.path.join(self.root, 'alias'))
+        os.symlink(self.root, os.path.join(self.root, 'com', 'loop'))
+        os.symlink(os.path.join(self.root, 'Main.as'),
+                   os.path.join(self.root, 'test', 'Linked.as'))
+        os.symlink(os.path.join(self.root, 'missing.as'),
+                   os.path.join(self.root, 'Broken.as'))
+        found = self.scan()
+        # 每个目录和文件只出现一次
+        self.assertEqual(found, [
+            'Main.as',
+            'alias/example/Model.as',
+            'alias/example/gen/Generated.as',
+            'alias/example/gen/Keep.as',
+            'bin-debug/Main.as',
+            'test/ModelTest.as',
+        ])
+
+    def testIncludes(self):
+        scanner = asScan.Scanner(['*.as', 'com/*/*.txt'], ['gen/'])
+        self.assertTrue(scanner.includes('Main.as'))
+        self.assertTrue(scanner.includes('com/example/gen/Keep.as'))
+        self.assertTrue(scanner.includes('com/example/Model.txt'))
+        self.assertFalse(scanner.includes('README.txt'))
+
+
+class BuilderScanTestCase(BaseTestCase):
+
+    def setUp(self):
+        BaseTestCase.setUp(self)
+        self.root = tempfile.mkdtemp(prefix='asdox-test-')
+        for name in ('com/example/Model', 'com/example/gen/Generated'):
+            pkgname, _, clsname = name.replace('/', '.').rpartition('.')
+            path = os.path.join(self.root, *name.split('/')) + '.as'
+            if not os.path.isdir(os.path.dirname(path)):
+                os.makedirs(os.path.dirname(path))
+            with open(path, 'wb') as f:
+                f.write(CLASS.format(pkgname, clsname))
+
+    def tearDown(self):
+        shutil.rmtree(self.root)
+
+    def testExclude(self):
+        builder = asBuilder.Builder(exclude='gen/', **BUILDER_OPTIONS)
+        self.assertEqual(
+            list(builder.locate(['*.as', '*.mxml'], self.root)),
+            [os.path.join(self.root, 'com', 'example', 'Model.as')]
+        )
+        builder.addSource(self.root)
+        self.assertEqual(sorted(builder.packages), ['com.example'])
+
+    def testRebuild(self):
+        self.builder.addSource(self.root)
+        self.assertEqual(sorted(self.builder.packages),
+                         ['com.example', 'com.example.gen'])
+        self.assertEqual(self.builder.rebuild(self.root), [])
+        # 新排除的文件从模型中移除
+        self.builder.exclude = ['gen/']
+        self.assertEqual(self.builder.rebuild(self.root), [])
+        self.assertEqual(
+            list(self.builder.packages['com.example.gen'].classes), []
+        )
+        self.assertEqual(len(self.builder.manifest), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
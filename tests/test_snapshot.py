@@ -0,0 +1,172 @@
+#!/usr/bin/env python
+# encoding=utf-8
+
+import os
+import re
+import shutil
+import struct
+import tempfile
+import unittest
+from helper import BaseTestCase, BUILDER_OPTIONS
+from test_grammar import dumpModel
+from asdox import asBuilder, asModel, asSnapshot
+
+RESOURCES = [
+    'tests/resources/Button.as',
+    'tests/resources/Filter.as',
+    'tests/resources/Filter2.as',
+    'tests/resources/mx/utils/StringUtil.as',
+]
+
+
+class SnapshotTestCase(BaseTestCase):
+
+    def setUp(self):
+        BaseTestCase.setUp(self)
+        self.root = tempfile.mkdtemp(prefix='asdox-test-')
+        self.src = os.path.join(self.root, 'src')
+        os.makedirs(self.src)
+        for filename in RESOURCES:
+            src = open(filename, 'rb').read()
+            # 语法还不支持包级别的 include
+            src = re.sub(r'(?m)^include .*\n', '', src)
+            name = os.path.join(self.src, os.path.basename(filename))
+            with open(name, 'wb') as f:
+                f.write(src)
+        self.path = os.path.join(self.root, 'packages.asds')
+
+    def tearDown(self):
+        shutil.rmtree(self.root)
+
+    def roundTrip(self, **options):
+        options = dict(BUILDER_OPTIONS, **options)
+        builder = asBuilder.Builder(**options)
+        builder.addSource(self.src)
+        builder.save(self.path)
+        loaded = asBuilder.Builder(**options)
+        loaded.load(self.path)
+        self.assertEqual(dumpModel(loaded.packages), dumpModel(builder.packages))
+        return builder, loaded
+
+    def testRoundTrip(self):
+        builder, loaded = self.roundTrip()
+        self.assertEqual(sorted(loaded.manifest), sorted(builder.manifest))
+        self.assertEqual(loaded._owners, builder._owners)
+        for name, pkg in loaded.packages.items():
+            self.assertEqual(
+                list(pkg.toTokens()), list(builder.packages[name].toTokens())
+            )
+
+    def testTokenPolicies(self):
+        for tokens in asBuilder.TOKEN_POLICIES:
+            self.roundTrip(tokens=tokens)
+        self.roundTrip(skim=True)
+        self.roundTrip(outline=True)
+
+    def testSharedNodes(self):
+        builder, loaded = self.roundTrip()
+        pkg = loaded.packages['mx.utils']
+        imports = dict((id(imp), imp) for imp in pkg.imports)
+        shared = [
+            var.type_ for cls in pkg.classes.values()
+            for var in cls.variables.values()
+            if isinstance(var.type_, asModel.ASImport)
+        ]
+        for imp in shared:
+            self.assertTrue(id(imp) in imports)
+
+    def testInternedNames(self):
+        builder, loaded = self.roundTrip()
+        for pkg in loaded.packages.values():
+            for cls in pkg.classes.values():
+                self.assertTrue(cls.name is asModel.strings.intern(cls.name))
+
+    def testLazyPackage(self):
+        builder = asBuilder.Builder(**BUILDER_OPTIONS)
+        builder.addSource(self.src)
+        builder.save(self.path)
+        snapshot = asSnapshot.Snapshot(self.path)
+        self.assertEqual(snapshot.names(), sorted(builder.packages))
+        self.assertTrue('mx.utils' in snapshot)
+        self.assertFalse('missing' in snapshot)
+        pkg = snapshot.package('mx.utils')
+        self.assertTrue(snapshot.package('mx.utils') is pkg)
+        self.assertRaises(KeyError, snapshot.package, 'missing')
+        loaded = asBuilder.Builder(**BUILDER_OPTIONS)
+        loaded.load(self.path, ['mx.utils'])
+        self.assertEqual(list(loaded.packages), ['mx.utils'])
+        self.assertEqual(
+            dumpModel(loaded.packages['mx.utils']),
+            dumpModel(builder.packages['mx.utils'])
+        )
+        self.assertEqual(
+            [entry.path for entry in loaded.manifest.values()],
+            [os.path.join(self.src, 'StringUtil.as')]
+        )
+
+    def testRebuildAfterLoad(self):
+        builder = asBuilder.Builder(**BUILDER_OPTIONS)
+        builder.addSource(self.src)
+        builder.save(self.path)
+        loaded = asBuilder.Builder(**BUILDER_OPTIONS)
+        loaded.load(self.path)
+        # 文件没有变化, 不需要重新解析
+        self.assertEqual(loaded.rebuild(self.src), [])
+
+    def testLoadIntoNonEmpty(self):
+        builder = asBuilder.Builder(**BUILDER_OPTIONS)
+        builder.addSource(self.src)
+        builder.save(self.path)
+        # 已解析过同一批文件的 Builder 载入快照后不应丢失类
+        loaded = asBuilder.Builder(**BUILDER_OPTIONS)
+        loaded.addSource(self.src)
+        loaded.load(self.path)
+        self.assertEqual(dumpModel(loaded.packages), dumpModel(builder.packages))
+        self.assertEqual(sorted(loaded.manifest), sorted(builder.manifest))
+        self.assertEqual(loaded._owners, builder._owners)
+        self.assertEqual(loaded.rebuild(self.src), [])
+
+    def testFileImports(self):
+        builder = asBuilder.Builder(**BUILDER_OPTIONS)
+        for name in ('a', 'b'):
+            builder.addSource("""
+            package p
+            {{
+                import {0}.Event;
+                public class {0}View
+                {{
+                    public function f():Event
+                    {{
+                    }}
+                }}
+            }}
+            """.format(name))
+        builder.save(self.path)
+        loaded = asBuilder.Builder(**BUILDER_OPTIONS)
+        loaded.load(self.path)
+        symbols = loaded.symbols()
+        for name in ('a', 'b'):
+            cls = loaded.packages['p'].classes[name + 'View']
+            self.assertEqual([imp.name for imp in cls.imports],
+                             [name + '.Event'])
+            self.assertEqual(symbols.typeOf(cls, cls.methods['f']),
+                             name + '.Event')
+
+    def testBadHeader(self):
+        with open(self.path, 'wb') as f:
+            f.write('JUNK' + '\0' * 12)
+        self.assertRaises(ValueError, asSnapshot.Snapshot, self.path)
+        with open(self.path, 'wb') as f:
+            f.write(struct.pack(
+                '<4sHxxQ', asSnapshot.MAGIC, asSnapshot.FORMAT_VERSION + 1, 16
+            ))
+        self.assertRaises(ValueError, asSnapshot.Snapshot, self.path)
+
+    def testUnknownNode(self):
+        pkg = asModel.ASPackage('a')
+        pkg.classes['A'] = object()
+        self.assertRaises(TypeError, asSnapshot.dumpRecord, pkg)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,258 @@
+#!/usr/bin/env python
+# encoding=utf-8
+
+import unittest
+from helper import BaseTestCase
+from asdox import asModel, asSymbols
+
+SOURCES = [
+    """
+    package a.b
+    {
+        import c.D;
+        import e.*;
+        public class A extends Base implements I, c.J
+        {
+            public var d:D;
+            public var e:E;
+            public var local:Local;
+            public var s:String;
+            public var top:Top;
+            public var unknown:Unknown;
+            public function f(p:E, q:Local):D
+            {
+            }
+        }
+    }
+    """,
+    """
+    package a.b
+    {
+        public class Local
+        {
+        }
+    }
+    """,
+    """
+    package a.b
+    {
+        public interface I
+        {
+        }
+    }
+    """,
+    """
+    package c
+    {
+        public class D
+        {
+        }
+    }
+    """,
+    """
+    package c
+    {
+        public interface J
+        {
+        }
+    }
+    """,
+    """
+    package e
+    {
+        public class Base
+        {
+        }
+    }
+    """,
+    """
+    package e
+    {
+        public class E
+        {
+        }
+    }
+    """,
+    """
+    package
+    {
+        public class Top
+        {
+        }
+    }
+    """,
+]
+
+
+class SymbolTableTestCase(BaseTestCase):
+
+    def setUp(self):
+        BaseTestCase.setUp(self)
+        for src in SOURCES:
+            self.builder.addSource(src)
+        self.cls = self.builder.packages['a.b'].classes['A']
+
+    def testImportedVariableType(self):
+        # 解析时已把导入的类型替换为 ASImport
+        var = self.cls.variables['d']
+        self.assertTrue(isinstance(var.type_, asModel.ASImport))
+        self.assertEqual(var.type_.name, 'c.D')
+        self.assertEqual(self.cls.variables['e'].type_, 'E')
+
+    def testVariables(self):
+        symbols = self.builder.symbols()
+        expected = {
+            'd': 'c.D',
+            'e': 'e.E',
+            'local': 'a.b.Local',
+            's': 'String',
+            'top': 'Top',
+            'unknown': None,
+        }
+        for name, resolved in expected.items():
+            var = self.cls.variables[name]
+            self.assertEqual(symbols.typeOf(self.cls, var), resolved)
+
+    def testMethod(self):
+        symbols = self.builder.symbols()
+        method = self.cls.methods['f']
+        self.assertEqual(symbols.typeOf(self.cls, method), 'c.D')
+        self.assertEqual(
+            symbols.typeOf(self.cls, method.arguments['p']), 'e.E'
+        )
+        self.assertEqual(
+            symbols.typeOf(self.cls, method.arguments['q']), 'a.b.Local'
+        )
+
+    def testExtendsAndImplements(self):
+        symbols = self.builder.symbols()
+        self.assertEqual(symbols.extendsOf(self.cls), 'e.Base')
+        self.assertEqual(symbols.implementsOf(self.cls), ['a.b.I', 'c.J'])
+        self.assertTrue(
+            symbols.find('c.J') is self.builder.packages['c'].interfaces['J']
+        )
+        self.assertEqual(
+            symbols.extendsOf(self.builder.packages['e'].classes['Base']),
+            None
+        )
+
+    def testImportBeforeSamePackage(self):
+        self.builder.addSource("""
+        package c
+        {
+            public class Top
+            {
+            }
+        }
+        """)
+        self.builder.addSource("""
+        package e
+        {
+            import c.Top;
+            public class F
+            {
+                public var top:Top;
+                public var base:Base;
+            }
+        }
+        """)
+        symbols = self.builder.symbols()
+        cls = self.builder.packages['e'].classes['F']
+        self.assertEqual(symbols.typeOf(cls, cls.variables['top']), 'c.Top')
+        self.assertEqual(symbols.typeOf(cls, cls.variables['base']), 'e.Base')
+
+    def testMemoized(self):
+        symbols = self.builder.symbols()
+        self.assertTrue(self.builder.symbols() is symbols)
+        self.assertEqual(symbols._types, None)
+        symbols.resolve('E', 'a.b')
+        self.assertEqual(symbols._scope('a.b').resolved, {'E': 'e.E'})
+        # 包变化后重新建立
+        self.builder.addSource("""
+        package a.b
+        {
+            public class E
+            {
+            }
+        }
+        """)
+        symbols = self.builder.symbols()
+        self.assertEqual(symbols.resolve('E', 'a.b'), 'a.b.E')
+
+    def testCandidates(self):
+        symbols = self.builder.symbols()
+        self.assertEqual(symbols.candidates('Unknown', 'a.b'),
+                         ['a.b.Unknown', 'e.Unknown', 'Unknown'])
+        self.assertEqual(symbols.candidates('D', 'a.b'), ['c.D'])
+        self.assertEqual(symbols.candidates('x.Y', 'a.b'), ['x.Y'])
+        self.assertEqual(symbols.candidates('Top', ''), ['Top'])
+        self.assertEqual(symbols.candidates(None, 'a.b'), [])
+
+    def testFileImports(self):
+        # 同一个包的两个文件用同一个短名称指不同的类
+        for pkgname in ('x', 'y'):
+            for name in ('Event', 'Base'):
+                self.builder.addSource("""
+                package {0}
+                {{
+                    public class {1}
+                    {{
+                    }}
+                }}
+                """.format(pkgname, name))
+        self.builder.addSource("""
+        package p
+        {
+            import x.Event;
+            import x.*;
+            public class First extends Base
+            {
+                public function f(e:Event):Event
+                {
+                }
+            }
+        }
+        """)
+        self.builder.addSource("""
+        package p
+        {
+            import y.Event;
+            import y.*;
+            public interface ISecond extends Base
+            {
+                function g(e:Event):Event;
+            }
+        }
+        """)
+        first = self.builder.packages['p'].classes['First']
+        second = self.builder.packages['p'].interfaces['ISecond']
+        self.assertEqual([imp.name for imp in first.imports],
+                         ['x.Event', 'x.*'])
+        symbols = self.builder.symbols()
+        self.assertEqual(symbols.extendsOf(first), 'x.Base')
+        self.assertEqual(symbols.typeOf(first, first.methods['f']), 'x.Event')
+        self.assertEqual(symbols.implementsOf(second), ['y.Base'])
+        self.assertEqual(symbols.typeOf(second, second.methods['g']),
+                         'y.Event')
+        self.assertEqual(
+            symbols.typeOf(second, second.methods['g'].arguments['e']),
+            'y.Event'
+        )
+        # 不指定文件时使用包中所有文件的导入
+        self.assertEqual(symbols.resolve('Event', 'p'), 'x.Event')
+        self.assertEqual(symbols.candidates('Event', 'p', second.imports),
+                         ['y.Event'])
+
+    def testImportedNames(self):
+        imports = [
+            asModel.ASImport('a.X'),
+            asModel.ASImport('b.*'),
+            asModel.ASImport('c.X'),
+        ]
+        names = asSymbols.importedNames(imports)
+        self.assertEqual(list(names), ['X'])
+        self.assertTrue(names['X'] is imports[0])
+
+
+if __name__ == '__main__':
+    unittest.main()
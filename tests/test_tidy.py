@@ -0,0 +1,126 @@
+#!/usr/bin/env python
+# encoding=utf-8
+
+import unittest
+import pyparsing
+from helper import BaseTestCase
+from asdox import asBuilder
+from asdox.asBuilder import TidySourceFile, OffsetMap, LineMap
+
+
+class TrimCommentsTestCase(BaseTestCase):
+    "Test cases for comment removal"
+
+    def testComments(self):
+        self.assertEqual(
+            TidySourceFile.trim_comments(
+                'a; // line\nb; /* block\n */ c; /** doc */d;'
+            ),
+            'a; \nb;  c; d;'
+        )
+
+    def testStringsAreKept(self):
+        source = 'url = "http://example.com/*"; s = \'//\'; // gone'
+        self.assertEqual(
+            TidySourceFile.trim_comments(source),
+            'url = "http://example.com/*"; s = \'//\'; '
+        )
+
+    def testQuotesInComments(self):
+        self.assertEqual(
+            TidySourceFile.trim_comments("a; // don't\nb = \"/*\";"),
+            'a; \nb = "/*";'
+        )
+
+    def testOffsetMap(self):
+        source = '/* head */package a\n{ // x\n  class B {}\n}'
+        offsets = OffsetMap()
+        trimmed = TidySourceFile.trim_comments(source, offsets)
+        self.assertEqual(trimmed, 'package a\n{ \n  class B {}\n}')
+        for word in ('package', 'class', 'B'):
+            pos = trimmed.index(word)
+            self.assertEqual(
+                source[offsets.toOriginal(pos):].split()[0],
+                trimmed[pos:].split()[0]
+            )
+
+    def testNoComments(self):
+        offsets = OffsetMap()
+        self.assertEqual(TidySourceFile.trim_comments('a;', offsets), 'a;')
+        self.assertEqual(offsets.toOriginal(1), 1)
+
+
+class ProcessTestCase(BaseTestCase):
+    "Test cases for the fused clean-up pass"
+
+    def testSameAsSeparatePasses(self):
+        for filename in ("tests/resources/Filter.as",
+                         "tests/resources/Button.as",
+                         "tests/resources/mx/utils/StringUtil.as"):
+            source = open(filename, 'rb').read()
+            self.assertEqual(
+                TidySourceFile.process(source),
+                TidySourceFile.tidy(TidySourceFile.trim_comments(
+                    TidySourceFile.trim_bomflag(source)
+                ))
+            )
+
+    def testTidy(self):
+        self.assertEqual(
+            TidySourceFile.process(
+                '\xEF\xBB\xBF\n  a = 1;   \n\n  ;\n/* x */\n'
+                '  return (a + b) ;\n  return\n  (c);\n;'
+            ),
+            '  a = 1;\n  return a + b;\n  return c;\n;'
+        )
+
+    def testOffsetsAfterReturnParens(self):
+        source = (
+            'if (a) { return  (b + c) ; } /* x */ else { b = 1; }\n'
+            '\treturn (d);}\n'
+        )
+        offsets = OffsetMap()
+        tidied = TidySourceFile.process(source, offsets)
+        self.assertEqual(
+            tidied, 'if (a) { return b + c; }  else { b = 1; }\n\treturn d;}'
+        )
+        # 删除括号之后同一行中的位置也能换算回来
+        for pos, char in enumerate(tidied):
+            if char != ' ':
+                self.assertEqual(source[offsets.toOriginal(pos)], char)
+
+    def testLineMap(self):
+        source = (
+            '\xEF\xBB\xBFpackage a /* x\n */ {\n\t;\n\tclass B {\n'
+            '\t\tf(); return (c); /* y */ g(\td);\n\n\t}\n}'
+        )
+        offsets = OffsetMap()
+        linemap = LineMap()
+        tidied = TidySourceFile.process(source, offsets, linemap)
+        # 与逐个片段记录的 OffsetMap 结果一致
+        positions = linemap.toOriginal(range(len(tidied)))
+        for pos, char in enumerate(tidied):
+            if char != '\n':
+                self.assertEqual(positions[pos], offsets.toOriginal(pos))
+        # 展开 Tab 之后的位置
+        expanded = tidied.expandtabs()
+        positions = linemap.toOriginal(range(len(expanded)), expanded=True)
+        for pos, char in enumerate(expanded):
+            if char not in ' \n':
+                self.assertEqual(source[positions[pos]], char)
+
+    def testErrorPositionInOriginalFile(self):
+        source = (
+            '/**\n * Documented\n */\npackage a\n{\n\n'
+            '\t// comment\n\tclass B\n\t{\n\t\tpublic function (\n\t}\n}\n'
+        )
+        for skim in (False, True):
+            builder = asBuilder.Builder(skim=skim)
+            try:
+                builder.parsePackage(source)
+            except pyparsing.ParseBaseException as exc:
+                self.assertEqual(exc.lineno, 10)
+                self.assertEqual(exc.col, 19)
+                self.assertEqual(exc.line, '\t\tpublic function (')
+            else:
+                self.fail('ParseException not raised')
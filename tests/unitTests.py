@@ -9,6 +9,11 @@ def suite():
         'test_package', 'test_class',
         'test_class_field', 'test_class_method',
         'test_builder', 'test_parsing_files',
+        'test_cache', 'test_grammar', 'test_tidy',
+        'test_parser', 'test_outline', 'test_model',
+        'test_snapshot', 'test_index', 'test_symbols',
+        'test_hierarchy', 'test_metadata', 'test_mxml',
+        'test_project', 'test_scan', 'test_merge',
     )  # and so on
     alltests = unittest.TestSuite()
     for module in map(__import__, modules_to_test):